@@ -0,0 +1,157 @@
+from .base_filter import BaseFilter
+from concurrent.futures import as_completed
+from math import atan2, degrees, gcd
+import cv2
+import numpy as np
+from common.execution_resources import get_resources
+
+
+def line_direction(angle, max_step=2):
+    """각도(도, 반시계 방향)에 가장 가까운 정수 방향 벡터 (dx, dy)와 실제 각도 반환"""
+    best = None
+    for dx in range(-max_step, max_step + 1):
+        for dy in range(-max_step, 1):
+            if (dx, dy) == (0, 0) or gcd(dx, dy) != 1:
+                continue
+            # 이미지 좌표계는 y축이 아래 방향이므로 부호를 뒤집어 각도 계산
+            actual = degrees(atan2(-dy, dx)) % 180.0
+            error = abs(actual - angle % 180.0)
+            error = min(error, 180.0 - error)
+            if best is None or error < best[0]:
+                best = (error, (dx, dy), actual)
+    return best[1], best[2]
+
+
+def line_factors(direction, length):
+    """길이 length의 선형 구조 요소를 작은 구조 요소들의 Minkowski 합으로 분해
+
+    선분 = (방향 벡터 한 칸을 잇는 짧은 Bresenham 선분) ⊕ (주기적 선분 P(n, v)),
+    P(n, v)는 두 점 구조 요소 {0, s·v}의 합으로 O(log n)번에 만들어진다.
+    """
+    dx, dy = direction
+    step = max(abs(dx), abs(dy))
+    repeats = max(1, int(round(length / step)))
+
+    factors = []
+    base = [(int(round(dx * i / step)), int(round(dy * i / step))) for i in range(step)]
+    if len(base) > 1:
+        factors.append(base)
+
+    covered = 1
+    while covered < repeats:
+        shift = min(covered, repeats - covered)
+        factors.append([(0, 0), (shift * dx, shift * dy)])
+        covered += shift
+    return factors
+
+
+def minkowski_sum(factors):
+    """분해된 구조 요소들을 하나의 오프셋 집합으로 합성"""
+    points = {(0, 0)}
+    for factor in factors:
+        points = {(x + fx, y + fy) for x, y in points for fx, fy in factor}
+    return sorted(points)
+
+
+def points_to_kernel(points):
+    """오프셋 목록을 OpenCV 커널과 앵커로 변환"""
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    min_x, min_y = min(xs), min(ys)
+    kernel = np.zeros((max(ys) - min_y + 1, max(xs) - min_x + 1), np.uint8)
+    for x, y in points:
+        kernel[y - min_y, x - min_x] = 1
+    return kernel, (-min_x, -min_y)
+
+
+class OrientedLineMorphologyFilter(BaseFilter):
+    """방향별 선형 구조 요소 뱅크를 사용한 Top-Hat / Black-Hat 필터
+
+    각 방향의 opening(closing) 결과 중 최대값과 최소값의 차이를 응답으로 사용한다.
+    해당 방향으로만 선 모양을 유지하는 구조(Scratch 등)에서 응답이 커지고,
+    모든 방향의 선분을 포함하는 넓은 영역이나 배경은 억제된다.
+    """
+
+    def __init__(self, mode='tophat'):
+        super().__init__("Line Top-Hat" if mode == 'tophat' else "Line Black-Hat")
+        self.mode = mode
+        self.params = {
+            "length": 21,
+            "angle_step": 22.5,
+            "max_step": 2,
+            # 이 길이 이하의 선분은 분해하지 않고 단일 커널로 처리하는 편이 빠르다
+            "decompose_above": 41
+        }
+        self._bank_cache = {}
+
+    def build_bank(self, length):
+        """방향별 (실제 각도, 침식용 커널 목록, 팽창용 커널 목록) 생성"""
+        key = (length, self.params["angle_step"], self.params["max_step"], self.params["decompose_above"])
+        if key in self._bank_cache:
+            return self._bank_cache[key]
+
+        bank = {}
+        for angle in np.arange(0.0, 180.0, self.params["angle_step"]):
+            direction, actual = line_direction(angle, self.params["max_step"])
+            if direction in bank:
+                continue
+            factors = line_factors(direction, length)
+            if length <= self.params["decompose_above"]:
+                factors = [minkowski_sum(factors)]
+            erode_kernels = [points_to_kernel(points) for points in factors]
+            # 팽창은 반사된 구조 요소를 사용해야 opening/closing이 성립한다
+            dilate_kernels = [points_to_kernel([(-x, -y) for x, y in points]) for points in factors]
+            bank[direction] = (actual, erode_kernels, dilate_kernels)
+
+        self._bank_cache[key] = list(bank.values())
+        return self._bank_cache[key]
+
+    def _morph(self, gray, erode_kernels, dilate_kernels):
+        """분해된 커널로 opening(tophat) 또는 closing(blackhat) 수행"""
+        first, second = (cv2.erode, cv2.dilate) if self.mode == 'tophat' else (cv2.dilate, cv2.erode)
+        first_kernels, second_kernels = (
+            (erode_kernels, dilate_kernels) if self.mode == 'tophat' else (dilate_kernels, erode_kernels)
+        )
+        result = gray
+        for kernel, anchor in first_kernels:
+            result = first(result, kernel, anchor=anchor)
+        for kernel, anchor in second_kernels:
+            result = second(result, kernel, anchor=anchor)
+        return result
+
+    def compute(self, gray, length=None):
+        """최대 응답 이미지와 승리한 방향 각도(도) 맵 반환"""
+        bank = self.build_bank(length or self.params["length"])
+        executor = get_resources().executor("line-morph", max_workers=len(bank))
+
+        # 응답값을 상위 8비트, 방향 인덱스를 하위 8비트에 넣어 max 한 번으로 argmax까지 계산
+        best = lower = None
+        futures = {
+            executor.submit(self._morph, gray, erode_kernels, dilate_kernels): index
+            for index, (_, erode_kernels, dilate_kernels) in enumerate(bank)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            response = future.result()
+            # tophat은 opening이 가장 큰 방향, blackhat은 closing이 가장 작은 방향이 선의 방향
+            ranked = response if self.mode == 'tophat' else cv2.bitwise_not(response)
+            keyed = np.left_shift(ranked, 8, dtype=np.uint16)
+            keyed |= index
+            if best is None:
+                best, lower, upper = keyed, response.copy(), response.copy()
+                continue
+            cv2.max(best, keyed, dst=best)
+            cv2.min(lower, response, dst=lower)
+            cv2.max(upper, response, dst=upper)
+
+        # uint8 변환 시 하위 8비트(방향 인덱스)만 남는다
+        winner = best.astype(np.uint8)
+        angle_lut = np.zeros(256, np.float32)
+        angle_lut[:len(bank)] = [actual for actual, _, _ in bank]
+        return cv2.subtract(upper, lower), cv2.LUT(winner, angle_lut)
+
+    def apply(self, image, intensity=1.0):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        length = max(3, int(self.params["length"] * intensity))
+        response, _ = self.compute(gray, length)
+        return self.blend_with_original(image, response, intensity)
@@ -1,10 +1,18 @@
 # main.py
 
+import os
 import sys
+import logging
 from PyQt6.QtWidgets import QApplication
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.execution_resources import configure_resources
 from controller import FilterController
 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
 if __name__ == '__main__':
+    configure_resources('interactive')
     app = QApplication(sys.argv)
     controller = FilterController()
     sys.exit(app.exec())
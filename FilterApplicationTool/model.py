@@ -11,6 +11,7 @@ from filters.edge_filters import (
     PrewittFilter, CannyFilter
 )
 from filters.frequency_filters import BandpassFilter, GaborFilter
+from filters.morphology_filters import OrientedLineMorphologyFilter
 
 class FilterApplicationModel:
     def __init__(self):
@@ -31,7 +32,9 @@ class FilterApplicationModel:
             "Scharr X": ScharrFilter('x'),
             "Scharr Y": ScharrFilter('y'),
             "Prewitt": PrewittFilter(),
-            "Canny Edge": CannyFilter()
+            "Canny Edge": CannyFilter(),
+            "Line Top-Hat": OrientedLineMorphologyFilter('tophat'),
+            "Line Black-Hat": OrientedLineMorphologyFilter('blackhat')
         }
         
         self.filter_intensities = {name: 1.0 for name in self.filters}
@@ -58,7 +61,7 @@ class FilterApplicationModel:
             img = self.load_image_with_pil(path)
             if img is not None:
                 loaded_images.append(img)
-            if len(loaded_images) >= 1:  # Limit to 1 original image for 10 filters
+            if len(loaded_images) >= 1:  # Limit to 1 original image for the filter grid
                 break
 
         if not loaded_images:
@@ -70,9 +73,9 @@ class FilterApplicationModel:
             for filter_name in self.filters.keys():
                 filtered = self.apply_filter(filter_name, img, self.filter_intensity)
                 self.filtered_images.append((idx, filter_name, filtered))
-                if len(self.filtered_images) >= 10:
+                if len(self.filtered_images) >= len(self.filters):
                     break
-            if len(self.filtered_images) >= 10:
+            if len(self.filtered_images) >= len(self.filters):
                 break
 
         return [(self.convert_cv_qt(img), filter_name) for (_, filter_name, img) in self.filtered_images]
@@ -103,7 +103,7 @@ class FilterApplicationView(QWidget):
             return
 
         columns = 5
-        rows = 2
+        rows = 3
         max_filters = columns * rows
 
         # Calculate available width and height in the scroll area
@@ -135,9 +135,9 @@ class FilterApplicationView(QWidget):
             filter_label.deleteLater()
         self.image_widgets.clear()
 
-        # Add new widgets in a 5x2 grid
+        # Add new widgets in a 5x3 grid
         columns = 5
-        max_filters = 10  # 5 columns x 2 rows
+        max_filters = 15  # 5 columns x 3 rows
 
         for idx, (pixmap, filter_name) in enumerate(images_with_filters[:max_filters]):
             # Create filter preview label
@@ -1,16 +1,43 @@
 import sys
 import os
 import json
+import time
 import logging
+# 시작 시간 측정 기준 (무거운 모듈 import 이전)
+PROCESS_STARTED = time.perf_counter()
+from concurrent.futures import Future
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeView, QFileDialog, QSplitter,
-    QSlider, QLineEdit, QFormLayout, QCheckBox, QComboBox
+    QSlider, QLineEdit, QFormLayout, QCheckBox, QComboBox, QListWidget, QListWidgetItem, QToolButton
 )
-from PyQt6.QtCore import Qt, QModelIndex, QPoint
-from PyQt6.QtGui import QPixmap, QImage, QStandardItemModel, QStandardItem, QPainter, QColor, QPen, QFont
+from PyQt6.QtCore import Qt, QModelIndex, QPoint, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor, QPen, QFont
 import cv2
 import numpy as np
-from ultralytics import YOLO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.execution_resources import configure_resources, get_resources
+from preprocessing import PreprocessingPipeline
+from inference_worker import InferenceWorker
+from frame_cache import FrameCache, file_source_key, neighbor_image_indexes
+from detections import CANDIDATE_CONFIDENCE, candidate_options, filter_detections
+from result_cache import ResultCache, content_hash
+from image_canvas import DEFAULT_LABEL_SIZE, ImageCanvas, crop_padded, paint_boxes
+from batch_inference import BatchingInference
+from inference_backends import load_backend
+from label_store import LabelStore, label_path_for
+from label_index import build_label_index, refresh_label_index
+from startup_timer import StartupTimer
+from telemetry import StageTelemetry, format_summary
+from result_export import ResultsWriter
+from results_db import OUTCOMES, ResultsDatabase
+from stream_pipeline import DROP_POLICIES, HotFolderSource, StreamingPipeline, format_stats
+from file_tree_model import LazyFileTreeModel
+from folder_watcher import FolderWatcher, LABEL_EXTENSION
+from matching import MATCH_IOU, MATCH_METHODS, match_detections
+from sliced_inference import (
+    DEFAULT_TILE_OVERLAP, DEFAULT_TILE_SIZE, SLICE_MERGE_METHODS, slicing_options, submit_sliced
+)
 
 # 클래스 이름 매핑 정의
 CLASS_NAMES = {
@@ -29,8 +56,16 @@ CLASS_NAMES = {
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class ImageViewerApp(QWidget):
-    def __init__(self):
+    # 백그라운드 라벨 인덱싱 완료 (LabelIndex)
+    label_index_ready = pyqtSignal(object)
+    # 백그라운드 모델 로드 완료 (InferenceBackend, 실패 시 None)
+    model_ready = pyqtSignal(object)
+    # 핫 폴더 검사 정지 완료 (정지한 StreamingPipeline, 시작 실패 시 None)
+    hot_folder_stopped = pyqtSignal(object)
+
+    def __init__(self, startup=None):
         super().__init__()
+        self.startup = startup or StartupTimer()
         self.setWindowTitle("Defect Detection Viewer")
         self.setGeometry(100, 100, 1200, 800)
 
@@ -45,10 +80,12 @@ class ImageViewerApp(QWidget):
         self.current_gt_image = None
         self.current_image_path = None
 
-        # 배율 초기화 및 전처리 변수 초기화
-        self.scale_factor = 1.0
+        # 전처리 변수 초기화
         self.conf_threshold = 0.25
         self.iou_threshold = 0.45
+        self.match_iou = MATCH_IOU
+        self.match_method = 'greedy'
+        self.slicing = None  # 분할 추론 설정 (None이면 전체 이미지 한 번 추론)
         self.clahe_clip_limit = 2.0
         self.gaussian_blur_kernel = 15
         self.canny_threshold1 = 100
@@ -68,6 +105,28 @@ class ImageViewerApp(QWidget):
         self.adaptive_thresh_c = 2
         self.use_adaptive_threshold = False
 
+        # 단계별 출력을 캐시하는 전처리 파이프라인
+        self.preprocessor = PreprocessingPipeline()
+
+        # 디코딩 이미지/처리 결과 LRU 캐시 및 방향키 이동용 미리 읽기 개수
+        self.frame_cache = FrameCache(max_bytes=1024 * 1024 * 1024)
+        self.prefetch_count = 3
+        # 이웃 미리 읽기를 요청한 이미지 (같은 이미지의 설정 변경에서는 다시 요청하지 않음)
+        self.prefetch_anchor = None
+
+        # 라벨 파일은 한 번만 파싱하고 수정 시각이 바뀔 때만 다시 읽음
+        self.label_store = LabelStore()
+
+        # 폴더 전체 라벨 열 인덱스 (폴더 선택 시 백그라운드에서 증분 갱신)
+        self.label_index = None
+        self.label_index_future = None
+        # 폴더 감시로 바뀐 이미지 (루트 기준 상대 경로), 모아서 인덱스에 반영
+        self.label_index_dirty = set()
+        self.label_index_timer = QTimer(self)
+        self.label_index_timer.setSingleShot(True)
+        self.label_index_timer.setInterval(2000)
+        self.label_index_timer.timeout.connect(self.refresh_label_index)
+
         # Ground Truth 관련 변수
         self.gt_scale_factor = 1.0
         self.gt_show_labels = True
@@ -75,19 +134,57 @@ class ImageViewerApp(QWidget):
         self.current_gt_image = None
         self.current_image_path = None
         self.current_bbox_index = -1  # -1은 "All Boxes"를 의미
+        self.current_result = None
         self.center_align_enabled = True
         self.fit_to_bbox_enabled = False
-
-        # YOLO 모델 로드
+        # GT 패널 기본 이미지 (박스 없이 표시 크기로 조정한 pixmap, 라벨 토글/크기 변경 시 재사용)
+        self.gt_view = None
+        self.label_size = DEFAULT_LABEL_SIZE
+
+        # 핫 폴더 스트리밍 검사 (시작 전에는 None, 최신 결과만 주기적으로 표시)
+        self.hot_folder_pipeline = None
+        self.hot_folder_source = None
+        # 백그라운드에서 남은 이미지를 처리하며 정지 중인 파이프라인
+        self.hot_folder_stopping = None
+        self.hot_folder_latest = None
+        self.hot_folder_shown = None
+
+        # 실행별 검출 결과 DB (batch_eval.py --db로 만든 SQLite 파일, GUI 스레드에서만 조회)
+        self.results_db = None
+
+        # YOLO 모델은 창을 먼저 띄운 뒤 백그라운드에서 로드/워밍업 (준비 전까지는 전처리 결과만 표시)
+        self.yolo_model = None
+        self.model_path = None
+        self.inference = None
+        self.model_loading = True
+
+        # 디스크 검출 결과 캐시 (배치 실행과 공유)
         try:
-            self.yolo_model = YOLO(r"E:\GitHub\swh_data\test\240730E150.pt")
-            logging.info("YOLO 모델 로드 성공")
+            self.result_cache = ResultCache()
         except Exception as e:
-            logging.error(f"YOLO 모델 로드 실패: {e}")
-            self.yolo_model = None
+            logging.error(f"결과 캐시 초기화 실패: {e}")
+            self.result_cache = None
+
+        # 단계별 소요 시간 (최근 샘플의 p50/p95/p99, Chrome/Perfetto trace 내보내기, 워커/GUI 스레드 공용)
+        self.telemetry = StageTelemetry()
+
+        # 전처리와 YOLO 추론은 백그라운드 워커에서 최신 요청만 처리 (미리 읽기는 묶어서 배치 추론)
+        self.worker = InferenceWorker(self.process_image, self, process_batch=self.process_prefetch)
+        self.worker.result_ready.connect(self.on_processing_finished)
+        self.worker.start()
 
         self.initUI()
 
+        # 모델 로드 시작 (settings.json의 model_path/backend, 없으면 VDT_MODEL/VDT_BACKEND 또는 기본 경로)
+        self.model_ready.connect(self.on_model_ready)
+        settings = self.load_settings()
+        executor = get_resources().executor("model-load", max_workers=1)
+        executor.submit(self.load_model, settings.get("model_path"), settings.get("backend"))
+
+        # 마지막으로 연 결과 DB 다시 열기
+        if settings.get("results_db_path") and os.path.isfile(settings["results_db_path"]):
+            self.open_results_db(settings["results_db_path"])
+
     def initUI(self):
         """UI 초기화"""
         # 메인 레이아웃
@@ -102,10 +199,11 @@ class ImageViewerApp(QWidget):
         left_widget = QWidget()
         left_layout = QVBoxLayout(left_widget)
         left_layout.setContentsMargins(5, 5, 5, 5)  # 약간의 여백 추가
-        self.image_label = QLabel("Select an image file to display")
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setMinimumWidth(800)  # 최소 너비 설정
-        left_layout.addWidget(self.image_label)
+        # 확대/이동은 캔버스에서 보기 연산으로만 처리 (휠: 커서 중심 확대, 드래그: 이동, 더블 클릭: 맞춤)
+        self.image_canvas = ImageCanvas("Select an image file to display")
+        self.image_canvas.telemetry = self.telemetry
+        self.image_canvas.setMinimumWidth(800)  # 최소 너비 설정
+        left_layout.addWidget(self.image_canvas)
         splitter.addWidget(left_widget)
 
         # 중앙: Ground Truth 이미지 표시 (1)
@@ -196,16 +294,50 @@ class ImageViewerApp(QWidget):
         self.folder_button.clicked.connect(self.select_folder)
         right_layout.addWidget(self.folder_button)
 
+        # 모델 로드 상태 (로드/워밍업이 끝나야 검출 결과 표시)
+        self.model_status_label = QLabel("Model: loading...")
+        right_layout.addWidget(self.model_status_label)
+
         # 트리뷰 설정
+        # 폴더는 펼칠 때만 백그라운드에서 읽음 (대용량 폴더에서도 UI가 멈추지 않음)
         self.tree_view = QTreeView()
-        self.file_model = QStandardItemModel()
+        self.tree_view.setUniformRowHeights(True)
+        self.file_model = LazyFileTreeModel(
+            get_resources().executor("file-tree", max_workers=1), extensions=('.png', '.jpg', '.jpeg')
+        )
+        self.file_model.path_revealed.connect(self.on_path_revealed)
         self.tree_view.setModel(self.file_model)
+
+        # 불러온 폴더만 감시해 새 이미지/라벨 수정을 반영 (VDT_WATCH: auto, native, poll, off)
+        self.folder_watcher = FolderWatcher(
+            get_resources().executor("folder-watch", max_workers=1), extensions=('.png', '.jpg', '.jpeg'),
+            mode=os.environ.get("VDT_WATCH", "auto"), parent=self
+        )
+        self.file_model.directory_loaded.connect(self.folder_watcher.watch_directory)
+        self.folder_watcher.changed.connect(self.on_folder_changed)
         self.tree_view.selectionModel().selectionChanged.connect(self.update_image_from_selection)
         right_layout.addWidget(self.tree_view)
 
         # 제어 패널 추가
         self.add_control_panel(right_layout)
 
+        # 배치 평가(batch_eval.py --params)에서 사용할 전처리 설정 내보내기
+        self.export_params_button = QPushButton("Export Params")
+        self.export_params_button.clicked.connect(self.export_preprocessing_params)
+        right_layout.addWidget(self.export_params_button)
+
+        # 라벨 인덱스 조회 패널 추가
+        self.add_label_query_panel(right_layout)
+
+        # 핫 폴더 스트리밍 검사 패널 추가
+        self.add_hot_folder_panel(right_layout)
+
+        # 결과 DB 조회 패널 추가
+        self.add_results_db_panel(right_layout)
+
+        # 단계별 소요 시간 패널 추가 (기본 접힘)
+        self.add_telemetry_panel(right_layout)
+
         # YOLO 라벨링 파일 내용 표시를 위한 QLabel 추가
         self.label_info = QLabel("Detection Info:")
         self.label_info.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -352,125 +484,543 @@ class ImageViewerApp(QWidget):
         self.iou_edit = QLineEdit(str(self.iou_threshold))
         form_layout.addRow("Confidence Threshold:", self.conf_edit)
         form_layout.addRow("IoU Threshold:", self.iou_edit)
+        self.match_method_combo = QComboBox()
+        self.match_method_combo.addItems(MATCH_METHODS)
+        self.match_method_combo.setCurrentText(self.match_method)
+        form_layout.addRow("GT Matching:", self.match_method_combo)
+
+        # 오버레이 표시 설정 (캔버스 다시 그리기만 하며 재처리하지 않음)
+        self.show_pred_checkbox = QCheckBox("Predictions")
+        self.show_pred_checkbox.setChecked(True)
+        self.show_gt_checkbox = QCheckBox("GT Boxes")
+        self.show_gt_checkbox.setChecked(True)
+        self.label_size_slider = QSlider(Qt.Orientation.Horizontal)
+        self.label_size_slider.setRange(6, 24)
+        self.label_size_slider.setValue(self.label_size)
+        form_layout.addRow(self.show_pred_checkbox, self.show_gt_checkbox)
+        form_layout.addRow("Label Size:", self.label_size_slider)
+
+        # 분할(타일) 추론: 축소 시 사라지는 고해상도 이미지의 작은 결함 검출용
+        self.slice_checkbox = QCheckBox("Sliced Inference")
+        self.slice_checkbox.setChecked(self.slicing is not None)
+        self.tile_size_combo = QComboBox()
+        self.tile_size_combo.addItems(['512', '640', '800', '1024', '1280'])
+        self.tile_size_combo.setCurrentText(str(DEFAULT_TILE_SIZE))
+        self.tile_overlap_edit = QLineEdit(str(DEFAULT_TILE_OVERLAP))
+        self.tile_merge_combo = QComboBox()
+        self.tile_merge_combo.addItems(SLICE_MERGE_METHODS)
+        form_layout.addRow(self.slice_checkbox)
+        form_layout.addRow("Tile Size:", self.tile_size_combo)
+        form_layout.addRow("Tile Overlap:", self.tile_overlap_edit)
+        form_layout.addRow("Tile Merge:", self.tile_merge_combo)
         layout.addLayout(form_layout)
 
-    def add_control_panel(self, layout):
-        """제어 패널 추가"""
-        # CLAHE Clip Limit 슬라이더
-        self.clahe_label = QLabel("CLAHE Clip Limit:")
-        layout.addWidget(self.clahe_label)
-        self.clahe_slider = QSlider(Qt.Orientation.Horizontal)
-        self.clahe_slider.setRange(1, 10)
-        self.clahe_slider.setValue(int(self.clahe_clip_limit))
-        self.clahe_slider.valueChanged.connect(self.update_clahe_clip_limit)
-        layout.addWidget(self.clahe_slider)
-
-        # Gaussian Blur Kernel Size 슬라이더
-        self.gaussian_blur_label = QLabel("Gaussian Blur Kernel Size:")
-        layout.addWidget(self.gaussian_blur_label)
-        self.gaussian_blur_slider = QSlider(Qt.Orientation.Horizontal)
-        self.gaussian_blur_slider.setRange(1, 31)
-        self.gaussian_blur_slider.setValue(self.gaussian_blur_kernel)
-        self.gaussian_blur_slider.setSingleStep(2)
-        self.gaussian_blur_slider.valueChanged.connect(self.update_gaussian_blur_kernel)
-        layout.addWidget(self.gaussian_blur_slider)
+        # 임계값 변경은 보관된 후보 박스에만 다시 적용 (모델 재실행 없음)
+        self.conf_edit.editingFinished.connect(self.update_detection_thresholds)
+        self.iou_edit.editingFinished.connect(self.update_detection_thresholds)
+        self.match_method_combo.currentTextChanged.connect(self.update_match_method)
+        self.show_pred_checkbox.stateChanged.connect(
+            lambda state: self.image_canvas.set_overlay_visible('pred', bool(state)))
+        self.show_gt_checkbox.stateChanged.connect(
+            lambda state: self.image_canvas.set_overlay_visible('gt', bool(state)))
+        self.label_size_slider.valueChanged.connect(self.update_label_size)
+        self.slice_checkbox.stateChanged.connect(self.update_slicing)
+        self.tile_size_combo.currentTextChanged.connect(self.update_slicing)
+        self.tile_overlap_edit.editingFinished.connect(self.update_slicing)
+        self.tile_merge_combo.currentTextChanged.connect(self.update_slicing)
 
-        # Canny Edge Detection 설정
-        self.canny_label1 = QLabel("Canny Threshold 1:")
-        layout.addWidget(self.canny_label1)
-        self.canny_slider1 = QSlider(Qt.Orientation.Horizontal)
-        self.canny_slider1.setRange(0, 500)
-        self.canny_slider1.setValue(self.canny_threshold1)
-        self.canny_slider1.valueChanged.connect(self.update_canny_threshold1)
-        layout.addWidget(self.canny_slider1)
+    # Ground Truth 관련 메서드들
+    def add_label_query_panel(self, layout):
+        """폴더 전체 라벨 조회 패널 추가 (클래스/최대 변 길이 조건, 결과 클릭 시 이미지 이동)"""
+        layout.addWidget(QLabel("Label Query:"))
+
+        query_layout = QHBoxLayout()
+        self.query_class_combo = QComboBox()
+        self.query_class_combo.addItem("All Classes", None)
+        for class_id, class_name in CLASS_NAMES.items():
+            self.query_class_combo.addItem(class_name, class_id)
+        self.query_max_side_edit = QLineEdit()
+        self.query_max_side_edit.setPlaceholderText("Max side px")
+        self.query_button = QPushButton("Query")
+        self.query_button.clicked.connect(self.run_label_query)
+        query_layout.addWidget(self.query_class_combo)
+        query_layout.addWidget(self.query_max_side_edit)
+        query_layout.addWidget(self.query_button)
+        layout.addLayout(query_layout)
+
+        self.query_summary_label = QLabel("Index: not loaded")
+        layout.addWidget(self.query_summary_label)
+
+        self.query_result_list = QListWidget()
+        self.query_result_list.setMaximumHeight(120)
+        self.query_result_list.itemClicked.connect(self.on_query_result_clicked)
+        layout.addWidget(self.query_result_list)
+
+        self.label_index_ready.connect(self.on_label_index_ready)
+
+    def add_hot_folder_panel(self, layout):
+        """핫 폴더 스트리밍 검사 패널 추가 (드롭 정책 선택, 시작/정지, 처리량/지연 시간 표시)"""
+        layout.addWidget(QLabel("Hot Folder:"))
+
+        hot_folder_layout = QHBoxLayout()
+        self.hot_folder_policy_combo = QComboBox()
+        self.hot_folder_policy_combo.addItems(DROP_POLICIES)
+        self.hot_folder_button = QPushButton("Start Hot Folder")
+        self.hot_folder_button.clicked.connect(self.toggle_hot_folder)
+        hot_folder_layout.addWidget(self.hot_folder_policy_combo)
+        hot_folder_layout.addWidget(self.hot_folder_button)
+        layout.addLayout(hot_folder_layout)
+
+        self.hot_folder_status_label = QLabel("Stream: stopped")
+        self.hot_folder_status_label.setWordWrap(True)
+        layout.addWidget(self.hot_folder_status_label)
+
+        # 결과마다 GUI를 갱신하지 않고 최신 결과와 통계만 주기적으로 표시
+        self.hot_folder_timer = QTimer(self)
+        self.hot_folder_timer.setInterval(500)
+        self.hot_folder_timer.timeout.connect(self.update_hot_folder_status)
+        self.hot_folder_stopped.connect(self.on_hot_folder_stopped)
+
+    def add_results_db_panel(self, layout):
+        """결과 DB 조회 패널 추가 (실행/예측 클래스/GT 클래스/결과 종류/최소 신뢰도, 결과 클릭 시 이미지 이동)"""
+        layout.addWidget(QLabel("Results DB:"))
+
+        db_layout = QHBoxLayout()
+        self.results_db_button = QPushButton("Open DB")
+        self.results_db_button.clicked.connect(self.select_results_db)
+        self.results_run_combo = QComboBox()
+        db_layout.addWidget(self.results_db_button)
+        db_layout.addWidget(self.results_run_combo)
+        layout.addLayout(db_layout)
+
+        filter_layout = QHBoxLayout()
+        self.results_pred_class_combo = QComboBox()
+        self.results_pred_class_combo.addItem("Any Pred", None)
+        self.results_gt_class_combo = QComboBox()
+        self.results_gt_class_combo.addItem("Any GT", None)
+        self.results_gt_class_combo.addItem("No GT", -1)
+        for class_id, class_name in CLASS_NAMES.items():
+            self.results_pred_class_combo.addItem(f"Pred {class_name}", class_id)
+            self.results_gt_class_combo.addItem(f"GT {class_name}", class_id)
+        filter_layout.addWidget(self.results_pred_class_combo)
+        filter_layout.addWidget(self.results_gt_class_combo)
+        layout.addLayout(filter_layout)
+
+        outcome_layout = QHBoxLayout()
+        self.results_outcome_combo = QComboBox()
+        self.results_outcome_combo.addItem("Any", None)
+        for outcome in OUTCOMES:
+            self.results_outcome_combo.addItem(outcome, outcome)
+        self.results_outcome_combo.addItem("missed", 'missed')
+        self.results_min_conf_edit = QLineEdit()
+        self.results_min_conf_edit.setPlaceholderText("Min conf")
+        self.results_query_button = QPushButton("Query")
+        self.results_query_button.clicked.connect(self.run_results_query)
+        outcome_layout.addWidget(self.results_outcome_combo)
+        outcome_layout.addWidget(self.results_min_conf_edit)
+        outcome_layout.addWidget(self.results_query_button)
+        layout.addLayout(outcome_layout)
+
+        self.results_summary_label = QLabel("DB: not opened")
+        layout.addWidget(self.results_summary_label)
+
+        self.results_list = QListWidget()
+        self.results_list.setMaximumHeight(120)
+        self.results_list.itemClicked.connect(self.on_query_result_clicked)
+        layout.addWidget(self.results_list)
+
+    def add_telemetry_panel(self, layout):
+        """단계별 소요 시간 패널 추가 (펼쳤을 때만 1초마다 p50/p95/p99 갱신, trace 내보내기)"""
+        self.telemetry_toggle = QToolButton()
+        self.telemetry_toggle.setText("Stage Timing")
+        self.telemetry_toggle.setCheckable(True)
+        self.telemetry_toggle.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.telemetry_toggle.setArrowType(Qt.ArrowType.RightArrow)
+        self.telemetry_toggle.toggled.connect(self.toggle_telemetry_panel)
+        layout.addWidget(self.telemetry_toggle)
+
+        self.telemetry_widget = QWidget()
+        telemetry_layout = QVBoxLayout(self.telemetry_widget)
+        telemetry_layout.setContentsMargins(0, 0, 0, 0)
+        self.telemetry_label = QLabel("No samples")
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        self.telemetry_label.setFont(font)
+        telemetry_layout.addWidget(self.telemetry_label)
+
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_telemetry)
+        export_button = QPushButton("Export Trace")
+        export_button.clicked.connect(self.export_trace)
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(export_button)
+        telemetry_layout.addLayout(button_layout)
+        self.telemetry_widget.setVisible(False)
+        layout.addWidget(self.telemetry_widget)
+
+        self.telemetry_timer = QTimer(self)
+        self.telemetry_timer.setInterval(1000)
+        self.telemetry_timer.timeout.connect(self.update_telemetry_panel)
+
+    def toggle_telemetry_panel(self, expanded):
+        """단계별 소요 시간 패널 펼치기/접기"""
+        self.telemetry_toggle.setArrowType(Qt.ArrowType.DownArrow if expanded else Qt.ArrowType.RightArrow)
+        self.telemetry_widget.setVisible(expanded)
+        if expanded:
+            self.update_telemetry_panel()
+            self.telemetry_timer.start()
+        else:
+            self.telemetry_timer.stop()
+
+    def update_telemetry_panel(self):
+        """최근 샘플 기준 단계별 분위수 표시 (ms)"""
+        summary = self.telemetry.summary()
+        self.telemetry_label.setText(format_summary(summary) if summary else "No samples")
+
+    def reset_telemetry(self):
+        self.telemetry.reset()
+        self.update_telemetry_panel()
+
+    def export_trace(self):
+        """최근 단계 구간을 Chrome/Perfetto trace JSON으로 저장"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Trace", "viewer_trace.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.telemetry.export_trace(path)
+            logging.info(f"trace 저장: {path}")
+        except Exception as e:
+            logging.error(f"trace 저장 실패: {e}")
 
-        self.canny_label2 = QLabel("Canny Threshold 2:")
-        layout.addWidget(self.canny_label2)
-        self.canny_slider2 = QSlider(Qt.Orientation.Horizontal)
-        self.canny_slider2.setRange(0, 500)
-        self.canny_slider2.setValue(self.canny_threshold2)
-        self.canny_slider2.valueChanged.connect(self.update_canny_threshold2)
-        layout.addWidget(self.canny_slider2)
+    def toggle_hot_folder(self):
+        """핫 폴더 검사 시작/정지"""
+        if self.hot_folder_pipeline is not None:
+            self.stop_hot_folder()
+            return
+        if self.inference is None:
+            self.hot_folder_status_label.setText("Stream: model not ready")
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Select Hot Folder", self.previous_folder_path or "")
+        if folder:
+            self.start_hot_folder(folder, os.path.join(folder, "inspected"))
 
-        self.canny_checkbox = QCheckBox("Use Canny Edge Detection")
-        self.canny_checkbox.setChecked(self.use_canny)
-        self.canny_checkbox.stateChanged.connect(self.toggle_canny)
-        layout.addWidget(self.canny_checkbox)
+    def start_hot_folder(self, folder, output_dir):
+        """입력 폴더에 새로 들어오는 이미지를 현재 전처리/검출 설정으로 스트리밍 처리"""
+        try:
+            # 예측/GT/매칭 결과는 output_dir/export에 열 파일로 함께 기록
+            exporter = ResultsWriter(os.path.join(output_dir, 'export'), metadata={
+                'source': 'viewer_hot_folder', 'model': self.model_path, 'folder': folder,
+                'preprocessing': self.preprocessing_params(), 'slicing': self.slicing,
+            }, iou_threshold=self.match_iou, method=self.match_method)
+            self.hot_folder_pipeline = StreamingPipeline(
+                self.inference, self.preprocessing_params(), output_dir,
+                conf_threshold=self.conf_threshold, iou_threshold=self.iou_threshold, slicing=self.slicing,
+                drop_policy=self.hot_folder_policy_combo.currentText(),
+                draw=lambda image, detections: self.draw_detections(image, detections, []),
+                on_result=self.on_hot_folder_result, exporter=exporter
+            ).start()
+            self.hot_folder_source = HotFolderSource(folder, self.hot_folder_pipeline.submit).start()
+        except Exception as e:
+            logging.error(f"핫 폴더 검사 시작 실패: {e}")
+            self.stop_hot_folder()
+            return
+        self.hot_folder_button.setText("Stop Hot Folder")
+        self.hot_folder_policy_combo.setEnabled(False)
+        self.hot_folder_timer.start()
+        logging.info(f"핫 폴더 검사 시작: {folder} -> {output_dir}")
+
+    def stop_hot_folder(self, drain=True):
+        """핫 폴더 검사 정지 (drain이면 큐에 남은 이미지를 백그라운드에서 처리한 뒤 정지)"""
+        self.hot_folder_timer.stop()
+        pipeline, source = self.hot_folder_pipeline, self.hot_folder_source
+        self.hot_folder_pipeline = None
+        self.hot_folder_source = None
+        if not drain:
+            # 남은 이미지를 버리므로 바로 끝남 (창 닫기)
+            self.finish_hot_folder(pipeline, source, drain)
+            return
+        self.hot_folder_stopping = pipeline
+        self.hot_folder_button.setEnabled(False)
+        self.hot_folder_button.setText("Stopping...")
+        executor = get_resources().executor("hot-folder-stop", max_workers=1)
+        executor.submit(self.finish_hot_folder, pipeline, source, drain)
+
+    def finish_hot_folder(self, pipeline, source, drain):
+        """파이프라인과 입력 폴링 종료 후 GUI 스레드로 알림 (drain이면 워커 스레드에서 호출)"""
+        try:
+            if drain:
+                # 입력 폴링을 먼저 멈춰 정지 중에 도착한 이미지를 닫힌 큐에 버리지 않고 입력 폴더에 그대로 둠
+                # (block 정책에서 막힌 제출은 파이프라인이 큐를 비우면서 풀림)
+                if source is not None:
+                    source.stop()
+                if pipeline is not None:
+                    pipeline.stop(drain=True)
+            else:
+                # 남은 이미지를 버리면 막힌 제출도 바로 풀림
+                if pipeline is not None:
+                    pipeline.stop(drain=False)
+                if source is not None:
+                    source.stop()
+        except Exception as e:
+            logging.error(f"핫 폴더 검사 정지 오류: {e}")
+        self.hot_folder_stopped.emit(pipeline)
+
+    def on_hot_folder_stopped(self, pipeline):
+        """핫 폴더 검사 정지 완료 처리 (최종 통계 표시, 버튼 복원)"""
+        if pipeline is self.hot_folder_stopping:
+            self.hot_folder_stopping = None
+        if pipeline is not None:
+            stats = format_stats(pipeline.stats())
+            self.hot_folder_status_label.setText(f"Stream: stopped | {stats}")
+            self.show_hot_folder_latest()
+            logging.info(f"핫 폴더 검사 종료: {stats}")
+        self.hot_folder_button.setEnabled(True)
+        self.hot_folder_button.setText("Start Hot Folder")
+        self.hot_folder_policy_combo.setEnabled(True)
+
+    def on_hot_folder_result(self, result):
+        """저장 단계 스레드에서 호출, 최신 결과만 보관 (표시는 타이머에서)"""
+        self.hot_folder_latest = result
+
+    def update_hot_folder_status(self):
+        """스트리밍 통계와 최신 결과 이미지 표시"""
+        if self.hot_folder_pipeline is None:
+            return
+        self.hot_folder_status_label.setText(f"Stream: {format_stats(self.hot_folder_pipeline.stats())}")
+        self.show_hot_folder_latest()
+
+    def show_hot_folder_latest(self):
+        """아직 표시하지 않은 최신 결과 이미지 표시"""
+        latest = self.hot_folder_latest
+        if latest is not None and latest is not self.hot_folder_shown:
+            self.hot_folder_shown = latest
+            self.display_image(latest['annotated'])
+            self.image_canvas.clear_overlays()
+            self.label_info.setText(
+                f"File: {os.path.basename(latest['image_path'])}\n\n"
+                f"Detections: {len(latest['detections'])}\n"
+                f"Latency: {latest['latency'] * 1000:.0f} ms"
+            )
 
-        # Bilateral Filter 설정
-        self.bilateral_checkbox = QCheckBox("Use Bilateral Filter")
-        self.bilateral_checkbox.setChecked(self.use_bilateral_filter)
-        self.bilateral_checkbox.stateChanged.connect(self.toggle_bilateral_filter)
-        layout.addWidget(self.bilateral_checkbox)
+    def load_model(self, model_path, backend):
+        """워커 스레드에서 모델 로드와 더미 입력 워밍업 후 GUI 스레드로 전달"""
+        try:
+            with self.startup.stage('model_load'):
+                model = load_backend(model_path, backend, get_resources().inference_threads)
+                # torch는 모델 로드 시점에 처음 import되므로 스레드 수는 여기서 적용
+                get_resources().apply_torch()
+            with self.startup.stage('warmup'):
+                model.warmup()
+        except Exception as e:
+            logging.error(f"YOLO 모델 로드 실패: {e}")
+            model = None
+        self.model_ready.emit(model)
+
+    def on_model_ready(self, model):
+        """모델 준비 완료 처리 (현재 이미지를 검출 포함으로 다시 처리)"""
+        self.model_loading = False
+        if model is None:
+            self.model_status_label.setText("Model: unavailable")
+            return
 
-        self.bilateral_diameter_label = QLabel("Bilateral Filter Diameter:")
-        layout.addWidget(self.bilateral_diameter_label)
-        self.bilateral_diameter_slider = QSlider(Qt.Orientation.Horizontal)
-        self.bilateral_diameter_slider.setRange(1, 15)
-        self.bilateral_diameter_slider.setValue(self.bilateral_filter_diameter)
-        self.bilateral_diameter_slider.valueChanged.connect(self.update_bilateral_filter_diameter)
-        layout.addWidget(self.bilateral_diameter_slider)
+        # 여러 이미지의 추론을 한 번의 모델 호출로 묶는 배치 계층 (배치 크기는 지연 시간에 따라 조정)
+        self.inference = BatchingInference(model, target_latency=0.3)
+        self.model_path = model.weights_path
+        self.yolo_model = model
+        self.startup.ready()
+        load_seconds = self.startup.stages.get('model_load', 0.0) + self.startup.stages.get('warmup', 0.0)
+        self.model_status_label.setText(f"Model: {model.name} ready ({load_seconds:.1f}s)")
+        logging.info("YOLO 모델 로드 성공")
+        # 모델 없이 처리한 이웃도 검출 포함으로 다시 미리 읽기
+        self.prefetch_anchor = None
+        if self.current_image_path:
+            self.process_and_display_image(self.current_image_path)
+
+    def start_label_indexing(self, folder):
+        """선택한 폴더의 라벨 인덱스를 백그라운드에서 불러오기/증분 갱신"""
+        self.query_summary_label.setText("Index: building...")
+        executor = get_resources().executor("label-index", max_workers=1)
+        self.label_index_future = executor.submit(self.build_label_index, folder)
+
+    def build_label_index(self, folder):
+        """워커 스레드에서 인덱스 생성 후 GUI 스레드로 전달"""
+        try:
+            index = build_label_index(folder)
+            self.label_index_ready.emit(index)
+        except Exception as e:
+            logging.error(f"라벨 인덱스 생성 오류: {e}")
 
-        self.bilateral_sigma_color_label = QLabel("Bilateral Sigma Color:")
-        layout.addWidget(self.bilateral_sigma_color_label)
-        self.bilateral_sigma_color_slider = QSlider(Qt.Orientation.Horizontal)
-        self.bilateral_sigma_color_slider.setRange(10, 150)
-        self.bilateral_sigma_color_slider.setValue(self.bilateral_filter_sigma_color)
-        self.bilateral_sigma_color_slider.valueChanged.connect(self.update_bilateral_sigma_color)
-        layout.addWidget(self.bilateral_sigma_color_slider)
+    def on_label_index_ready(self, index):
+        """인덱싱 완료 처리 (다른 폴더로 바뀐 경우 무시)"""
+        if index.root != self.previous_folder_path:
+            return
+        self.label_index = index
+        self.query_summary_label.setText(f"Index: {len(index)} boxes / {index.image_count} images")
+        logging.info(f"라벨 인덱스 준비 완료: {len(index)} boxes, {index.image_count} images")
+        if self.label_index_dirty:
+            self.label_index_timer.start()
+
+    def refresh_label_index(self):
+        """폴더 감시로 모은 변경 이미지만 인덱스에 반영 (폴더를 다시 스캔하지 않음)"""
+        if self.label_index is None or not self.label_index_dirty:
+            return
+        if self.label_index_future is not None and not self.label_index_future.done():
+            self.label_index_timer.start()
+            return
+        dirty, self.label_index_dirty = self.label_index_dirty, set()
+        executor = get_resources().executor("label-index", max_workers=1)
+        self.label_index_future = executor.submit(self.update_label_index, self.label_index, dirty)
 
-        self.bilateral_sigma_space_label = QLabel("Bilateral Sigma Space:")
-        layout.addWidget(self.bilateral_sigma_space_label)
-        self.bilateral_sigma_space_slider = QSlider(Qt.Orientation.Horizontal)
-        self.bilateral_sigma_space_slider.setRange(10, 150)
-        self.bilateral_sigma_space_slider.setValue(self.bilateral_filter_sigma_space)
-        self.bilateral_sigma_space_slider.valueChanged.connect(self.update_bilateral_sigma_space)
-        layout.addWidget(self.bilateral_sigma_space_slider)
+    def update_label_index(self, index, dirty):
+        """워커 스레드에서 변경 이미지만 다시 읽은 인덱스를 GUI 스레드로 전달"""
+        try:
+            self.label_index_ready.emit(refresh_label_index(index, dirty))
+        except Exception as e:
+            logging.error(f"라벨 인덱스 갱신 오류: {e}")
+
+    def on_folder_changed(self, directory, diff):
+        """감시 중인 폴더의 변경 반영 (트리 항목 추가/삭제, 바뀐 파일의 캐시 무효화)"""
+        added = [name for name, _ in diff['added']]
+        removed = [name for name, _ in diff['removed']]
+        self.file_model.update_directory(directory, diff['added'], removed)
+        for name, is_dir in diff['removed']:
+            if is_dir:
+                self.folder_watcher.unwatch(os.path.join(directory, name))
+
+        changed_images, changed_labels = set(), set()
+        for name in added + removed + diff['modified']:
+            path = os.path.join(directory, name)
+            if name.lower().endswith(LABEL_EXTENSION):
+                changed_labels.add(path)
+            elif name.lower().endswith(('.png', '.jpg', '.jpeg')):
+                changed_images.add(path)
+
+        # 디코딩 이미지/처리 결과는 원본 파일 경로로, 라벨은 라벨 경로로 무효화
+        if changed_images:
+            self.frame_cache.invalidate(lambda key: key[1] is not None and key[1][0] in changed_images)
+        for label_path in changed_labels:
+            self.label_store.invalidate(label_path)
+
+        # 라벨이 바뀐 이미지도 인덱스 갱신 대상
+        labeled_images = {
+            stem + extension
+            for stem in (os.path.splitext(label_path)[0] for label_path in changed_labels)
+            for extension in ('.png', '.jpg', '.jpeg')
+            if os.path.isfile(stem + extension)
+        }
+        if self.previous_folder_path:
+            self.label_index_dirty.update(
+                os.path.relpath(path, self.previous_folder_path) for path in changed_images | labeled_images
+            )
+            self.label_index_timer.start()
+
+        # 현재 이미지가 바뀌었으면 다시 처리, 라벨만 바뀌었으면 GT 표시만 갱신
+        current = self.current_image_path
+        if current in changed_images and os.path.isfile(current):
+            self.process_and_display_image(current)
+        elif current and label_path_for(current) in changed_labels:
+            self.render_current_result()
+            self.update_gt_display()
 
-        # Morphological Operations 설정
-        self.morphological_checkbox = QCheckBox("Use Morphological Operations")
-        self.morphological_checkbox.setChecked(self.use_morphological)
-        self.morphological_checkbox.stateChanged.connect(self.toggle_morphological)
-        layout.addWidget(self.morphological_checkbox)
+    def run_label_query(self):
+        """클래스/최대 변 길이 조건으로 인덱스 조회"""
+        if self.label_index is None:
+            self.query_summary_label.setText("Index: not ready")
+            return
+        try:
+            max_side_text = self.query_max_side_edit.text().strip()
+            ranges = {'max_side': (None, float(max_side_text))} if max_side_text else {}
+            mask = self.label_index.select(self.query_class_combo.currentData(), **ranges)
+            hits = self.label_index.image_hits(mask)
+
+            self.query_result_list.clear()
+            for path, count in hits:
+                item = QListWidgetItem(f"{os.path.relpath(path, self.label_index.root)} ({count})")
+                item.setData(Qt.ItemDataRole.UserRole, path)
+                self.query_result_list.addItem(item)
+            self.query_summary_label.setText(f"{int(mask.sum())} boxes in {len(hits)} images")
+        except ValueError:
+            self.query_summary_label.setText("Max side must be a number")
+        except Exception as e:
+            logging.error(f"라벨 조회 오류: {e}")
 
-        self.morph_kernel_label = QLabel("Morphological Kernel Size:")
-        layout.addWidget(self.morph_kernel_label)
-        self.morph_kernel_slider = QSlider(Qt.Orientation.Horizontal)
-        self.morph_kernel_slider.setRange(1, 15)
-        self.morph_kernel_slider.setValue(self.morph_kernel_size)
-        self.morph_kernel_slider.valueChanged.connect(self.update_morph_kernel_size)
-        layout.addWidget(self.morph_kernel_slider)
+    def select_results_db(self):
+        """결과 DB 파일 선택"""
+        path, _ = QFileDialog.getOpenFileName(self, "Open Results DB", "", "SQLite (*.sqlite *.db);;All Files (*)")
+        if path:
+            self.open_results_db(path)
+            self.save_setting("results_db_path", path)
 
-        # Histogram Equalization 체크박스
-        self.hist_equalization_checkbox = QCheckBox("Use Histogram Equalization")
-        self.hist_equalization_checkbox.setChecked(self.use_hist_equalization)
-        self.hist_equalization_checkbox.stateChanged.connect(self.toggle_hist_equalization)
-        layout.addWidget(self.hist_equalization_checkbox)
+    def open_results_db(self, path):
+        """결과 DB를 열고 실행 목록 표시"""
+        try:
+            results_db = ResultsDatabase(path)
+        except Exception as e:
+            logging.error(f"결과 DB 열기 실패: {e}")
+            self.results_summary_label.setText("DB: open failed")
+            return
+        if self.results_db is not None:
+            self.results_db.close()
+        self.results_db = results_db
+        self.results_run_combo.clear()
+        for run_id, name, created in results_db.runs():
+            created_text = time.strftime('%m-%d %H:%M', time.localtime(created))
+            self.results_run_combo.addItem(f"#{run_id} {name} ({created_text})", run_id)
+        self.results_summary_label.setText(f"DB: {os.path.basename(path)}, {self.results_run_combo.count()} runs")
+
+    def run_results_query(self):
+        """선택한 실행에서 조건에 맞는 예측(또는 미검출 GT)이 있는 이미지 조회"""
+        run_id = self.results_run_combo.currentData()
+        if self.results_db is None or run_id is None:
+            self.results_summary_label.setText("DB: no run selected")
+            return
+        try:
+            min_conf_text = self.results_min_conf_edit.text().strip()
+            min_conf = float(min_conf_text) if min_conf_text else None
+            outcome = self.results_outcome_combo.currentData()
+            gt_class = self.results_gt_class_combo.currentData()
+
+            start = time.perf_counter()
+            if outcome == 'missed':
+                hits = [(path, count, None) for path, count in self.results_db.missed_images(run_id, gt_class)]
+            else:
+                hits = self.results_db.query_images(
+                    run_id, outcome, pred_class=self.results_pred_class_combo.currentData(),
+                    gt_class=gt_class, min_conf=min_conf)
+            elapsed = time.perf_counter() - start
+
+            self.results_list.clear()
+            for path, count, confidence in hits:
+                text = f"{os.path.basename(path)} ({count})"
+                if confidence is not None:
+                    text += f" {confidence:.2f}"
+                item = QListWidgetItem(text)
+                item.setData(Qt.ItemDataRole.UserRole, path)
+                item.setToolTip(path)
+                self.results_list.addItem(item)
+            self.results_summary_label.setText(f"{len(hits)} images ({elapsed * 1000:.0f} ms)")
+        except ValueError:
+            self.results_summary_label.setText("Min conf must be a number")
+        except Exception as e:
+            logging.error(f"결과 DB 조회 오류: {e}")
 
-        # Median Blur 설정
-        self.median_blur_checkbox = QCheckBox("Use Median Blur")
-        self.median_blur_checkbox.setChecked(self.use_median_blur)
-        self.median_blur_checkbox.stateChanged.connect(self.toggle_median_blur)
-        layout.addWidget(self.median_blur_checkbox)
+    def on_query_result_clicked(self, item):
+        """조회 결과 이미지로 이동"""
+        self.select_image_path(item.data(Qt.ItemDataRole.UserRole))
 
-        self.median_blur_label = QLabel("Median Blur Kernel Size:")
-        layout.addWidget(self.median_blur_label)
-        self.median_blur_slider = QSlider(Qt.Orientation.Horizontal)
-        self.median_blur_slider.setRange(1, 31)
-        self.median_blur_slider.setValue(self.median_blur_kernel)
-        self.median_blur_slider.setSingleStep(2)
-        self.median_blur_slider.valueChanged.connect(self.update_median_blur_kernel)
-        layout.addWidget(self.median_blur_slider)
+    def select_image_path(self, path):
+        """트리에서 경로에 해당하는 항목을 선택 (읽지 않은 상위 폴더는 백그라운드로 읽은 뒤 선택)"""
+        self.file_model.reveal(path)
 
-        # YOLO 설정
-        form_layout = QFormLayout()
-        self.conf_edit = QLineEdit(str(self.conf_threshold))
-        self.iou_edit = QLineEdit(str(self.iou_threshold))
-        form_layout.addRow("Confidence Threshold:", self.conf_edit)
-        form_layout.addRow("IoU Threshold:", self.iou_edit)
-        layout.addLayout(form_layout)
+    def on_path_revealed(self, index, path):
+        """경로 탐색 완료 처리 (트리에 없으면 바로 표시)"""
+        if index.isValid():
+            self.tree_view.setCurrentIndex(index)
+            self.tree_view.scrollTo(index)
+        else:
+            self.process_and_display_image(path)
 
-    # Ground Truth 관련 메서드들
     def update_gt_size(self, value):
         """Ground Truth 이미지 크기 업데이트"""
         try:
@@ -511,13 +1061,10 @@ class ImageViewerApp(QWidget):
             self.bbox_selector.addItem("All Boxes")
 
             if self.current_image_path:
-                label_file = os.path.splitext(self.current_image_path)[0] + '.txt'
-                if os.path.exists(label_file):
-                    with open(label_file, 'r') as f:
-                        for i, line in enumerate(f.readlines(), 1):
-                            class_id = int(float(line.strip().split()[0]))
-                            class_name = CLASS_NAMES.get(class_id, f"Class {class_id}")
-                            self.bbox_selector.addItem(f"Box {i}: {class_name}")
+                labels = self.label_store.labels_for_image(self.current_image_path)
+                for i, class_id in enumerate(labels[:, 0].astype(int), 1):
+                    class_name = CLASS_NAMES.get(class_id, f"Class {class_id}")
+                    self.bbox_selector.addItem(f"Box {i}: {class_name}")
         except Exception as e:
             logging.error(f"바운딩 박스 선택기 업데이트 오류: {e}")
 
@@ -536,17 +1083,16 @@ class ImageViewerApp(QWidget):
         self.fit_to_bbox_enabled = bool(state)
         self.update_gt_display()
 
-    def get_bbox_info(self, lines, index=None):
-        """바운딩 박스 정보 가져오기"""
+    def get_bbox_info(self, labels, index=None):
+        """바운딩 박스 정보 가져오기 (labels: LabelStore의 (N, 5) 배열)"""
         try:
             img_height, img_width = self.current_gt_image.shape[:2]
             boxes = []
 
-            for i, line in enumerate(lines):
-                if index is not None and i != index:
-                    continue
+            if index is not None:
+                labels = labels[index:index + 1]
 
-                class_id, x_center, y_center, width, height = map(float, line.strip().split())
+            for class_id, x_center, y_center, width, height in labels.tolist():
 
                 # 상대 좌표를 픽셀 좌표로 변환
                 center_x = int(x_center * img_width)
@@ -565,158 +1111,96 @@ class ImageViewerApp(QWidget):
                     'coords': (x1, y1, x2, y2)
                 })
 
-                if index is not None:
-                    break
-
             return boxes
         except Exception as e:
             logging.error(f"바운딩 박스 정보 가져오기 오류: {e}")
             return []
 
     def update_gt_display(self):
-        """Ground Truth 이미지 표시 업데이트"""
+        """Ground Truth 이미지 표시 업데이트
+
+        박스 없이 표시 크기로 조정한 기본 pixmap을 보관하고, 박스와 라벨은 그 위에 QPainter로 그린다.
+        라벨 토글이나 라벨 크기 변경은 기본 pixmap을 다시 만들지 않는다.
+        """
         if self.current_gt_image is None:
             return
 
+        start = time.perf_counter()
         try:
-            # 원본 이미지 복사
-            gt_image = self.current_gt_image.copy()
-            img_height, img_width = gt_image.shape[:2]
-
-            # 라벨 파일에서 바운딩 박스 정보 읽기
-            label_file = os.path.splitext(self.current_image_path)[0] + '.txt'
-            if os.path.exists(label_file):
-                with open(label_file, 'r') as f:
-                    lines = f.readlines()
-                    boxes = self.get_bbox_info(lines, self.current_bbox_index if self.current_bbox_index >= 0 else None)
-
-                    if boxes:
-                        # 중앙 정렬이 활성화된 경우
-                        if self.center_align_enabled:
-                            center_x, center_y = boxes[0]['center']
-
-                            # 이동량 계산
-                            offset_x = (self.gt_base_size // 2) - center_x
-                            offset_y = (self.gt_base_size // 2) - center_y
-
-                            # 이미지 이동
-                            M = np.float32([[1, 0, offset_x], [0, 1, offset_y]])
-                            gt_image = cv2.warpAffine(gt_image, M, (self.gt_base_size, self.gt_base_size))
-
-                            # 박스 좌표 조정
-                            for box in boxes:
-                                x1, y1, x2, y2 = box['coords']
-                                x1 += offset_x
-                                y1 += offset_y
-                                x2 += offset_x
-                                y2 += offset_y
-                                box['coords'] = (x1, y1, x2, y2)
-
-                        # 바운딩 박스에 맞추기가 활성화된 경우
-                        if self.fit_to_bbox_enabled and boxes:
-                            box_w, box_h = boxes[0]['size']
-
-                            # 패딩 추가 (박스 크기의 20%)
-                            padding = 0.2
-                            crop_w = int(box_w * (1 + padding))
-                            crop_h = int(box_h * (1 + padding))
-
-                            # 크롭 영역 계산
-                            center_x = self.gt_base_size // 2
-                            center_y = self.gt_base_size // 2
-                            x1 = max(0, center_x - crop_w // 2)
-                            y1 = max(0, center_y - crop_h // 2)
-                            x2 = min(self.gt_base_size, x1 + crop_w)
-                            y2 = min(self.gt_base_size, y1 + crop_h)
-
-                            # 이미지 크롭
-                            gt_image = gt_image[y1:y2, x1:x2]
-
-                            # 박스 좌표 조정
-                            for box in boxes:
-                                bx1, by1, bx2, by2 = box['coords']
-                                bx1 -= x1
-                                by1 -= y1
-                                bx2 -= x1
-                                by2 -= y1
-                                box['coords'] = (bx1, by1, bx2, by2)
-
-                        # 라벨 표시가 활성화된 경우 박스 그리기
-                        if self.gt_show_labels:
-                            for box in boxes:
-                                x1, y1, x2, y2 = box['coords']
-                                class_id = box['class_id']
-
-                                # 박스 그리기
-                                cv2.rectangle(gt_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-                                # 클래스 이름 표시
-                                class_name = CLASS_NAMES.get(class_id, f"Class {class_id}")
-                                label = f"{class_name}"
-                                (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-                                cv2.rectangle(gt_image, (x1, y1 - th - 4), (x1 + tw, y1), (0, 255, 0), -1)
-                                cv2.putText(gt_image, label, (x1, y1 - 4),
-                                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-
-            # 이미지 크기 조정을 위한 크기 계산
-            scaled_size = int(self.gt_base_size * self.gt_scale_factor)
-
-            # 이미지 크기 조정 및 표시
-            gt_rgb = cv2.cvtColor(gt_image, cv2.COLOR_BGR2RGB)
-            gt_qimage = QImage(gt_rgb.data, gt_image.shape[1], gt_image.shape[0],
-                               gt_image.shape[1] * 3, QImage.Format.Format_RGB888)
-
-            gt_pixmap = QPixmap.fromImage(gt_qimage)
-            scaled_gt_pixmap = gt_pixmap.scaled(
-                scaled_size, scaled_size,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
+            # 라벨 저장소에서 바운딩 박스 정보 읽기
+            labels = self.label_store.labels_for_image(self.current_image_path)
+            boxes = self.get_bbox_info(labels, self.current_bbox_index if self.current_bbox_index >= 0 else None)
+
+            key = (self.current_image_path, tuple(box['coords'] for box in boxes), self.center_align_enabled,
+                   self.fit_to_bbox_enabled, self.gt_base_size, self.gt_scale_factor)
+            if self.gt_view is None or self.gt_view[0] != key or self.gt_view[1] is not self.current_gt_image:
+                self.gt_view = (key, self.current_gt_image, *self.render_gt_view(boxes))
+            _, _, pixmap, rects = self.gt_view
+
+            # 라벨 표시가 활성화된 경우 표시 해상도에서 박스 그리기
+            if self.gt_show_labels and len(rects):
+                pixmap = pixmap.copy()
+                painter = QPainter(pixmap)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+                names = [CLASS_NAMES.get(box['class_id'], f"Class {box['class_id']}") for box in boxes]
+                paint_boxes(painter, rects, names, QColor(0, 255, 0), self.label_size)
+                painter.end()
 
             # Ground Truth 이미지 레이블 크기 업데이트
             self.gt_image_label.setFixedSize(self.gt_base_size, self.gt_base_size)
-            self.gt_image_label.setPixmap(scaled_gt_pixmap)
+            self.gt_image_label.setPixmap(pixmap)
 
         except Exception as e:
             logging.error(f"GT 디스플레이 업데이트 오류: {e}")
-    def draw_gt_labels(self, image):
-        """Ground Truth 라벨 그리기"""
-        try:
-            # 라벨 파일에서 정보 읽기
-            label_file = os.path.splitext(self.current_image_path)[0] + '.txt'
-            if not os.path.exists(label_file):
-                return
-
-            img_height, img_width = image.shape[:2]
-
-            with open(label_file, 'r') as f:
-                for line in f:
-                    try:
-                        class_id, x_center, y_center, width, height = map(float, line.strip().split())
-
-                        # 상대 좌표를 픽셀 좌표로 변환
-                        x1 = int((x_center - width / 2) * img_width)
-                        y1 = int((y_center - height / 2) * img_height)
-                        x2 = int((x_center + width / 2) * img_width)
-                        y2 = int((y_center + height / 2) * img_height)
-
-                        # 박스 그리기
-                        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-                        # 클래스 이름 표시
-                        class_name = CLASS_NAMES.get(int(class_id), f"Class {class_id}")
-                        label = f"{class_name}"
-                        (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
-                        cv2.rectangle(image, (x1, y1 - th - 4), (x1 + tw, y1), (0, 255, 0), -1)
-                        cv2.putText(image, label, (x1, y1 - 4),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-
-                    except Exception as e:
-                        logging.error(f"GT 라벨 그리기 오류: {e}")
-                        continue
-
-        except Exception as e:
-            logging.error(f"GT 라벨 처리 오류: {e}")
+        finally:
+            self.telemetry.record('update_gt_display', start, time.perf_counter() - start)
+
+    def render_gt_view(self, boxes):
+        """GT 패널 기본 pixmap과 pixmap 좌표로 옮긴 박스 배열 (N, 4) 반환
+
+        중앙 정렬/박스 맞춤에 필요한 원본 영역을 바로 계산해 그 ROI만 잘라(이미지 밖은 검은색 패딩) 한 번 리샘플링한다.
+        """
+        gt_image = self.current_gt_image
+        img_height, img_width = gt_image.shape[:2]
+
+        # 표시할 원본 영역 (x0, y0, x1, y1), 기본은 전체 이미지
+        x0, y0, x1, y1 = 0, 0, img_width, img_height
+        if boxes:
+            # 중앙 정렬: 첫 박스 중심이 gt_base_size 정사각형의 중앙에 오는 영역
+            if self.center_align_enabled:
+                center_x, center_y = boxes[0]['center']
+                x0 = center_x - self.gt_base_size // 2
+                y0 = center_y - self.gt_base_size // 2
+                x1, y1 = x0 + self.gt_base_size, y0 + self.gt_base_size
+
+            # 바운딩 박스에 맞추기: 정사각형 중앙에서 박스 크기 + 20% 패딩만큼
+            if self.fit_to_bbox_enabled:
+                box_w, box_h = boxes[0]['size']
+                padding = 0.2
+                crop_w = int(box_w * (1 + padding))
+                crop_h = int(box_h * (1 + padding))
+                fx0 = max(0, self.gt_base_size // 2 - crop_w // 2)
+                fy0 = max(0, self.gt_base_size // 2 - crop_h // 2)
+                fx1 = min(self.gt_base_size, fx0 + crop_w)
+                fy1 = min(self.gt_base_size, fy0 + crop_h)
+                x0, y0, x1, y1 = x0 + fx0, y0 + fy0, x0 + fx1, y0 + fy1
+
+        roi = crop_padded(gt_image, x0, y0, max(x1, x0 + 1), max(y1, y0 + 1))
+
+        # 확대 배율을 반영한 크기에 맞춰 비율 유지 리샘플링 (축소는 INTER_AREA)
+        scaled_size = int(self.gt_base_size * self.gt_scale_factor)
+        scale = scaled_size / max(roi.shape[:2])
+        target_width = max(1, int(round(roi.shape[1] * scale)))
+        target_height = max(1, int(round(roi.shape[0] * scale)))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+        resized = cv2.resize(roi, (target_width, target_height), interpolation=interpolation)
+        gt_qimage = QImage(resized.data, target_width, target_height, target_width * 3, QImage.Format.Format_BGR888)
+        gt_pixmap = QPixmap.fromImage(gt_qimage)
+
+        # 박스 좌표를 pixmap 좌표로 변환
+        rects = np.array([box['coords'] for box in boxes], np.float64).reshape(-1, 4)
+        rects = (rects - [x0, y0, x0, y0]) * np.tile([target_width / roi.shape[1], target_height / roi.shape[0]], 2)
+        return gt_pixmap, rects
 
     # 컨트롤 패널 업데이트 메서드들
     def update_clahe_clip_limit(self, value):
@@ -793,85 +1277,292 @@ class ImageViewerApp(QWidget):
             self.median_blur_kernel += 1
         self.update_image_from_selection()
 
+    def update_detection_thresholds(self):
+        """Confidence/IoU 임계값 업데이트 후 현재 결과 다시 표시"""
+        try:
+            conf_threshold = float(self.conf_edit.text())
+            if conf_threshold < CANDIDATE_CONFIDENCE:
+                # 모델 호출의 후보 신뢰도 하한보다 낮은 검출은 없으므로 입력값을 하한으로 올림
+                logging.warning(f"Confidence {conf_threshold}는 후보 신뢰도 하한 {CANDIDATE_CONFIDENCE}보다 낮아 "
+                                f"{CANDIDATE_CONFIDENCE}로 적용합니다")
+                conf_threshold = CANDIDATE_CONFIDENCE
+                self.conf_edit.setText(str(conf_threshold))
+            self.conf_threshold = conf_threshold
+            self.iou_threshold = float(self.iou_edit.text())
+            self.render_current_result()
+        except ValueError as e:
+            logging.error(f"임계값 입력 오류: {e}")
+
+    def update_match_method(self, method):
+        """GT 매칭 방식 변경 후 현재 결과 다시 표시"""
+        self.match_method = method
+        self.render_current_result()
+
+    def update_label_size(self, value):
+        """오버레이 라벨 글자 크기 변경 (메인 캔버스와 GT 패널 다시 그리기)"""
+        self.label_size = value
+        self.image_canvas.set_label_size(value)
+        self.update_gt_display()
+
+    def update_slicing(self):
+        """분할 추론 설정 변경 후 현재 이미지 다시 처리"""
+        try:
+            if self.slice_checkbox.isChecked():
+                self.slicing = slicing_options(
+                    int(self.tile_size_combo.currentText()),
+                    float(self.tile_overlap_edit.text()),
+                    self.tile_merge_combo.currentText()
+                )
+            else:
+                self.slicing = None
+        except ValueError as e:
+            logging.error(f"분할 추론 설정 오류: {e}")
+            return
+        self.update_image_from_selection()
+
     def process_and_display_image(self, image_path):
-        """이미지 처리 및 표시"""
+        """이미지 처리 요청 (처리는 백그라운드 워커에서 수행)"""
+        params = self.preprocessing_params()
+        self.worker.submit({
+            'image_path': image_path,
+            'params': params,
+            'slicing': self.slicing,
+        })
+
+        # 방향키로 이동할 다음 이미지들을 현재 설정으로 미리 처리 (선택 이미지가 바뀔 때만)
+        # 슬라이더 드래그 중에는 이전 설정의 남은 미리 읽기만 버려 표시 요청이 기다리지 않게 함
+        if image_path == self.prefetch_anchor:
+            self.worker.prefetch([])
+            return
+        self.prefetch_anchor = image_path
+        index = self.tree_view.currentIndex()
+        if index.isValid():
+            self.worker.prefetch([
+                {'image_path': self.get_full_path(neighbor), 'params': params, 'slicing': self.slicing,
+                 'prefetch': True}
+                for neighbor in neighbor_image_indexes(self.tree_view, index, self.prefetch_count)
+            ])
+
+    def load_image(self, image_path, source_key):
+        """디코딩된 이미지와 파일 내용 해시 반환 (캐시 우선)"""
+        cached = self.frame_cache.get(('image', source_key))
+        if cached is not None:
+            return cached
+
+        # 파일을 한 번만 읽어 해시 계산과 디코딩에 함께 사용
+        with self.telemetry.stage('imread'):
+            data = np.fromfile(image_path, np.uint8)
+            image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if image is None:
+            return None, None
+        loaded = (image, content_hash(data))
+        if source_key is not None:
+            self.frame_cache.put(('image', source_key), loaded)
+        return loaded
+
+    def detect(self, processed, image_digest, params, slicing=None):
+        """YOLO 후보 박스 검출 요청 (같은 모델/이미지/전처리 결과가 디스크 캐시에 있으면 재사용)
+
+        (Future, 캐시 키) 반환. 캐시에 있으면 이미 완료된 Future를 반환한다.
+        slicing이 주어지면 타일 단위로 추론해 전체 좌표로 병합한다.
+        """
+        options = candidate_options()
+        cache_key = None
+        if self.result_cache is not None:
+            try:
+                model_digest = self.result_cache.model_hash(self.model_path)
+                extra = {'preprocessing': params, 'candidates': options, 'backend': self.yolo_model.name}
+                if slicing is not None:
+                    extra['slicing'] = slicing
+                cache_key = self.result_cache.make_key(model_digest, image_digest, extra)
+                detections = self.result_cache.get(cache_key)
+                if detections is not None:
+                    future = Future()
+                    future.set_result(detections)
+                    return future, None
+            except Exception as e:
+                logging.error(f"결과 캐시 조회 오류: {e}")
+
+        if slicing is not None:
+            return submit_sliced(self.inference.submit, processed, options, slicing), cache_key
+        return self.inference.submit(processed, options), cache_key
+
+    def process_image(self, request):
+        """워커 스레드에서 이미지 로드, 전처리, YOLO 검출 수행 (Qt 위젯 접근 금지)"""
+        return self.process_images([request])[0]
+
+    def process_prefetch(self, requests):
+        """미리 읽기 묶음 처리 (표시 요청이 들어오면 아직 전처리하지 않은 요청은 버림)"""
+        return self.process_images(requests, interrupted=self.worker.has_pending)
+
+    def process_images(self, requests, interrupted=None):
+        """여러 요청을 전처리한 뒤 추론은 배치 계층에 한꺼번에 제출 (미리 읽기 묶음 처리용)
+
+        interrupted()가 참이 되면 남은 요청은 전처리/추론하지 않고 결과 목록에서 뺀다.
+        """
+        prepared = []
+        for request in requests:
+            if interrupted is not None and interrupted():
+                break
+            prepared.append(self.prepare_request(request))
+        if interrupted is not None and interrupted():
+            # 전처리까지 끝난 요청도 추론 제출 전이면 버림 (표시 요청이 배치 뒤에서 기다리지 않도록)
+            return []
+        requests = requests[:len(prepared)]
+
+        # 전처리가 모두 끝난 뒤 제출해야 배치 계층이 한 번에 묶을 수 있음
+        for entry in prepared:
+            if entry is not None and 'processed_digest' in entry:
+                entry['submitted'] = time.perf_counter()
+                entry['future'], entry['cache_key'] = self.detect(
+                    entry['result']['processed'], entry.pop('processed_digest'), entry['params'], entry['slicing']
+                )
+                # 디스크 캐시 적중은 캐시 키 없이 이미 완료된 Future로 돌아옴 (추론 시간에서 제외)
+                entry['cached'] = entry['cache_key'] is None and entry['future'].done()
+
+        results = []
+        for request, entry in zip(requests, prepared):
+            if entry is None or 'future' not in entry:
+                results.append(entry and entry['result'])
+                continue
+            result = entry['result']
+            try:
+                # YOLO 후보 박스 검출 (임계값은 표시할 때 적용)
+                result['candidates'] = entry['future'].result()
+                # 제출부터 결과까지 (배치 대기 포함), 디스크 캐시 적중은 별도 단계로 기록
+                self.telemetry.record('result_cache_hit' if entry['cached'] else 'yolo', entry['submitted'],
+                                      time.perf_counter() - entry['submitted'], batch=len(requests))
+                if entry['cache_key'] is not None:
+                    self.result_cache.put(entry['cache_key'], result['candidates'])
+            except Exception as e:
+                logging.error(f"YOLO 처리 오류: {e}")
+                results.append(result)
+                continue
+
+            if entry['result_key'][1] is not None:
+                self.frame_cache.put(entry['result_key'], result)
+            results.append(result)
+        return results
+
+    def prepare_request(self, request):
+        """이미지 로드와 전처리 (캐시된 결과가 있으면 그대로 반환)"""
         try:
+            image_path = request['image_path']
+            source_key = file_source_key(image_path)
+            slicing = request.get('slicing')
+            result_key = ('result', source_key, tuple(sorted(request['params'].items())),
+                          tuple(sorted(slicing.items())) if slicing else None)
+
+            cached = self.frame_cache.get(result_key)
+            if cached is not None:
+                return {'result': cached}
+
             # 이미지 로드
-            image = cv2.imread(image_path)
+            image, image_digest = self.load_image(image_path, source_key)
             if image is None:
                 logging.error(f"이미지 로드 실패: {image_path}")
-                return
+                return None
+
+            # 전처리 적용 (슬라이더 변경 시 변경된 단계부터만 다시 계산)
+            # 미리 읽기는 현재 이미지의 단계 캐시를 덮어쓰지 않도록 캐시 없이 실행
+            processed = self.apply_preprocessing(
+                image,
+                source_key=None if request.get('prefetch') else source_key,
+                params=request['params']
+            )
 
-            # Ground Truth 이미지 저장
-            self.current_gt_image = image.copy()
-            self.current_image_path = image_path
+            entry = {
+                'result': {
+                    'image_path': image_path,
+                    'image': image,
+                    'processed': processed,
+                    'candidates': None,
+                },
+                'result_key': result_key,
+            }
+            if self.yolo_model:
+                entry['processed_digest'] = image_digest
+                entry['params'] = request['params']
+                entry['slicing'] = slicing
+            elif source_key is not None and not self.model_loading:
+                # 모델 로드 중의 검출 없는 결과는 로드 후 다시 계산해야 하므로 캐시하지 않음
+                self.frame_cache.put(result_key, entry['result'])
+            return entry
 
-            # 전처리 적용
-            processed = self.apply_preprocessing(image.copy())
+        except Exception as e:
+            logging.error(f"이미지 처리 중 오류: {e}")
+            return None
 
-            # YOLO 검출
-            if self.yolo_model:
-                try:
-                    # YOLO 라벨 파일 읽기
-                    label_file = os.path.splitext(image_path)[0] + '.txt'
-                    boxes = []
-                    if os.path.exists(label_file):
-                        with open(label_file, 'r') as f:
-                            lines = f.readlines()
-                            img_height, img_width = processed.shape[:2]
-                            for line in lines:
-                                try:
-                                    class_id, x_center, y_center, width, height = map(float, line.strip().split())
-
-                                    # 상대 좌표를 픽셀 좌표로 변환
-                                    x1 = int((x_center - width / 2) * img_width)
-                                    y1 = int((y_center - height / 2) * img_height)
-                                    x2 = int((x_center + width / 2) * img_width)
-                                    y2 = int((y_center + height / 2) * img_height)
-
-                                    boxes.append({
-                                        'class_id': int(class_id),
-                                        'coords': (x1, y1, x2, y2)
-                                    })
-                                except Exception as e:
-                                    logging.error(f"라벨 라인 파싱 오류: {e}")
-                                    continue
-
-                    # YOLO 검출 수행
-                    results = self.yolo_model(processed)
-
-                    # 검출 결과 그리기
-                    self.draw_detections(processed, results[0], boxes)
-                    # 검출 정보 업데이트
-                    self.update_detection_info(results[0], boxes, image_path)
+    def on_processing_finished(self, result):
+        """워커 처리 결과를 GUI 스레드에서 표시"""
+        start = time.perf_counter()
+        try:
+            # Ground Truth 이미지 저장
+            self.current_gt_image = result['image']
+            self.current_image_path = result['image_path']
 
-                except Exception as e:
-                    logging.error(f"YOLO 처리 오류: {e}")
+            self.current_result = result
+            # 현재 이미지와 라벨은 폴더 mtime이 바뀌지 않는 제자리 수정도 감지
+            self.folder_watcher.watch_files([result['image_path'], label_path_for(result['image_path'])])
 
-            # 이미지 표시
-            self.display_image(processed)
+            # 임계값 적용, 검출 정보 업데이트 및 이미지 표시
+            self.render_current_result()
 
             # Ground Truth 디스플레이 업데이트
             self.update_gt_display()
 
         except Exception as e:
             logging.error(f"이미지 처리 중 오류: {e}")
+        finally:
+            self.telemetry.record('on_processing_finished', start, time.perf_counter() - start)
+
+    def render_current_result(self):
+        """현재 결과의 후보 박스에 신뢰도/IoU 임계값을 적용해 표시 (모델 재실행 없음)"""
+        result = self.current_result
+        if result is None:
+            return
+
+        try:
+            # 캐시된 전처리 이미지를 그대로 표시하고 박스와 라벨은 캔버스 오버레이로 그림 (프레임 복사 없음)
+            processed = result['processed']
+            self.display_image(processed)
+            if result['candidates'] is None:
+                self.image_canvas.clear_overlays()
+                return
+
+            with self.telemetry.stage('filter_detections'):
+                detections = filter_detections(result['candidates'], self.conf_threshold, self.iou_threshold)
+
+            # GT 박스는 표시할 때마다 라벨 저장소에서 조회 (라벨 수정 즉시 반영)
+            img_height, img_width = processed.shape[:2]
+            gt_boxes = self.label_store.boxes(result['image_path'], img_width, img_height)
 
-    def update_detection_info(self, results, gt_boxes, image_path):
+            with self.telemetry.stage('show_overlays'):
+                self.show_overlays(detections, gt_boxes)
+            with self.telemetry.stage('detection_info'):
+                self.update_detection_info(detections, gt_boxes, result['image_path'])
+
+        except Exception as e:
+            logging.error(f"검출 결과 표시 오류: {e}")
+
+    def show_overlays(self, detections, gt_boxes):
+        """검출 결과(빨간색)와 GT(녹색)를 캔버스 오버레이 레이어로 설정 (예측 라벨은 GT 라벨 위 줄)"""
+        gt_labels = []
+        for box in gt_boxes:
+            cls = box['class_id']
+            gt_labels.append(f"GT: {CLASS_NAMES.get(cls, f'Class {cls}')}")
+        pred_labels = []
+        for cls, conf in zip(detections.class_id.tolist(), detections.confidence.tolist()):
+            pred_labels.append(f"Pred: {CLASS_NAMES.get(cls, f'Class {cls}')} {conf:.2f}")
+
+        self.image_canvas.set_overlay('gt', [box['coords'] for box in gt_boxes], gt_labels, QColor(0, 255, 0), row=0)
+        self.image_canvas.set_overlay('pred', detections.xyxy, pred_labels, QColor(255, 0, 0), row=1)
+
+    def update_detection_info(self, detections, gt_boxes, image_path):
         """검출 정보 및 평가 메트릭 업데이트"""
         try:
             # 예측 박스 정보 구성
-            pred_boxes = []
-            for box in results.boxes:
-                cls = int(box.cls[0])
-                conf = float(box.conf[0])
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-
-                pred_boxes.append({
-                    'class_id': cls,
-                    'confidence': conf,
-                    'coords': (x1, y1, x2, y2)
-                })
+            pred_boxes = list(detections)
 
             # 정보 텍스트 구성
             info_text = f"File: {os.path.basename(image_path)}\n\n"
@@ -887,137 +1578,59 @@ class ImageViewerApp(QWidget):
 
             # Ground Truth 정보
             info_text += "\nGround Truth:\n"
-            for box in gt_boxes:
+            for i, box in enumerate(gt_boxes, 1):
                 cls = box['class_id']
                 x1, y1, x2, y2 = box['coords']
                 class_name = CLASS_NAMES.get(cls, f"Class {cls}")
-                info_text += f"- {class_name}: ({x1}, {y1}) to ({x2}, {y2})\n"
-
-            # 매칭 분석
-            info_text += "\nMatching Analysis:\n"
-            for pred_box in pred_boxes:
-                pred_cls = pred_box['class_id']
-                pred_coords = pred_box['coords']
-
-                # 가장 높은 IoU를 가진 GT 박스 찾기
-                best_iou = 0
-                best_gt = None
-                for gt_box in gt_boxes:
-                    if gt_box['class_id'] == pred_cls:
-                        iou = self.calculate_iou(pred_coords, gt_box['coords'])
-                        if iou > best_iou:
-                            best_iou = iou
-                            best_gt = gt_box
-
-                pred_class_name = CLASS_NAMES.get(pred_cls, f"Class {pred_cls}")
-                if best_gt is not None:
-                    info_text += f"Prediction {pred_class_name} matches GT with IoU: {best_iou:.3f}\n"
+                info_text += f"- GT {i} {class_name}: ({x1}, {y1}) to ({x2}, {y2})\n"
+
+            # 매칭 분석 (클래스별 1:1 매칭, 신뢰도 순 greedy 또는 최적 할당)
+            matches = match_detections(detections, gt_boxes, self.match_iou, self.match_method)
+            tp, fp, fn = matches.counts()
+            info_text += f"\nMatching Analysis ({self.match_method}, IoU >= {self.match_iou:.2f}):\n"
+            info_text += f"TP: {tp}, FP: {fp}, FN: {fn}\n"
+            for pred_box, gt_index, iou, best_iou in zip(
+                    pred_boxes, matches.pred_gt, matches.pred_iou, matches.best_iou):
+                pred_class_name = CLASS_NAMES.get(pred_box['class_id'], f"Class {pred_box['class_id']}")
+                if gt_index >= 0:
+                    info_text += f"Prediction {pred_class_name} matches GT {gt_index + 1} with IoU: {iou:.3f}\n"
                 else:
-                    info_text += f"Prediction {pred_class_name} has no matching GT\n"
+                    info_text += f"Prediction {pred_class_name} has no matching GT (best IoU: {best_iou:.3f})\n"
 
             self.label_info.setText(info_text)
 
         except Exception as e:
             logging.error(f"검출 정보 업데이트 오류: {e}")
 
-    def calculate_iou(self, box1, box2):
-        """두 박스 간의 IoU(Intersection over Union) 계산"""
+    def export_preprocessing_params(self):
+        """현재 전처리 파라미터를 JSON 파일로 저장"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Params", "params.json", "JSON (*.json)")
+        if not path:
+            return
         try:
-            x1_1, y1_1, x2_1, y2_1 = box1
-            x1_2, y1_2, x2_2, y2_2 = box2
-
-            # 교집합 영역 계산
-            x1_i = max(x1_1, x1_2)
-            y1_i = max(y1_1, y1_2)
-            x2_i = min(x2_1, x2_2)
-            y2_i = min(y2_1, y2_2)
-
-            if x2_i < x1_i or y2_i < y1_i:
-                return 0.0
-
-            intersection = (x2_i - x1_i) * (y2_i - y1_i)
-
-            # 각 박스의 면적 계산
-            area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-            area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-
-            # IoU 계산
-            union = area1 + area2 - intersection
-            iou = intersection / union if union > 0 else 0
-
-            return iou
-
+            with open(path, 'w') as f:
+                json.dump(self.preprocessing_params(), f, indent=2)
+            logging.info(f"전처리 파라미터 저장: {path}")
         except Exception as e:
-            logging.error(f"IoU 계산 중 오류: {e}")
-            return 0.0
-
-    def apply_preprocessing(self, image):
-        """이미지 전처리 적용"""
-        try:
-            # 그레이스케일 변환
-            processed = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-            # 1. 노이즈 제거 단계
-            if self.use_median_blur:
-                kernel_size = self.median_blur_kernel
-                if kernel_size % 2 == 0:
-                    kernel_size += 1
-                processed = cv2.medianBlur(processed, kernel_size)
-
-            if self.use_bilateral_filter:
-                processed = cv2.bilateralFilter(
-                    processed,
-                    self.bilateral_filter_diameter,
-                    self.bilateral_filter_sigma_color,
-                    self.bilateral_filter_sigma_space
-                )
-
-            kernel_size = self.gaussian_blur_kernel
-            if kernel_size % 2 == 0:
-                kernel_size += 1
-            processed = cv2.GaussianBlur(processed, (kernel_size, kernel_size), 0)
+            logging.error(f"전처리 파라미터 저장 실패: {e}")
 
-            # 2. 대비 향상 단계
-            if self.use_hist_equalization:
-                processed = cv2.equalizeHist(processed)
+    def preprocessing_params(self):
+        """현재 전처리 파라미터 반환"""
+        return {name: getattr(self, name) for name in PreprocessingPipeline.PARAM_NAMES}
 
-            clahe = cv2.createCLAHE(clipLimit=self.clahe_clip_limit, tileGridSize=(8, 8))
-            processed = clahe.apply(processed)
-
-            # 3. 형태학적 처리 단계
-            if self.use_morphological:
-                kernel = cv2.getStructuringElement(
-                    cv2.MORPH_RECT,
-                    (self.morph_kernel_size, self.morph_kernel_size)
-                )
-                processed = cv2.morphologyEx(processed, cv2.MORPH_CLOSE, kernel)
-
-            # 4. 엣지 검출 및 이진화 단계
-            if self.use_adaptive_threshold:
-                processed = cv2.adaptiveThreshold(
-                    processed,
-                    255,
-                    cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                    cv2.THRESH_BINARY,
-                    self.adaptive_thresh_block_size,
-                    self.adaptive_thresh_c
-                )
-
-            if self.use_canny:
-                processed = cv2.Canny(processed, self.canny_threshold1, self.canny_threshold2)
-
-            # 컬러로 변환
-            if len(processed.shape) == 2:
-                processed = cv2.cvtColor(processed, cv2.COLOR_GRAY2BGR)
-
-            return processed
+    def apply_preprocessing(self, image, source_key=None, params=None):
+        """이미지 전처리 적용 (source_key가 있으면 변경된 단계부터만 다시 계산)"""
+        try:
+            with self.telemetry.stage('apply_preprocessing'):
+                return self.preprocessor.run(image, params or self.preprocessing_params(), source_key)
 
         except Exception as e:
             logging.error(f"전처리 중 오류: {e}")
             return image
 
-    def draw_detections(self, image, results, label_boxes):
-        """검출 결과와 라벨 정보 시각화"""
+    def draw_detections(self, image, detections, label_boxes):
+        """검출 결과와 라벨 정보를 이미지에 직접 그리기 (핫 폴더 결과 저장용, 화면 표시는 오버레이 사용)"""
+        start = time.perf_counter()
         try:
             # Ground Truth 박스 그리기 (녹색)
             for box in label_boxes:
@@ -1036,14 +1649,14 @@ class ImageViewerApp(QWidget):
                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
 
             # YOLO 검출 결과 박스 그리기 (빨간색)
-            for box in results.boxes:
+            for box in detections:
                 try:
                     # 박스 좌표
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
+                    x1, y1, x2, y2 = box['coords']
 
                     # 클래스 및 신뢰도
-                    cls = int(box.cls[0])
-                    conf = float(box.conf[0])
+                    cls = box['class_id']
+                    conf = box['confidence']
 
                     # 클래스 이름
                     class_name = CLASS_NAMES.get(cls, f"Class {cls}")
@@ -1066,79 +1679,67 @@ class ImageViewerApp(QWidget):
 
         except Exception as e:
             logging.error(f"검출 결과 시각화 오류: {e}")
+        finally:
+            self.telemetry.record('draw_detections', start, time.perf_counter() - start)
 
     def display_image(self, image):
-        """이미지를 Qt 라벨에 표시"""
+        """이미지를 캔버스에 표시 (확대/이동 상태는 캔버스가 유지)"""
         try:
-            height, width = image.shape[:2]
-
-            # 스케일링된 크기 계산
-            scaled_width = int(width * self.scale_factor)
-            scaled_height = int(height * self.scale_factor)
-
-            # 이미지 리사이즈
-            if self.scale_factor != 1.0:
-                scaled_image = cv2.resize(image, (scaled_width, scaled_height))
-            else:
-                scaled_image = image
-
-            # OpenCV BGR -> RGB 변환
-            image_rgb = cv2.cvtColor(scaled_image, cv2.COLOR_BGR2RGB)
-
-            # QImage 생성
-            bytes_per_line = 3 * scaled_width
-            q_image = QImage(image_rgb.data, scaled_width, scaled_height,
-                             bytes_per_line, QImage.Format.Format_RGB888)
-
-            # QLabel에 표시 (라벨 크기에 맞게 조정)
-            pixmap = QPixmap.fromImage(q_image)
-            scaled_pixmap = pixmap.scaled(
-                self.image_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.image_label.setPixmap(scaled_pixmap)
+            with self.telemetry.stage('display_image'):
+                self.image_canvas.set_frame(image)
 
         except Exception as e:
             logging.error(f"이미지 표시 오류: {e}")
 
-    def wheelEvent(self, event):
-        """마우스 휠 이벤트 처리 (줌 인/아웃)"""
-        try:
-            # 휠 델타값 얻기
-            delta = event.angleDelta().y()
-
-            # 줌 스케일 조정
-            if delta > 0:  # 휠 위로 (줌 인)
-                self.scale_factor *= 1.1
-            else:  # 휠 아래로 (줌 아웃)
-                self.scale_factor /= 1.1
-
-            # 최소/최대 줌 레벨 제한
-            self.scale_factor = max(0.1, min(self.scale_factor, 5.0))
-
-            # 현재 이미지 업데이트
-            self.update_image_from_selection()
-
-        except Exception as e:
-            logging.error(f"줌 처리 중 오류: {e}")
+    def closeEvent(self, event):
+        """창 닫기 시 백그라운드 워커 종료"""
+        if self.hot_folder_pipeline is not None:
+            self.stop_hot_folder(drain=False)
+        if self.hot_folder_stopping is not None:
+            # 정지 중인 파이프라인은 남은 이미지를 버리고 바로 종료 (추론 계층을 닫기 전에)
+            self.hot_folder_stopping.stop(drain=False)
+        self.worker.stop()
+        if self.inference is not None:
+            self.inference.close()
+        if self.results_db is not None:
+            self.results_db.close()
+        # 종료 시 단계별 분위수를 로그로 남기고, VDT_TRACE가 있으면 trace 저장
+        summary = self.telemetry.summary()
+        if summary:
+            logging.info(f"단계별 소요 시간 (ms, 최근 샘플):\n{format_summary(summary)}")
+        trace_path = os.environ.get('VDT_TRACE')
+        if trace_path:
+            try:
+                self.telemetry.export_trace(trace_path)
+            except Exception as e:
+                logging.error(f"trace 저장 실패: {e}")
+        super().closeEvent(event)
 
-    def load_previous_folder(self):
-        """이전 폴더 경로 로드"""
+    def load_settings(self):
+        """설정 파일 전체 로드 (없거나 읽을 수 없으면 빈 dict)"""
         if os.path.exists(self.settings_file):
             try:
                 with open(self.settings_file, 'r') as file:
-                    settings = json.load(file)
-                    return settings.get("previous_folder_path", "")
+                    return json.load(file)
             except Exception as e:
                 logging.error(f"설정 파일 로드 실패: {e}")
-        return ""
+        return {}
+
+    def load_previous_folder(self):
+        """이전 폴더 경로 로드"""
+        return self.load_settings().get("previous_folder_path", "")
 
     def save_previous_folder(self, folder_path):
-        """현재 폴더 경로 저장"""
+        """현재 폴더 경로 저장 (모델 경로 등 다른 설정은 유지)"""
+        self.save_setting("previous_folder_path", folder_path)
+
+    def save_setting(self, key, value):
+        """설정 한 항목 저장 (다른 설정은 유지)"""
         try:
+            settings = self.load_settings()
+            settings[key] = value
             with open(self.settings_file, 'w') as file:
-                json.dump({"previous_folder_path": folder_path}, file)
+                json.dump(settings, file)
         except Exception as e:
             logging.error(f"설정 파일 저장 실패: {e}")
 
@@ -1149,35 +1750,13 @@ class ImageViewerApp(QWidget):
             try:
                 self.previous_folder_path = folder
                 self.save_previous_folder(folder)
-                self.file_model.clear()
-                root_item = QStandardItem(os.path.basename(folder))
-                root_item.setData(folder)
-                self.file_model.appendRow(root_item)
-                self.add_items(root_item, folder)
+                self.folder_watcher.reset()
+                self.label_index_dirty.clear()
+                self.file_model.set_root(folder)
+                self.start_label_indexing(folder)
             except Exception as e:
                 logging.error(f"폴더 선택 중 오류: {e}")
 
-    def add_items(self, parent_item, path):
-        """트리에 아이템 추가"""
-        try:
-            items = []
-            for name in os.listdir(path):
-                item_path = os.path.join(path, name)
-                item = QStandardItem(name)
-                item.setData(item_path)
-
-                if os.path.isdir(item_path):
-                    self.add_items(item, item_path)
-                    items.append(item)
-                elif name.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    items.append(item)
-
-            items.sort(key=lambda x: x.text().lower())
-            for item in items:
-                parent_item.appendRow(item)
-        except Exception as e:
-            logging.error(f"아이템 추가 중 오류: {e}")
-
     def update_image_from_selection(self):
         """선택된 이미지 업데이트"""
         try:
@@ -1191,22 +1770,16 @@ class ImageViewerApp(QWidget):
 
     def get_full_path(self, index):
         """트리 아이템의 전체 경로 반환"""
-        try:
-            if not index.isValid():
-                return ""
-
-            item = self.file_model.itemFromIndex(index)
-            if item is None:
-                return ""
-
-            return item.data() or ""
-        except Exception as e:
-            logging.error(f"경로 가져오기 오류: {e}")
-            return ""
+        return self.file_model.path(index)
 
 
 if __name__ == '__main__':
+    startup = StartupTimer(PROCESS_STARTED)
+    startup.mark('imports')
+    configure_resources('interactive')
     app = QApplication(sys.argv)
-    viewer = ImageViewerApp()
+    viewer = ImageViewerApp(startup)
     viewer.show()
+    # 첫 이벤트 루프 반복에서 창이 그려진 시점 기록
+    QTimer.singleShot(0, lambda: startup.mark('window'))
     sys.exit(app.exec())
\ No newline at end of file
@@ -1,33 +1,66 @@
 import sys
 import os
 import json
+import time
+import logging
+import threading
+from concurrent.futures import Future
+# 시작 시간 측정 기준 (무거운 모듈 import 이전)
+PROCESS_STARTED = time.perf_counter()
 from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeView, QFileDialog, QSplitter, QSlider, QLineEdit, QFormLayout
-from PyQt6.QtCore import Qt, QModelIndex
-from PyQt6.QtGui import QPixmap, QImage, QStandardItemModel, QStandardItem, QKeyEvent
+from PyQt6.QtCore import Qt, QModelIndex, QTimer, pyqtSignal
+from PyQt6.QtGui import QKeyEvent, QColor
 import cv2
 import numpy as np
-from ultralytics import YOLO  # YOLO 라이브러리 임포트
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.execution_resources import configure_resources, get_resources
+from frame_cache import IMAGE_EXTENSIONS, FrameCache, file_source_key, neighbor_image_indexes
+from detections import CANDIDATE_CONFIDENCE, Detections, candidate_options, filter_detections
+from image_canvas import ImageCanvas
+from batch_inference import BatchingInference
+from inference_backends import load_backend
+from label_store import LabelStore, label_path_for
+from startup_timer import StartupTimer
+from file_tree_model import LazyFileTreeModel
+from folder_watcher import FolderWatcher, LABEL_EXTENSION
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
 class ImageViewerApp(QWidget):
-    def __init__(self):
+    # 백그라운드 모델 로드 완료 (InferenceBackend, 실패 시 None)
+    model_ready = pyqtSignal(object)
+
+    def __init__(self, startup=None):
         super().__init__()
+        self.startup = startup or StartupTimer()
         self.setWindowTitle("Image Viewer with Folder and File Browser")
         self.setGeometry(100, 100, 1200, 800)
 
-        # YOLO 모델 로드
-        self.yolo_model = YOLO(r"E:\GitHub\swh_data\test\240730E150.pt")  # YOLO v11 모델 경로 설정
-
         # 이전 폴더 경로 저장 파일 경로
         self.settings_file = "settings.json"
         self.previous_folder_path = self.load_previous_folder()
 
-        # Threshold 값 및 배율 초기화
+        # YOLO 모델은 창을 먼저 띄운 뒤 백그라운드에서 로드/워밍업 (준비 전까지는 라벨만 표시)
+        self.yolo_model = None
+        self.inference = None
+
+        # Threshold 값 초기화
         self.threshold_value = 30
-        self.scale_factor = 1.0
         self.conf_threshold = 0.25
         self.iou_threshold = 0.45
 
+        # 디코딩 이미지와 검출 결과 LRU 캐시, 방향키 이동용 미리 읽기 설정
+        self.frame_cache = FrameCache(max_bytes=1024 * 1024 * 1024)
+        self.prefetch_count = 3
+        self.prefetch_futures = []
+        # 처리 중인 결과 키 → Future (미리 읽기 중인 이미지로 이동하면 같은 결과를 기다림)
+        self.in_flight = {}
+        self.in_flight_lock = threading.Lock()
+        self.label_store = LabelStore()
+
         # 레이아웃 설정
         main_layout = QHBoxLayout(self)
         self.setLayout(main_layout)
@@ -35,10 +68,9 @@ class ImageViewerApp(QWidget):
         # 스플리터로 좌우 구분
         splitter = QSplitter(Qt.Orientation.Horizontal)
 
-        # 왼쪽: 이미지 표시
-        self.image_label = QLabel("Select an image file to display")
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        splitter.addWidget(self.image_label)
+        # 왼쪽: 이미지 표시 (확대/이동은 캔버스에서 재처리 없이 수행)
+        self.image_canvas = ImageCanvas("Select an image file to display")
+        splitter.addWidget(self.image_canvas)
 
         # 오른쪽: 폴더 선택, 트리뷰 및 제어 설정
         right_layout = QVBoxLayout()
@@ -46,14 +78,25 @@ class ImageViewerApp(QWidget):
         self.folder_button.clicked.connect(self.select_folder)
         right_layout.addWidget(self.folder_button)
 
+        # 모델 로드 상태 표시
+        self.model_status_label = QLabel("Model: loading...")
+        right_layout.addWidget(self.model_status_label)
+
         # 트리뷰 설정
         self.tree_view = QTreeView()
         right_layout.addWidget(self.tree_view)
 
-        # 파일 시스템 모델 대체용 트리 모델 설정
-        self.file_system_model = QStandardItemModel()
+        # 폴더를 펼칠 때만 백그라운드에서 목록을 읽는 트리 모델
+        self.tree_view.setUniformRowHeights(True)
+        self.file_system_model = LazyFileTreeModel(get_resources().executor("file-tree", max_workers=1))
         self.tree_view.setModel(self.file_system_model)
 
+        # 불러온 폴더만 감시해 새 이미지/라벨 수정을 반영 (VDT_WATCH: auto, native, poll, off)
+        self.folder_watcher = FolderWatcher(get_resources().executor("folder-watch", max_workers=1),
+                                            mode=os.environ.get("VDT_WATCH", "auto"), parent=self)
+        self.file_system_model.directory_loaded.connect(self.folder_watcher.watch_directory)
+        self.folder_watcher.changed.connect(self.on_folder_changed)
+
         # 트리뷰에서 선택 변경 시 이미지 갱신
         self.tree_view.selectionModel().selectionChanged.connect(self.update_image_from_selection)
 
@@ -71,6 +114,10 @@ class ImageViewerApp(QWidget):
         form_layout.addRow("IoU Threshold:", self.iou_edit)
         right_layout.addLayout(form_layout)
 
+        # 임계값 변경 시 보관된 후보 박스에 다시 적용 (모델 재실행 없음)
+        self.conf_edit.editingFinished.connect(self.update_image_from_selection)
+        self.iou_edit.editingFinished.connect(self.update_image_from_selection)
+
         # YOLO 라벨링 파일 내용 표시를 위한 QLabel 추가
         self.label_info = QLabel("YOLO Label Info:")
         self.label_info.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -87,18 +134,56 @@ class ImageViewerApp(QWidget):
 
         main_layout.addWidget(splitter)
 
-    def load_previous_folder(self):
-        # 이전 폴더 경로를 저장한 파일에서 경로 로드
+        # 모델 로드 시작 (settings.json의 model_path/backend, 없으면 VDT_MODEL/VDT_BACKEND 또는 기본 경로)
+        self.model_ready.connect(self.on_model_ready)
+        settings = self.load_settings()
+        executor = get_resources().executor("model-load", max_workers=1)
+        executor.submit(self.load_model, settings.get("model_path"), settings.get("backend"))
+
+    def load_model(self, model_path, backend):
+        # 워커 스레드에서 모델 로드와 더미 입력 워밍업 후 GUI 스레드로 전달
+        try:
+            with self.startup.stage('model_load'):
+                model = load_backend(model_path, backend, get_resources().inference_threads)
+                # torch는 모델 로드 시점에 처음 import되므로 스레드 수는 여기서 적용
+                get_resources().apply_torch()
+            with self.startup.stage('warmup'):
+                model.warmup()
+        except Exception as e:
+            logging.error(f"YOLO 모델 로드 실패: {e}")
+            model = None
+        self.model_ready.emit(model)
+
+    def on_model_ready(self, model):
+        # 모델 준비 완료 처리 (현재 이미지를 검출 결과와 함께 다시 표시)
+        if model is None:
+            self.model_status_label.setText("Model: unavailable")
+            return
+        # 현재 이미지와 미리 읽기 요청의 추론을 묶어 실행 (모델은 배치 스레드에서만 호출)
+        self.inference = BatchingInference(model, target_latency=0.3)
+        self.yolo_model = model
+        self.startup.ready()
+        load_seconds = self.startup.stages.get('model_load', 0.0) + self.startup.stages.get('warmup', 0.0)
+        self.model_status_label.setText(f"Model: {model.name} ready ({load_seconds:.1f}s)")
+        self.update_image_from_selection()
+
+    def load_settings(self):
+        # 설정 파일 전체 로드
         if os.path.exists(self.settings_file):
             with open(self.settings_file, 'r') as file:
-                settings = json.load(file)
-                return settings.get("previous_folder_path", "")
-        return ""
+                return json.load(file)
+        return {}
+
+    def load_previous_folder(self):
+        # 이전 폴더 경로를 저장한 파일에서 경로 로드
+        return self.load_settings().get("previous_folder_path", "")
 
     def save_previous_folder(self, folder_path):
-        # 현재 폴더 경로를 파일에 저장
+        # 현재 폴더 경로를 파일에 저장 (모델 경로 등 다른 설정은 유지)
+        settings = self.load_settings()
+        settings["previous_folder_path"] = folder_path
         with open(self.settings_file, 'w') as file:
-            json.dump({"previous_folder_path": folder_path}, file)
+            json.dump(settings, file)
 
     def select_folder(self):
         # 폴더 선택 대화상자
@@ -109,25 +194,29 @@ class ImageViewerApp(QWidget):
             self.populate_tree(folder_path)
 
     def populate_tree(self, folder_path):
-        # 트리 모델 초기화
-        self.file_system_model.clear()
-        root_item = QStandardItem(folder_path)
-        self.file_system_model.appendRow(root_item)
-
-        # 재귀적으로 폴더와 파일 추가
-        self.add_items(root_item, folder_path)
-
-    def add_items(self, parent_item, folder_path):
-        # 폴더 내부 파일 및 하위 폴더 추가
-        for item_name in sorted(os.listdir(folder_path)):
-            item_path = os.path.join(folder_path, item_name)
-            item = QStandardItem(item_name)
-
-            if os.path.isdir(item_path):
-                parent_item.appendRow(item)
-                self.add_items(item, item_path)
-            elif item_name.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-                parent_item.appendRow(item)
+        # 트리 루트 교체 (하위 폴더는 펼칠 때 읽음)
+        self.folder_watcher.reset()
+        self.file_system_model.set_root(folder_path)
+
+    def on_folder_changed(self, directory, diff):
+        # 감시 중인 폴더의 변경 반영 (트리 항목 추가/삭제, 바뀐 파일의 캐시 무효화)
+        self.file_system_model.update_directory(directory, diff['added'], [name for name, _ in diff['removed']])
+        for name, is_dir in diff['removed']:
+            if is_dir:
+                self.folder_watcher.unwatch(os.path.join(directory, name))
+
+        names = [name for name, _ in diff['added'] + diff['removed']] + diff['modified']
+        changed_images = {os.path.join(directory, name) for name in names if name.lower().endswith(IMAGE_EXTENSIONS)}
+        changed_labels = {os.path.join(directory, name) for name in names if name.lower().endswith(LABEL_EXTENSION)}
+        if changed_images:
+            self.frame_cache.invalidate(lambda key: key[1] is not None and key[1][0] in changed_images)
+        for label_path in changed_labels:
+            self.label_store.invalidate(label_path)
+
+        # 현재 이미지나 라벨이 바뀌었으면 다시 표시
+        current = self.get_full_path(self.tree_view.currentIndex())
+        if current and (current in changed_images or label_path_for(current) in changed_labels):
+            self.update_image_from_selection()
 
     def update_threshold(self):
         # 슬라이더로 설정된 Threshold 값을 업데이트
@@ -144,65 +233,151 @@ class ImageViewerApp(QWidget):
         # 선택한 파일 경로 가져오기
         file_path = self.get_full_path(index)
         if os.path.isfile(file_path) and file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
+            # 현재 이미지와 라벨은 폴더 mtime이 바뀌지 않는 제자리 수정도 감지
+            self.folder_watcher.watch_files([file_path, label_path_for(file_path)])
             self.show_image(file_path)
             self.display_label_info(file_path)
+            self.prefetch_neighbors(index)
 
     def get_full_path(self, index: QModelIndex):
         # 선택한 아이템의 전체 경로 반환
-        path = []
-        while index.isValid():
-            path.insert(0, index.data())
-            index = index.parent()
-        return os.path.join(*path)
+        return self.file_system_model.path(index)
 
     def show_image(self, file_path):
-        # OpenCV로 이미지 로드 후 결함 부분만 표시
-        image = cv2.imread(file_path)
-        if image is not None:
+        # YOLO 모델을 사용한 객체 검출 설정
+        self.conf_threshold = float(self.conf_edit.text())
+        if self.conf_threshold < CANDIDATE_CONFIDENCE:
+            # 후보 신뢰도 하한보다 낮은 검출은 없으므로 입력값을 하한으로 올림
+            logging.warning(f"Confidence {self.conf_threshold}는 후보 신뢰도 하한 {CANDIDATE_CONFIDENCE}보다 낮아 "
+                            f"{CANDIDATE_CONFIDENCE}로 적용합니다")
+            self.conf_threshold = CANDIDATE_CONFIDENCE
+            self.conf_edit.setText(str(self.conf_threshold))
+        self.iou_threshold = float(self.iou_edit.text())
+
+        self.render_image(file_path, self.threshold_value, self.conf_threshold, self.iou_threshold)
+
+    def render_image(self, file_path, threshold_value, conf_threshold, iou_threshold):
+        # 강조 이미지를 그대로 표시하고 검출 결과와 라벨 박스는 캔버스 오버레이로 그림 (프레임 복사 없음)
+        result_image, candidates = self.detect_candidates(file_path, threshold_value)
+        if result_image is None:
+            return
+        self.image_canvas.set_frame(result_image)
+
+        # 검출된 결과 시각화
+        detections = filter_detections(candidates, conf_threshold, iou_threshold)
+        names = getattr(self.yolo_model, 'names', {}) or {}
+        labels = [f"{names.get(cls, f'Class {cls}')} {conf:.2f}"
+                  for cls, conf in zip(detections.class_id.tolist(), detections.confidence.tolist())]
+        self.image_canvas.set_overlay('pred', detections.xyxy, labels, QColor(0, 0, 255))
+
+        # YOLO 라벨 파일의 바운딩 박스 추가
+        h, w, _ = result_image.shape
+        gt_boxes = self.label_store.boxes(file_path, w, h)
+        self.image_canvas.set_overlay('gt', [box['coords'] for box in gt_boxes],
+                                      [f"Class {box['class_id']}" for box in gt_boxes], QColor(255, 0, 0))
+
+    def detect_candidates(self, file_path, threshold_value):
+        # 결함 부분 강조 이미지와 YOLO 후보 박스 반환 (미리 읽기 스레드에서도 호출)
+        return self.detect_candidates_batch([file_path], threshold_value)[0]
+
+    def detect_candidates_batch(self, file_paths, threshold_value):
+        # 여러 이미지를 먼저 모두 준비한 뒤 추론 요청을 한꺼번에 제출해 배치로 처리
+        # (다른 스레드가 처리 중인 이미지는 다시 추론하지 않고 그 결과를 기다림)
+        results = []
+        owned = []    # (결과 위치, 캐시 키, 이 호출이 채울 Future)
+        waiting = []  # (결과 위치, 다른 호출이 처리 중인 Future)
+        for file_path in file_paths:
+            source_key = file_source_key(file_path)
+            result_key = ('candidates', source_key, threshold_value)
+            cached = self.frame_cache.get(result_key)
+            if cached is not None:
+                results.append(cached)
+                continue
+            with self.in_flight_lock:
+                future = self.in_flight.get(result_key)
+                if future is None:
+                    future = Future()
+                    # 파일 서명이 없으면(읽을 수 없는 파일) 다른 요청과 공유하지 않음
+                    if source_key is not None:
+                        self.in_flight[result_key] = future
+                    owned.append((len(results), result_key, future))
+                else:
+                    waiting.append((len(results), future))
+            results.append(None)
+
+        try:
+            self._detect_owned(file_paths, owned, threshold_value)
+        finally:
+            with self.in_flight_lock:
+                for _, result_key, future in owned:
+                    if not future.done():
+                        future.set_exception(RuntimeError("검출이 완료되지 않았습니다"))
+                    if self.in_flight.get(result_key) is future:
+                        del self.in_flight[result_key]
+
+        # 자기 결과를 모두 채운 뒤에 다른 호출의 결과를 기다림 (서로 기다리지 않음)
+        for position, _, future in owned:
+            results[position] = future.result()
+        for position, future in waiting:
+            results[position] = future.result()
+        return results
+
+    def _detect_owned(self, file_paths, owned, threshold_value):
+        # owned의 각 Future에 (강조 이미지, 후보 박스) 결과 설정
+        pending = []  # (캐시 키, Future, 강조 이미지)
+        for position, result_key, future in owned:
+            file_path, source_key = file_paths[position], result_key[1]
+
+            # OpenCV로 이미지 로드 후 결함 부분만 표시
+            image = self.frame_cache.get(('image', source_key))
+            if image is None:
+                image = cv2.imread(file_path)
+                if image is None:
+                    future.set_result((None, None))
+                    continue
+                self.frame_cache.put(('image', source_key), image)
+
             blurred_image = cv2.GaussianBlur(image, (15, 15), 0)
-            _, mask = cv2.threshold(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), self.threshold_value, 255, cv2.THRESH_BINARY)
+            _, mask = cv2.threshold(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), threshold_value, 255, cv2.THRESH_BINARY)
             result_image = np.where(mask[:, :, None] == 255, image, blurred_image)
-
-            # YOLO 모델을 사용한 객체 검출 수행
-            self.conf_threshold = float(self.conf_edit.text())
-            self.iou_threshold = float(self.iou_edit.text())
-
-            self.yolo_model.conf = self.conf_threshold
-            self.yolo_model.iou = self.iou_threshold
-
-            results = self.yolo_model(result_image)
-
-            # 검출된 결과 시각화
-            annotated_image = results[0].plot()  # YOLO 결과를 이미지에 시각화
-
-            # YOLO 라벨 파일의 바운딩 박스 추가
-            label_file_path = os.path.splitext(file_path)[0] + ".txt"
-            if os.path.exists(label_file_path):
-                with open(label_file_path, 'r') as file:
-                    labels = file.readlines()
-                for label in labels:
-                    class_id, x_center, y_center, width, height = map(float, label.strip().split())
-                    h, w, _ = annotated_image.shape
-                    x1 = int((x_center - width / 2) * w)
-                    y1 = int((y_center - height / 2) * h)
-                    x2 = int((x_center + width / 2) * w)
-                    y2 = int((y_center + height / 2) * h)
-                    cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    cv2.putText(annotated_image, f"Class {int(class_id)}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-
-            # 이미지 QImage로 변환하여 표시
-            height, width, _ = annotated_image.shape
-            bytes_per_line = width * 3
-            q_image = QImage(annotated_image.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_image)
-            self.image_label.setPixmap(pixmap.scaled(self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+            pending.append((result_key, future, result_image))
+
+        # 모델 로드 중에는 검출 없이 표시 (캐시하지 않아 로드 후 다시 검출)
+        inference = self.inference
+        if inference is None:
+            for _, future, result_image in pending:
+                future.set_result((result_image, Detections()))
+            return
+
+        # 낮은 신뢰도로 한 번만 실행해 후보 박스 보관
+        submitted = [inference.submit(result_image, candidate_options()) for _, _, result_image in pending]
+        for (result_key, future, result_image), detections in zip(pending, submitted):
+            try:
+                entry = (result_image, detections.result())
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            if result_key[1] is not None:
+                self.frame_cache.put(result_key, entry)
+            future.set_result(entry)
+
+    def prefetch_neighbors(self, index: QModelIndex):
+        # 현재 이미지를 보는 동안 트리 순서상 다음 이미지들을 백그라운드에서 한 배치로 미리 처리
+        for future in self.prefetch_futures:
+            future.cancel()
+        executor = get_resources().executor("prefetch", max_workers=1)
+        paths = [self.get_full_path(neighbor)
+                 for neighbor in neighbor_image_indexes(self.tree_view, index, self.prefetch_count)]
+        self.prefetch_futures = [executor.submit(self.detect_candidates_batch, paths, self.threshold_value)]
 
     def display_label_info(self, file_path):
         # 라벨 파일의 내용을 표시
-        label_file_path = os.path.splitext(file_path)[0] + ".txt"
+        label_file_path = label_path_for(file_path)
         if os.path.exists(label_file_path):
-            with open(label_file_path, 'r') as file:
-                label_data = file.read()
+            label_data = "\n".join(
+                f"{int(row[0])} {row[1]:g} {row[2]:g} {row[3]:g} {row[4]:g}"
+                for row in self.label_store.load(label_file_path).tolist()
+            )
             self.label_info.setText(f"YOLO Label Info:\n{label_data}")
         else:
             self.label_info.setText("YOLO Label Info:\nNo label file found.")
@@ -230,19 +405,14 @@ class ImageViewerApp(QWidget):
             self.tree_view.setCurrentIndex(next_index)
             self.display_selected_image(next_index)
 
-    def wheelEvent(self, event):
-        # 마우스 커서 위치 중심으로 확대/축소
-        if event.angleDelta().y() > 0:
-            self.scale_factor *= 1.1  # 줌 인
-        else:
-            self.scale_factor /= 1.1  # 줌 아웃
-
-        self.update_image_from_selection()
-
-
 # 애플리케이션 실행
 if __name__ == "__main__":
+    startup = StartupTimer(PROCESS_STARTED)
+    startup.mark('imports')
+    configure_resources('interactive')
     app = QApplication(sys.argv)
-    window = ImageViewerApp()
+    window = ImageViewerApp(startup)
     window.show()
+    # 첫 이벤트 루프 반복에서 창이 그려진 시점 기록
+    QTimer.singleShot(0, lambda: startup.mark('window'))
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,319 @@
+"""폴더 단위 헤드리스 평가
+
+이미지 디코딩 → 전처리 → YOLO 추론 → GT 매칭을 스트리밍으로 처리하고
+클래스별 AP, PR 곡선, 혼동 행렬을 JSON 리포트로 저장한다.
+
+    python ImageViewerTool/batch_eval.py --model best.pt --folder holdout/ --params params.json --output report.json
+"""
+import sys
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import Future
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.execution_resources import configure_resources
+from preprocessing import PreprocessingPipeline
+from detections import CANDIDATE_CONFIDENCE, candidate_options, filter_detections
+from result_cache import ResultCache, content_hash
+from label_store import LabelStore
+from label_index import scan_images
+from evaluation import DetectionEvaluator
+from batch_inference import BatchingInference
+from inference_backends import BACKENDS, load_backend
+from sliced_inference import DEFAULT_TILE_OVERLAP, SLICE_MERGE_METHODS, slicing_options, submit_sliced
+from result_export import ResultsWriter
+from results_db import ResultsDatabase
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class BatchEvaluator:
+    """폴더 전체를 스트리밍으로 평가 (진행 중인 이미지 수를 제한해 메모리 사용량 고정)"""
+
+    def __init__(self, inference, model_path, params, resources, result_cache=None,
+                 conf_threshold=0.001, iou_threshold=0.7, evaluator=None, slicing=None, exporter=None,
+                 candidates=None):
+        self.inference = inference
+        self.model_path = model_path
+        self.params = params
+        self.resources = resources
+        self.result_cache = result_cache
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.evaluator = evaluator
+        self.slicing = slicing
+        self.exporter = exporter
+        # 모델 호출 인자 (후보의 신뢰도 하한보다 낮은 conf_threshold는 효과가 없음)
+        self.candidates = candidates or candidate_options()
+        if conf_threshold < self.candidates['conf']:
+            logging.warning(f"평가 신뢰도 {conf_threshold}가 후보 신뢰도 하한 {self.candidates['conf']}보다 낮아 "
+                            f"{self.candidates['conf']} 미만 검출은 평가에 포함되지 않습니다")
+        self.label_store = LabelStore(max_entries=1)
+        # 배치 계층이 최대 배치를 채울 수 있을 만큼 앞서 추론을 제출
+        self.max_in_flight = max(resources.worker_threads * 2, inference.max_batch_size)
+        self._local = threading.local()
+        self.timings = {'decode_preprocess': 0.0, 'inference': 0.0, 'matching': 0.0}
+        self.cache_hits = 0
+        # 평가에서 빠진 이미지 수 (디코딩/전처리 실패, 추론 실패)
+        self.skipped = {'decode': 0, 'inference': 0}
+
+    def pipeline(self):
+        """스레드별 전처리 파이프라인 (CLAHE 객체 등 상태가 있으므로 공유하지 않음)"""
+        if not hasattr(self._local, 'pipeline'):
+            self._local.pipeline = PreprocessingPipeline()
+        return self._local.pipeline
+
+    def load_and_preprocess(self, image_path):
+        """워커 스레드에서 디코딩과 전처리 수행"""
+        start = time.perf_counter()
+        data = np.fromfile(image_path, np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if image is None:
+            logging.error(f"이미지 디코딩 실패: {image_path}")
+            return None
+        processed = self.pipeline().run(image, self.params)
+        return processed, content_hash(data), time.perf_counter() - start
+
+    def frames(self, image_paths):
+        """디코딩/전처리를 워커 풀에서 미리 진행하며 순서대로 반환"""
+        executor = self.resources.executor("batch-preprocess")
+        pending = deque()
+        paths = iter(image_paths)
+        for image_path in paths:
+            pending.append((image_path, executor.submit(self.load_and_preprocess, image_path)))
+            if len(pending) >= self.max_in_flight:
+                break
+        while pending:
+            image_path, future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, executor.submit(self.load_and_preprocess, next_path)))
+            try:
+                yield image_path, future.result()
+            except Exception as e:
+                logging.error(f"이미지 처리 오류 ({image_path}): {e}")
+                yield image_path, None
+
+    def detect(self, processed, image_digest):
+        """후보 박스 검출 요청 (모델 호출 인자까지 같으면 뷰어와 디스크 결과 캐시 공유), (Future, 캐시 키) 반환"""
+        options = self.candidates
+        cache_key = None
+        if self.result_cache is not None:
+            try:
+                model_digest = self.result_cache.model_hash(self.model_path)
+                extra = {'preprocessing': self.params, 'candidates': options, 'backend': self.inference.model.name}
+                if self.slicing is not None:
+                    extra['slicing'] = self.slicing
+                cache_key = self.result_cache.make_key(model_digest, image_digest, extra)
+                detections = self.result_cache.get(cache_key)
+                if detections is not None:
+                    self.cache_hits += 1
+                    future = Future()
+                    future.set_result(detections)
+                    return future, None
+            except Exception as e:
+                logging.error(f"결과 캐시 조회 오류: {e}")
+                cache_key = None
+
+        if self.slicing is not None:
+            return submit_sliced(self.inference.submit, processed, options, self.slicing), cache_key
+        return self.inference.submit(processed, options), cache_key
+
+    def evaluate(self, image_path, image_shape, future, cache_key):
+        """추론 결과를 기다려 GT와 매칭 후 누적 (추론 실패 시 건너뛰고 False 반환)"""
+        start = time.perf_counter()
+        try:
+            candidates = future.result()
+        except Exception as e:
+            logging.error(f"추론 오류 ({image_path}): {e}")
+            self.skipped['inference'] += 1
+            return False
+        if cache_key is not None:
+            try:
+                self.result_cache.put(cache_key, candidates)
+            except Exception as e:
+                logging.error(f"결과 캐시 저장 오류: {e}")
+        detections = filter_detections(candidates, self.conf_threshold, self.iou_threshold)
+        self.timings['inference'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        img_height, img_width = image_shape[:2]
+        gt_classes, gt_xyxy = self.label_store.pixel_boxes(image_path, img_width, img_height)
+        self.evaluator.add(detections.xyxy, detections.confidence, detections.class_id, gt_xyxy, gt_classes)
+        if self.exporter is not None:
+            self.exporter.add(image_path, img_width, img_height, detections, gt_classes, gt_xyxy)
+        self.timings['matching'] += time.perf_counter() - start
+        return True
+
+    def run(self, image_paths, progress_every=500):
+        """이미지 경로 목록 평가, 처리한 이미지 수 반환 (건너뛴 이미지는 self.skipped에 집계)"""
+        processed_count = 0
+        started = time.perf_counter()
+        in_flight = deque()
+        for image_path, frame in self.frames(image_paths):
+            if frame is None:
+                self.skipped['decode'] += 1
+                continue
+            processed, image_digest, elapsed = frame
+            self.timings['decode_preprocess'] += elapsed
+
+            # 결과는 나중에 순서대로 받고, 추론은 배치 계층이 여러 장을 묶어 실행
+            in_flight.append((image_path, processed.shape, *self.detect(processed, image_digest)))
+            if len(in_flight) < self.max_in_flight:
+                continue
+            if not self.evaluate(*in_flight.popleft()):
+                continue
+
+            processed_count += 1
+            if processed_count % progress_every == 0:
+                rate = processed_count / (time.perf_counter() - started)
+                logging.info(f"평가 진행: {processed_count}/{len(image_paths)} ({rate:.1f} img/s)")
+
+        while in_flight:
+            if self.evaluate(*in_flight.popleft()):
+                processed_count += 1
+        return processed_count
+
+
+def load_params(path):
+    """기본 전처리 파라미터에 JSON 파일의 값을 덮어씀 (뷰어에서 내보낸 파일 사용 가능)"""
+    params = dict(PreprocessingPipeline.DEFAULT_PARAMS)
+    if path:
+        with open(path, 'r') as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(params)
+        if unknown:
+            raise ValueError(f"알 수 없는 전처리 파라미터: {sorted(unknown)}")
+        params.update(overrides)
+    return params
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="폴더 단위 헤드리스 검출 평가")
+    parser.add_argument('--model', required=True, help="YOLO 가중치 경로 (.pt, .onnx, OpenVINO .xml)")
+    parser.add_argument('--backend', choices=BACKENDS + ('auto',), default='auto',
+                        help="추론 백엔드 (auto: 파일 형식으로 선택)")
+    parser.add_argument('--folder', required=True, help="이미지와 YOLO 라벨(.txt)이 있는 폴더")
+    parser.add_argument('--params', help="전처리 파라미터 JSON (뷰어의 Export Params)")
+    parser.add_argument('--output', default='eval_report.json', help="리포트 JSON 경로")
+    parser.add_argument('--conf', type=float, default=0.001, help="평가에 포함할 최소 신뢰도")
+    parser.add_argument('--nms-iou', type=float, default=0.7, help="클래스별 NMS IoU 임계값")
+    parser.add_argument('--max-det', type=int, default=300, help="이미지당 최대 검출 수")
+    parser.add_argument('--report-conf', type=float, default=0.25,
+                        help="precision/recall과 혼동 행렬을 계산할 신뢰도 임계값")
+    parser.add_argument('--match', choices=('greedy', 'optimal'), default='greedy', help="GT 매칭 방식")
+    parser.add_argument('--num-classes', type=int, help="클래스 수 (기본: 모델의 names)")
+    parser.add_argument('--no-cache', action='store_true', help="디스크 결과 캐시 사용 안 함")
+    parser.add_argument('--max-batch', type=int, default=32, help="최대 추론 배치 크기")
+    parser.add_argument('--target-latency', type=float, default=1.0,
+                        help="배치 한 번의 목표 추론 시간(초), 넘으면 배치 크기를 줄임")
+    parser.add_argument('--limit', type=int, help="앞에서부터 N장만 평가")
+    parser.add_argument('--export', help="이미지별 예측/GT/매칭 결과를 열 파일(.npy 청크)로 기록할 폴더")
+    parser.add_argument('--db', help="--export 결과를 새 실행으로 추가할 결과 DB (SQLite)")
+    parser.add_argument('--run-name', help="결과 DB의 실행 이름 (기본: 모델 파일 이름)")
+    parser.add_argument('--slice-size', type=int, default=0,
+                        help="분할(타일) 추론 타일 크기 (0: 전체 이미지 한 번 추론)")
+    parser.add_argument('--slice-overlap', type=float, default=DEFAULT_TILE_OVERLAP, help="타일 겹침 비율")
+    parser.add_argument('--slice-merge', choices=SLICE_MERGE_METHODS, default='nms', help="타일 간 중복 박스 병합 방식")
+    parser.add_argument('--slice-no-full', action='store_true', help="타일과 함께 전체 이미지 추론 결과를 병합하지 않음")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not 0 <= args.conf <= 1:
+        raise SystemExit("--conf는 0~1 사이여야 합니다.")
+    if args.db and not args.export:
+        raise SystemExit("--db는 --export 폴더를 가져오므로 --export와 함께 사용하세요.")
+    resources = configure_resources('batch')
+    params = load_params(args.params)
+    slicing = None
+    if args.slice_size:
+        slicing = slicing_options(args.slice_size, args.slice_overlap, args.slice_merge,
+                                  full_image=not args.slice_no_full)
+
+    model = load_backend(args.model, args.backend, resources.inference_threads)
+    resources.apply_torch()
+    class_names = dict(model.names)
+    num_classes = args.num_classes or (max(class_names) + 1 if class_names else 0)
+    if not num_classes:
+        raise SystemExit("클래스 수를 알 수 없습니다. --num-classes를 지정하세요.")
+
+    image_paths = [os.path.join(args.folder, path) for path in scan_images(args.folder)]
+    if args.limit:
+        image_paths = image_paths[:args.limit]
+    logging.info(f"평가 대상: {len(image_paths)} images, classes={num_classes}")
+
+    evaluator = DetectionEvaluator(num_classes, conf_threshold=args.report_conf, method=args.match)
+    inference = BatchingInference(model, max_batch_size=args.max_batch, target_latency=args.target_latency)
+    # 모델 호출도 평가 신뢰도/NMS IoU로 수행 (뷰어의 고정 후보 하한 CANDIDATE_CONFIDENCE를 쓰면 PR 곡선이 잘림)
+    candidates = candidate_options(conf=min(args.conf, CANDIDATE_CONFIDENCE), iou=args.nms_iou, max_det=args.max_det)
+    exporter = None
+    if args.export:
+        exporter = ResultsWriter(args.export, metadata={
+            'source': 'batch_eval', 'model': os.path.abspath(args.model), 'backend': model.name,
+            'folder': os.path.abspath(args.folder), 'preprocessing': params, 'slicing': slicing,
+        }, method=args.match)
+    # 결과 캐시 키는 뷰어와 같이 실제 가중치 파일(OpenVINO는 .bin)의 해시로 만듦
+    batch = BatchEvaluator(
+        inference, model.weights_path, params, resources,
+        result_cache=None if args.no_cache else ResultCache(),
+        conf_threshold=args.conf, iou_threshold=args.nms_iou, evaluator=evaluator, slicing=slicing,
+        exporter=exporter, candidates=candidates
+    )
+
+    started = time.perf_counter()
+    count = batch.run(image_paths)
+    elapsed = time.perf_counter() - started
+    if exporter is not None:
+        exporter.close()
+        logging.info(f"검출 결과 내보내기: {args.export} ({exporter.index['pred']} predictions)")
+    if args.db:
+        with ResultsDatabase(args.db) as results_db:
+            run_id = results_db.import_export(args.export, args.run_name or os.path.basename(args.model),
+                                              first_image=exporter.first_image_id)
+        logging.info(f"결과 DB 추가: {args.db} (run #{run_id})")
+
+    report = evaluator.summary(class_names)
+    report.update({
+        'model': os.path.abspath(args.model),
+        'backend': model.name,
+        'folder': os.path.abspath(args.folder),
+        'preprocessing': params,
+        'nms_iou': args.nms_iou,
+        'min_confidence': args.conf,
+        'candidates': candidates,
+        'match_method': args.match,
+        'slicing': slicing,
+        'skipped': batch.skipped,
+        'timing': {
+            'total_seconds': elapsed,
+            'images_per_second': count / elapsed if elapsed else 0.0,
+            'stage_seconds': batch.timings,
+            'result_cache_hits': batch.cache_hits,
+            'inference': inference.report(),
+        },
+        'resources': resources.report(),
+    })
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if any(batch.skipped.values()):
+        logging.warning(f"평가에서 제외된 이미지: {batch.skipped}")
+    logging.info(f"평가 완료: {count} images, mAP50={report['map50']:.4f}, "
+                 f"mAP50-95={report['map50_95']:.4f}, {report['timing']['images_per_second']:.1f} img/s")
+    logging.info(f"리포트 저장: {args.output}")
+    inference.close()
+    resources.shutdown()
+    return report
+
+
+if __name__ == '__main__':
+    main()
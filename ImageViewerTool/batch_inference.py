@@ -0,0 +1,131 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class BatchingInference:
+    """여러 호출자의 추론 요청을 모아 한 번의 모델 호출로 처리하는 배치 계층
+
+    submit()은 Future를 즉시 반환하고, 전용 스레드가 같은 옵션의 요청을 현재 배치 크기만큼 모아 실행한다.
+    배치 크기는 AIMD로 조정한다. 배치가 가득 찼고 지연 시간이 목표 이하이면 늘리고
+    (처음 목표를 넘기 전까지는 두 배, 이후에는 1씩), 목표를 넘으면 절반으로 줄인다.
+    입력 메모리가 max_batch_bytes를 넘지 않도록 배치 크기를 제한한다.
+    모델(InferenceBackend)은 이 스레드에서만 호출되므로 호출자 사이의 잠금이 필요 없다.
+    """
+
+    def __init__(self, model, max_batch_size=16, target_latency=0.25,
+                 max_batch_bytes=256 * 1024 * 1024, max_wait=0.005):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.target_latency = target_latency
+        self.max_batch_bytes = max_batch_bytes
+        self.max_wait = max_wait
+        self.batch_size = 1
+        self._slow_start = True
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._running = True
+        self.stats = {'images': 0, 'batches': 0, 'seconds': 0.0, 'last_latency': 0.0}
+        self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+        self._thread.start()
+
+    def submit(self, image, options):
+        """이미지 한 장 추론 요청, Detections를 결과로 갖는 Future 반환"""
+        future = Future()
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("배치 추론이 종료되었습니다")
+            self._queue.append((image, options, future))
+            self._condition.notify()
+        return future
+
+    def close(self):
+        """대기 중인 요청을 취소하고 스레드 종료"""
+        with self._condition:
+            self._running = False
+            pending, self._queue = list(self._queue), deque()
+            self._condition.notify()
+        for _, _, future in pending:
+            future.cancel()
+        self._thread.join(timeout=5)
+
+    def report(self):
+        """누적 처리량과 현재 배치 크기"""
+        stats = dict(self.stats)
+        stats['batch_size'] = self.batch_size
+        stats['images_per_second'] = stats['images'] / stats['seconds'] if stats['seconds'] else 0.0
+        return stats
+
+    def _batch_limit(self, image):
+        """현재 배치 크기와 메모리 예산 중 작은 값"""
+        return max(1, min(self.batch_size, self.max_batch_bytes // max(1, image.nbytes)))
+
+    def _collect(self):
+        """첫 요청과 같은 옵션의 요청을 배치 크기만큼 (최대 max_wait 동안) 모음"""
+        with self._condition:
+            while self._running and not self._queue:
+                self._condition.wait()
+            if not self._running:
+                return None, []
+
+            image, options, future = self._queue.popleft()
+            batch = [(image, future)]
+            limit = self._batch_limit(image)
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < limit:
+                others = deque()
+                while self._queue and len(batch) < limit:
+                    item = self._queue.popleft()
+                    if item[1] == options:
+                        batch.append((item[0], item[2]))
+                    else:
+                        others.append(item)
+                self._queue.extendleft(reversed(others))
+                remaining = deadline - time.perf_counter()
+                if len(batch) >= limit or remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return options, batch
+
+    def _run(self):
+        while True:
+            options, batch = self._collect()
+            if not batch:
+                return
+            batch = [(image, future) for image, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                detections = self.model.predict([image for image, _ in batch], **options)
+            except Exception as e:
+                logging.error(f"배치 추론 오류: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            latency = time.perf_counter() - start
+
+            for (_, future), result in zip(batch, detections):
+                future.set_result(result)
+            self._adapt(len(batch), latency)
+
+    def _adapt(self, count, latency):
+        """배치 크기 AIMD 조정"""
+        self.stats['images'] += count
+        self.stats['batches'] += 1
+        self.stats['seconds'] += latency
+        self.stats['last_latency'] = latency
+
+        previous = self.batch_size
+        if latency > self.target_latency:
+            self._slow_start = False
+            self.batch_size = max(1, self.batch_size // 2)
+        elif count >= self.batch_size:
+            increased = self.batch_size * 2 if self._slow_start else self.batch_size + 1
+            self.batch_size = min(self.max_batch_size, increased)
+        if self.batch_size != previous:
+            logging.debug(f"배치 크기 변경: {previous} -> {self.batch_size} (지연 {latency * 1000:.0f} ms)")
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def box_area(xyxy):
+    """(N, 4) xyxy 박스 면적"""
+    xyxy = np.asarray(xyxy, np.float32).reshape(-1, 4)
+    return np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None) * np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+
+
+def iou_matrix(boxes1, boxes2):
+    """(N, 4)와 (M, 4) xyxy 박스 사이의 (N, M) IoU 행렬"""
+    boxes1 = np.asarray(boxes1, np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, np.float32).reshape(-1, 4)
+    if len(boxes1) == 0 or len(boxes2) == 0:
+        return np.zeros((len(boxes1), len(boxes2)), np.float32)
+
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+
+    union = box_area(boxes1)[:, None] + box_area(boxes2)[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def nms(xyxy, scores, iou_threshold):
+    """Greedy NMS, 유지할 인덱스를 점수 내림차순으로 반환"""
+    xyxy = np.asarray(xyxy, np.float32).reshape(-1, 4)
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    areas = box_area(xyxy)
+
+    keep = []
+    while order.size > 0:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        top_left = np.maximum(xyxy[best, :2], xyxy[rest, :2])
+        bottom_right = np.minimum(xyxy[best, 2:], xyxy[rest, 2:])
+        wh = np.clip(bottom_right - top_left, 0, None)
+        intersection = wh[:, 0] * wh[:, 1]
+        union = areas[best] + areas[rest] - intersection
+        iou = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, np.int64)
+
+
+def batched_nms(xyxy, scores, class_ids, iou_threshold):
+    """클래스별 NMS (클래스마다 좌표를 떨어뜨려 한 번의 NMS로 처리)"""
+    xyxy = np.asarray(xyxy, np.float32).reshape(-1, 4)
+    if len(xyxy) == 0:
+        return np.zeros(0, np.int64)
+    offset = (xyxy.max() + 1.0) * np.asarray(class_ids, np.float32)[:, None]
+    return nms(xyxy + offset, scores, iou_threshold)
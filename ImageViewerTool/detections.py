@@ -0,0 +1,79 @@
+import numpy as np
+from box_ops import batched_nms
+
+# 모델은 낮은 신뢰도와 느슨한 NMS로 한 번만 실행하고 후보 박스를 보관한다.
+# 사용자가 지정한 신뢰도/IoU 임계값은 후보에 NumPy로 다시 적용한다.
+# (CANDIDATE_IOU보다 큰 IoU 임계값은 CANDIDATE_IOU와 같게, CANDIDATE_CONFIDENCE보다 낮은 신뢰도 임계값은
+#  CANDIDATE_CONFIDENCE와 같게 동작하므로 뷰어는 입력한 신뢰도를 하한으로 올림)
+CANDIDATE_CONFIDENCE = 0.05
+CANDIDATE_IOU = 0.9
+CANDIDATE_MAX_DET = 1000
+
+
+def to_numpy(values):
+    """torch 텐서 또는 배열을 numpy 배열로 변환"""
+    if hasattr(values, 'cpu'):
+        values = values.cpu()
+    if hasattr(values, 'numpy'):
+        return values.numpy()
+    return np.asarray(values)
+
+
+class Detections:
+    """검출 결과를 열(column) 배열로 보관하는 경량 컨테이너
+
+    xyxy: (N, 4) float32 픽셀 좌표, confidence: (N,) float32, class_id: (N,) int32
+    """
+
+    def __init__(self, xyxy=None, confidence=None, class_id=None):
+        self.xyxy = np.asarray(xyxy if xyxy is not None else np.zeros((0, 4)), np.float32).reshape(-1, 4)
+        self.confidence = np.asarray(confidence if confidence is not None else [], np.float32).reshape(-1)
+        self.class_id = np.asarray(class_id if class_id is not None else [], np.int32).reshape(-1)
+
+    @classmethod
+    def from_results(cls, results):
+        """ultralytics Results 객체에서 변환"""
+        boxes = results.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls()
+        return cls(to_numpy(boxes.xyxy), to_numpy(boxes.conf), to_numpy(boxes.cls).astype(np.int32))
+
+    def __len__(self):
+        return len(self.confidence)
+
+    def __getitem__(self, selection):
+        """인덱스/마스크로 부분 집합 선택"""
+        return Detections(self.xyxy[selection], self.confidence[selection], self.class_id[selection])
+
+    def __iter__(self):
+        """기존 박스 dict 형식으로 순회"""
+        for coords, confidence, class_id in zip(self.xyxy, self.confidence, self.class_id):
+            yield {
+                'class_id': int(class_id),
+                'confidence': float(confidence),
+                'coords': tuple(int(v) for v in coords)
+            }
+
+    @property
+    def nbytes(self):
+        return self.xyxy.nbytes + self.confidence.nbytes + self.class_id.nbytes
+
+    def to_arrays(self):
+        """저장용 배열 dict"""
+        return {'xyxy': self.xyxy, 'confidence': self.confidence, 'class_id': self.class_id}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['xyxy'], arrays['confidence'], arrays['class_id'])
+
+
+def candidate_options(conf=CANDIDATE_CONFIDENCE, iou=CANDIDATE_IOU, max_det=CANDIDATE_MAX_DET):
+    """후보 박스 추출용 모델 호출 인자 (배치 평가는 평가 신뢰도/NMS IoU에 맞춰 지정)"""
+    return {'conf': conf, 'iou': iou, 'max_det': max_det, 'verbose': False}
+
+
+def filter_detections(candidates, conf_threshold, iou_threshold):
+    """후보 박스에 신뢰도 임계값과 클래스별 NMS 적용 (신뢰도 내림차순)"""
+    candidates = candidates[candidates.confidence >= conf_threshold]
+    keep = batched_nms(candidates.xyxy, candidates.confidence, candidates.class_id, iou_threshold)
+    return candidates[keep]
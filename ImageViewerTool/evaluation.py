@@ -0,0 +1,146 @@
+import numpy as np
+from matching import match_boxes
+
+IOU_THRESHOLDS = np.round(np.linspace(0.5, 0.95, 10), 2)
+CONFIDENCE_BINS = 1000
+RECALL_POINTS = np.linspace(0, 1, 101)
+
+
+def interpolated_ap(recall, precision):
+    """101점 보간 AP (COCO 방식, 정밀도 포락선 사용)"""
+    if len(recall) == 0:
+        return 0.0
+    envelope = np.maximum.accumulate(precision[::-1])[::-1]
+    index = np.searchsorted(recall, RECALL_POINTS, side='left')
+    sampled = np.zeros(len(RECALL_POINTS))
+    valid = index < len(envelope)
+    sampled[valid] = envelope[index[valid]]
+    return float(sampled.mean())
+
+
+class DetectionEvaluator:
+    """이미지 단위로 누적하는 검출 평가기
+
+    예측은 신뢰도 구간 히스토그램(클래스 x IoU 임계값 x 구간)에 TP/FP로만 누적하므로
+    이미지 수와 무관하게 메모리 사용량이 일정하다. AP는 구간 경계 단위로 근사된다.
+    혼동 행렬은 conf_threshold 이상 예측을 클래스 구분 없이 매칭해 (GT 클래스, 예측 클래스)로 센다.
+    마지막 행/열은 배경(미검출/오검출)이다.
+    """
+
+    def __init__(self, num_classes, iou_thresholds=IOU_THRESHOLDS, conf_threshold=0.25,
+                 bins=CONFIDENCE_BINS, method='greedy'):
+        self.num_classes = num_classes
+        self.iou_thresholds = np.asarray(iou_thresholds, np.float32)
+        self.conf_threshold = conf_threshold
+        self.bins = bins
+        self.method = method
+
+        shape = (len(self.iou_thresholds), num_classes, bins)
+        self.tp = np.zeros(shape, np.int64)
+        self.fp = np.zeros(shape, np.int64)
+        self.gt_counts = np.zeros(num_classes, np.int64)
+        self.confusion = np.zeros((num_classes + 1, num_classes + 1), np.int64)
+        self.images = 0
+        self.skipped_boxes = 0
+
+    def _bin(self, confidence):
+        return np.clip((np.asarray(confidence) * self.bins).astype(np.int64), 0, self.bins - 1)
+
+    def add(self, pred_xyxy, pred_scores, pred_classes, gt_xyxy, gt_classes):
+        """이미지 한 장의 예측과 GT 누적"""
+        pred_classes = np.asarray(pred_classes, np.int64).reshape(-1)
+        gt_classes = np.asarray(gt_classes, np.int64).reshape(-1)
+        pred_scores = np.asarray(pred_scores, np.float32).reshape(-1)
+        pred_xyxy = np.asarray(pred_xyxy, np.float32).reshape(-1, 4)
+        gt_xyxy = np.asarray(gt_xyxy, np.float32).reshape(-1, 4)
+
+        # 모델/라벨의 클래스 범위를 벗어난 박스는 제외하고 개수만 기록
+        pred_valid = (pred_classes >= 0) & (pred_classes < self.num_classes)
+        gt_valid = (gt_classes >= 0) & (gt_classes < self.num_classes)
+        self.skipped_boxes += int((~pred_valid).sum() + (~gt_valid).sum())
+        pred_xyxy, pred_scores, pred_classes = pred_xyxy[pred_valid], pred_scores[pred_valid], pred_classes[pred_valid]
+        gt_xyxy, gt_classes = gt_xyxy[gt_valid], gt_classes[gt_valid]
+
+        self.images += 1
+        self.gt_counts += np.bincount(gt_classes, minlength=self.num_classes)
+
+        bins = self._bin(pred_scores)
+        for t, iou_threshold in enumerate(self.iou_thresholds):
+            matches = match_boxes(pred_xyxy, pred_scores, pred_classes, gt_xyxy, gt_classes,
+                                  float(iou_threshold), self.method)
+            hit = matches.true_positive
+            np.add.at(self.tp[t], (pred_classes[hit], bins[hit]), 1)
+            np.add.at(self.fp[t], (pred_classes[~hit], bins[~hit]), 1)
+
+        # 혼동 행렬: 클래스 구분 없는 매칭 (IoU 임계값은 첫 번째 값)
+        keep = pred_scores >= self.conf_threshold
+        matches = match_boxes(pred_xyxy[keep], pred_scores[keep], np.zeros(int(keep.sum())),
+                              gt_xyxy, np.zeros(len(gt_xyxy)), float(self.iou_thresholds[0]), self.method)
+        background = self.num_classes
+        kept_classes = pred_classes[keep]
+        hit = matches.true_positive
+        np.add.at(self.confusion, (gt_classes[matches.pred_gt[hit]], kept_classes[hit]), 1)
+        np.add.at(self.confusion, (np.full(int((~hit).sum()), background), kept_classes[~hit]), 1)
+        np.add.at(self.confusion, (gt_classes[matches.missed_gt], np.full(int(matches.missed_gt.sum()), background)), 1)
+
+    def pr_curve(self, class_id, threshold_index=0):
+        """(신뢰도 내림차순 구간 경계, precision, recall)"""
+        tp = np.cumsum(self.tp[threshold_index, class_id, ::-1])
+        fp = np.cumsum(self.fp[threshold_index, class_id, ::-1])
+        thresholds = np.arange(self.bins, 0, -1) / self.bins - 1.0 / self.bins
+        seen = (tp + fp) > 0
+        precision = np.divide(tp, tp + fp, out=np.zeros(len(tp)), where=seen)
+        recall = tp / self.gt_counts[class_id] if self.gt_counts[class_id] else np.zeros(len(tp))
+        return thresholds[seen], precision[seen], recall[seen]
+
+    def average_precision(self, class_id, threshold_index=0):
+        _, precision, recall = self.pr_curve(class_id, threshold_index)
+        return interpolated_ap(recall, precision)
+
+    def summary(self, class_names=None):
+        """클래스별 AP50/AP50-95, conf_threshold에서의 precision/recall, PR 곡선, 혼동 행렬"""
+        class_names = class_names or {}
+        conf_bin = int(self._bin(self.conf_threshold))
+        classes = {}
+        ap50, ap50_95 = [], []
+        for class_id in range(self.num_classes):
+            predicted = int(self.tp[0, class_id].sum() + self.fp[0, class_id].sum())
+            if not self.gt_counts[class_id] and not predicted:
+                continue
+            aps = [self.average_precision(class_id, t) for t in range(len(self.iou_thresholds))]
+            tp = int(self.tp[0, class_id, conf_bin:].sum())
+            fp = int(self.fp[0, class_id, conf_bin:].sum())
+            gt = int(self.gt_counts[class_id])
+            thresholds, precision, recall = self.pr_curve(class_id)
+            # PR 곡선은 recall 101점에서의 정밀도 포락선으로 축약
+            envelope = np.maximum.accumulate(precision[::-1])[::-1] if len(precision) else precision
+            index = np.searchsorted(recall, RECALL_POINTS, side='left')
+            curve = [float(envelope[i]) if i < len(envelope) else 0.0 for i in index]
+            classes[class_names.get(class_id, str(class_id))] = {
+                'class_id': class_id,
+                'gt': gt,
+                'tp': tp,
+                'fp': fp,
+                'fn': gt - tp,
+                'precision': tp / (tp + fp) if tp + fp else 0.0,
+                'recall': tp / gt if gt else 0.0,
+                'ap50': aps[0],
+                'ap50_95': float(np.mean(aps)),
+                'pr_curve': {'recall': RECALL_POINTS.round(2).tolist(), 'precision': curve},
+            }
+            if gt:
+                ap50.append(aps[0])
+                ap50_95.append(float(np.mean(aps)))
+
+        labels = [class_names.get(i, str(i)) for i in range(self.num_classes)] + ['background']
+        return {
+            'images': self.images,
+            'iou_thresholds': self.iou_thresholds.tolist(),
+            'conf_threshold': self.conf_threshold,
+            'map50': float(np.mean(ap50)) if ap50 else 0.0,
+            'map50_95': float(np.mean(ap50_95)) if ap50_95 else 0.0,
+            'skipped_boxes': self.skipped_boxes,
+            'classes': classes,
+            'confusion_matrix': {'labels': labels, 'rows': 'ground_truth', 'columns': 'prediction',
+                                 'matrix': self.confusion.tolist()},
+        }
@@ -0,0 +1,279 @@
+import os
+import bisect
+import logging
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+from frame_cache import IMAGE_EXTENSIONS
+
+# 항목의 전체 경로를 돌려주는 데이터 역할
+PATH_ROLE = Qt.ItemDataRole.UserRole + 1
+# fetchMore 한 번에 뷰에 추가하는 행 수 (스크롤이 끝에 닿을 때마다 다음 묶음 추가)
+FETCH_BATCH = 1000
+
+
+def list_directory(path, extensions=IMAGE_EXTENSIONS):
+    """폴더 한 단계의 (이름, 폴더 여부) 목록, 이미지와 하위 폴더만 이름순 정렬 (워커 스레드에서 호출)"""
+    entries = []
+    try:
+        with os.scandir(path) as scanner:
+            for entry in scanner:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir or entry.name.lower().endswith(extensions):
+                    entries.append((entry.name, is_dir))
+    except OSError as e:
+        logging.error(f"폴더 읽기 오류 ({path}): {e}")
+    entries.sort(key=lambda item: item[0].lower())
+    return entries
+
+
+class FileNode:
+    """트리 항목 (children이 None이면 아직 목록을 읽지 않은 폴더, visible은 뷰에 노출된 행 수)"""
+
+    __slots__ = ('name', 'path', 'is_dir', 'parent', 'row', 'children', 'visible', 'loading')
+
+    def __init__(self, name, path, is_dir, parent=None, row=0):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.parent = parent
+        self.row = row
+        self.children = None if is_dir else []
+        self.visible = 0
+        self.loading = False
+
+
+class LazyFileTreeModel(QAbstractItemModel):
+    """폴더를 펼칠 때만 목록을 읽는 파일 트리 모델
+
+    canFetchMore/fetchMore로 펼친 폴더의 os.scandir, 정렬, 노드 생성을 워커 스레드에서 실행하고,
+    GUI 스레드에서는 FETCH_BATCH 행씩 뷰에 노출한다 (수십만 장 폴더도 뷰 레이아웃이 한 번에 몰리지 않음).
+    폴더를 처음 선택할 때 전체 트리를 재귀로 읽지 않는다.
+    """
+
+    # 워커 스레드 → GUI 스레드 목록 전달 (세대, 노드, 하위 FileNode 목록)
+    _listed = pyqtSignal(int, object, object)
+    # reveal() 완료 (찾은 항목 인덱스, 요청 경로), 트리에 없으면 유효하지 않은 인덱스
+    path_revealed = pyqtSignal(QModelIndex, str)
+    # 폴더 목록을 처음 읽음 (변경 감시 시작 시점, 폴더 경로와 읽은 [(이름, 폴더 여부)])
+    directory_loaded = pyqtSignal(str, object)
+
+    def __init__(self, executor, extensions=IMAGE_EXTENSIONS, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.extensions = tuple(extensions)
+        self._root = FileNode("", "", True)
+        self._root.children = []
+        self._generation = 0
+        self._reveal_path = None
+        self._listed.connect(self._on_listed)
+
+    def set_root(self, folder):
+        """루트 폴더 교체 (하위 목록은 펼칠 때 읽음)"""
+        self.beginResetModel()
+        self._generation += 1
+        self._reveal_path = None
+        self._root.children = [FileNode(os.path.basename(folder) or folder, folder, True, self._root)]
+        self._root.visible = 1
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._generation += 1
+        self._reveal_path = None
+        self._root.children = []
+        self._root.visible = 0
+        self.endResetModel()
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def path(self, index):
+        """항목의 전체 경로 (유효하지 않으면 빈 문자열)"""
+        return self.node(index).path if index.isValid() else ""
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node(parent)
+        if not 0 <= row < node.visible or column != 0:
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        return self.node(parent).visible
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return node.name
+        if role == PATH_ROLE:
+            return node.path
+        return None
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        if node.children is None:
+            return node.is_dir
+        return len(node.children) > 0
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        if node.children is None:
+            return node.is_dir and not node.loading
+        return node.visible < len(node.children)
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if not self.canFetchMore(parent):
+            return
+        if node.children is not None:
+            self._expose(node, node.visible + FETCH_BATCH)
+            return
+        node.loading = True
+        generation = self._generation
+        future = self.executor.submit(self._load_children, node)
+        future.add_done_callback(lambda f: self._listed.emit(generation, node, f.result()))
+
+    def _load_children(self, node):
+        """워커 스레드에서 폴더를 읽어 하위 노드 생성 (모델에는 아직 연결하지 않음)"""
+        return [
+            FileNode(name, os.path.join(node.path, name), is_dir, node, row)
+            for row, (name, is_dir) in enumerate(list_directory(node.path, self.extensions))
+        ]
+
+    def _on_listed(self, generation, node, children):
+        """읽은 하위 노드를 행으로 추가 (루트가 바뀐 뒤 도착한 결과는 버림)"""
+        if generation != self._generation:
+            return
+        node.loading = False
+        node.children = children
+        if children:
+            self._expose(node, FETCH_BATCH)
+        else:
+            # 펼침 표시(화살표)를 없애기 위해 변경 알림
+            parent_index = self.createIndex(node.row, 0, node)
+            self.dataChanged.emit(parent_index, parent_index)
+        self.directory_loaded.emit(node.path, [(child.name, child.is_dir) for child in children])
+        if self._reveal_path is not None:
+            self._advance_reveal()
+
+    def _expose(self, node, count):
+        """이미 읽은 하위 노드 중 앞에서부터 count개까지 뷰에 노출"""
+        count = min(count, len(node.children))
+        if count <= node.visible:
+            return
+        self.beginInsertRows(self.createIndex(node.row, 0, node), node.visible, count - 1)
+        node.visible = count
+        self.endInsertRows()
+
+    def find_node(self, path):
+        """이미 읽은 폴더 아래에서 경로의 노드 찾기 (읽지 않았거나 없으면 None)"""
+        if not self._root.children:
+            return None
+        node = self._root.children[0]
+        try:
+            relative = os.path.relpath(os.path.normpath(path), os.path.normpath(node.path))
+        except ValueError:
+            return None
+        if relative.startswith(os.pardir):
+            return None
+        for part in ([] if relative == os.curdir else relative.split(os.sep)):
+            if node.children is None:
+                return None
+            node = next((child for child in node.children if child.name == part), None)
+            if node is None:
+                return None
+        return node
+
+    def update_directory(self, path, added, removed):
+        """폴더 변경 반영: added [(이름, 폴더 여부)], removed [이름] (읽지 않은 폴더는 펼칠 때 읽으므로 무시)
+
+        변경된 항목만 정렬 위치에 삽입/삭제하며 폴더를 다시 읽지 않는다.
+        """
+        node = self.find_node(path)
+        if node is None or node.children is None:
+            return
+        parent_index = self.createIndex(node.row, 0, node)
+
+        removed = set(removed)
+        for row in reversed([child.row for child in node.children if child.name in removed]):
+            exposed = row < node.visible
+            if exposed:
+                self.beginRemoveRows(parent_index, row, row)
+            del node.children[row]
+            for child in node.children[row:]:
+                child.row -= 1
+            if exposed:
+                node.visible -= 1
+                self.endRemoveRows()
+
+        existing = {child.name for child in node.children}
+        keys = [child.name.lower() for child in node.children]
+        for name, is_dir in added:
+            if name in existing or not (is_dir or name.lower().endswith(self.extensions)):
+                continue
+            row = bisect.bisect_right(keys, name.lower())
+            # 모두 노출된 폴더의 끝에 추가되는 항목은 바로 보이게 함
+            exposed = row < node.visible or node.visible == len(node.children)
+            if exposed:
+                self.beginInsertRows(parent_index, row, row)
+            node.children.insert(row, FileNode(name, os.path.join(node.path, name), is_dir, node, row))
+            keys.insert(row, name.lower())
+            existing.add(name)
+            for child in node.children[row + 1:]:
+                child.row += 1
+            if exposed:
+                node.visible += 1
+                self.endInsertRows()
+
+        if not node.children:
+            self.dataChanged.emit(parent_index, parent_index)
+
+    def reveal(self, path):
+        """경로의 항목을 찾아 path_revealed로 알림 (필요한 상위 폴더는 백그라운드로 읽음)"""
+        self._reveal_path = os.path.normpath(path)
+        self._advance_reveal()
+
+    def _advance_reveal(self):
+        target = self._reveal_path
+        if not self._root.children:
+            self._finish_reveal(QModelIndex(), target)
+            return
+        node = self._root.children[0]
+        try:
+            relative = os.path.relpath(target, os.path.normpath(node.path))
+        except ValueError:
+            # Windows에서 드라이브가 다른 경로
+            relative = os.pardir
+        if relative.startswith(os.pardir):
+            self._finish_reveal(QModelIndex(), target)
+            return
+
+        for part in ([] if relative == os.curdir else relative.split(os.sep)):
+            if node.children is None:
+                # 아직 읽지 않은 폴더는 목록이 도착하면 이어서 탐색
+                self.fetchMore(self.createIndex(node.row, 0, node))
+                return
+            node = next((child for child in node.children if child.name == part), None)
+            if node is None:
+                self._finish_reveal(QModelIndex(), target)
+                return
+            self._expose(node.parent, node.row + 1)
+        self._finish_reveal(self.createIndex(node.row, 0, node), target)
+
+    def _finish_reveal(self, index, path):
+        self._reveal_path = None
+        self.path_revealed.emit(index, path)
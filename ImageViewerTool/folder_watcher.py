@@ -0,0 +1,233 @@
+import os
+import logging
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from frame_cache import IMAGE_EXTENSIONS
+
+LABEL_EXTENSION = '.txt'
+WATCH_MODES = ('auto', 'native', 'poll', 'off')
+
+
+def directory_snapshot(path, extensions=IMAGE_EXTENSIONS):
+    """폴더 한 단계의 {이름: (폴더 여부, mtime_ns, 크기)} (이미지, 라벨, 하위 폴더만, 워커 스레드에서 호출)"""
+    snapshot = {}
+    suffixes = tuple(extensions) + (LABEL_EXTENSION,)
+    with os.scandir(path) as scanner:
+        for entry in scanner:
+            try:
+                if entry.is_dir():
+                    snapshot[entry.name] = (True, 0, 0)
+                elif entry.name.lower().endswith(suffixes):
+                    stat = entry.stat()
+                    snapshot[entry.name] = (False, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+    return snapshot
+
+
+def diff_snapshots(old, new):
+    """{'added': [(이름, 폴더 여부)], 'removed': [(이름, 폴더 여부)], 'modified': [이름]}"""
+    return {
+        'added': sorted((name, info[0]) for name, info in new.items() if name not in old),
+        'removed': sorted((name, info[0]) for name, info in old.items() if name not in new),
+        'modified': sorted(name for name, info in new.items() if name in old and old[name] != info),
+    }
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+
+class FolderWatcher(QObject):
+    """트리에 불러온 폴더의 변경을 감지해 폴더 단위 변경 내역을 알림
+
+    QFileSystemWatcher(inotify/ReadDirectoryChangesW) 이벤트가 온 폴더만 워커 스레드에서 다시 읽어
+    이전 스냅샷과 비교한다. 감시를 추가할 수 없는 폴더(네트워크 드라이브, inotify 감시 한도 등)나
+    mode='poll'이면 poll_interval마다 폴더 mtime만 확인해 바뀐 폴더만 다시 읽는다.
+    폴더 mtime이 바뀌지 않는 제자리 수정(라벨 편집 등)은 watch_files()로 지정한 파일만 확인한다.
+    """
+
+    # 폴더 경로, diff_snapshots() 형식 변경 내역
+    changed = pyqtSignal(str, object)
+    # 워커 스레드 → GUI 스레드 스냅샷 전달 (세대, 폴더 경로, 스냅샷 또는 None)
+    _scanned = pyqtSignal(int, str, object)
+
+    def __init__(self, executor, extensions=IMAGE_EXTENSIONS, mode='auto', poll_interval=2.0,
+                 debounce=0.3, parent=None):
+        super().__init__(parent)
+        if mode not in WATCH_MODES:
+            raise ValueError(f"지원하지 않는 감시 방식: {mode}")
+        self.executor = executor
+        self.extensions = tuple(extensions)
+        self.mode = mode
+        self._generation = 0
+        self._snapshots = {}    # 폴더 → 마지막 스냅샷 (None이면 첫 스캔 중)
+        self._listings = {}     # 첫 스캔 중인 폴더 → 트리가 읽은 {이름: 폴더 여부}
+        self._polled = {}       # 폴링 폴더 → 폴더 mtime
+        self._files = {}        # 제자리 수정 확인 파일 → 서명
+        self._dirty = set()
+        self._scanning = set()
+
+        self._native = None
+        if mode in ('auto', 'native'):
+            self._native = QFileSystemWatcher(self)
+            self._native.directoryChanged.connect(self.mark_dirty)
+            self._native.fileChanged.connect(self._on_file_changed)
+
+        # 짧은 시간에 연달아 오는 이벤트(연속 입고)를 폴더별로 모아 한 번만 다시 읽음
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(int(debounce * 1000))
+        self._debounce.timeout.connect(self._flush)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(int(poll_interval * 1000))
+        self._poll_timer.timeout.connect(self._poll)
+        if mode != 'off':
+            self._poll_timer.start()
+
+        self._scanned.connect(self._on_scanned)
+
+    def reset(self):
+        """모든 감시 해제 (루트 폴더 교체 시)"""
+        self._generation += 1
+        if self._native is not None:
+            paths = self._native.directories() + self._native.files()
+            if paths:
+                self._native.removePaths(paths)
+        self._snapshots.clear()
+        self._listings.clear()
+        self._polled.clear()
+        self._files.clear()
+        self._dirty.clear()
+        self._scanning.clear()
+
+    def watch_directory(self, path, listing=None):
+        """폴더 감시 시작
+
+        listing(트리가 읽은 [(이름, 폴더 여부)])을 주면 첫 스냅샷을 그 목록과 비교해, 트리가 폴더를 읽은 뒤
+        감시가 시작되기 전에 들어오거나 사라진 항목을 알린다. 없으면 첫 스냅샷은 변경으로 알리지 않는다.
+        """
+        if self.mode == 'off' or path in self._snapshots:
+            return
+        self._snapshots[path] = None
+        if listing is not None:
+            self._listings[path] = dict(listing)
+        if self._native is None or not self._native.addPath(path):
+            if self.mode == 'native':
+                logging.warning(f"폴더 감시를 추가할 수 없습니다: {path}")
+            self._polled[path] = file_signature(path)
+        self._scan(path)
+
+    def unwatch(self, path):
+        """폴더와 그 하위 폴더 감시 해제"""
+        prefix = os.path.join(path, '')
+        for watched in [p for p in self._snapshots if p == path or p.startswith(prefix)]:
+            self._snapshots.pop(watched, None)
+            self._listings.pop(watched, None)
+            self._polled.pop(watched, None)
+            self._dirty.discard(watched)
+            if self._native is not None and watched in self._native.directories():
+                self._native.removePath(watched)
+
+    def watch_files(self, paths):
+        """제자리 수정을 확인할 파일 목록 교체 (현재 이미지와 라벨)"""
+        if self.mode == 'off':
+            return
+        if self._native is not None and self._native.files():
+            self._native.removePaths(self._native.files())
+        self._files = {path: file_signature(path) for path in paths}
+        if self._native is not None:
+            existing = [path for path, signature in self._files.items() if signature is not None]
+            if existing:
+                self._native.addPaths(existing)
+
+    def mark_dirty(self, path):
+        """폴더를 다시 읽을 대상으로 표시"""
+        if path in self._snapshots:
+            self._dirty.add(path)
+            self._debounce.start()
+
+    def _on_file_changed(self, path):
+        # 폴더 스캔으로 변경 내역을 만들고, 저장 방식에 따라 파일이 교체되면 풀린 감시를 다시 추가
+        self.mark_dirty(os.path.dirname(path))
+        if self._native is not None and path not in self._native.files() and os.path.exists(path):
+            self._native.addPath(path)
+
+    def _check_file(self, path):
+        signature = file_signature(path)
+        if path in self._files and signature != self._files[path]:
+            self._files[path] = signature
+            # 같은 변경을 폴더 스캔에서 다시 알리지 않도록 스냅샷도 갱신
+            directory, name = os.path.split(path)
+            snapshot = self._snapshots.get(directory)
+            if snapshot is not None and signature is not None and name in snapshot:
+                snapshot[name] = (False, *signature)
+            self.changed.emit(directory, {'added': [], 'removed': [], 'modified': [name]})
+
+    def _poll(self):
+        """폴링 폴더는 mtime만 확인, 감시 파일은 서명 비교"""
+        for path, signature in list(self._polled.items()):
+            current = file_signature(path)
+            if current != signature:
+                self._polled[path] = current
+                self.mark_dirty(path)
+        for path in list(self._files):
+            self._check_file(path)
+
+    def _flush(self):
+        dirty, self._dirty = self._dirty, set()
+        for path in dirty:
+            self._scan(path)
+
+    def _scan(self, path):
+        if path in self._scanning:
+            # 스캔 중에 온 이벤트는 끝난 뒤 다시 읽음
+            self._dirty.add(path)
+            self._debounce.start()
+            return
+        self._scanning.add(path)
+        generation = self._generation
+        future = self.executor.submit(self._snapshot, path)
+        future.add_done_callback(lambda f: self._scanned.emit(generation, path, f.result()))
+
+    def _snapshot(self, path):
+        try:
+            return directory_snapshot(path, self.extensions)
+        except OSError:
+            return None
+
+    def _on_scanned(self, generation, path, snapshot):
+        if generation != self._generation:
+            return
+        self._scanning.discard(path)
+        if path not in self._snapshots:
+            return
+        if snapshot is None:
+            # 폴더가 삭제됨 (트리에서는 상위 폴더 변경으로 제거)
+            self.unwatch(path)
+            return
+        previous, self._snapshots[path] = self._snapshots[path], snapshot
+        if previous is None:
+            listing = self._listings.pop(path, None)
+            if listing is not None:
+                self._emit_listing_gap(path, listing, snapshot)
+            return
+        diff = diff_snapshots(previous, snapshot)
+        for name in diff['modified']:
+            full_path = os.path.join(path, name)
+            if full_path in self._files:
+                self._files[full_path] = file_signature(full_path)
+        if diff['added'] or diff['removed'] or diff['modified']:
+            self.changed.emit(path, diff)
+
+    def _emit_listing_gap(self, path, listing, snapshot):
+        """트리 목록과 첫 스냅샷 사이의 추가/삭제 알림 (트리에 없는 라벨은 비교하지 않음)"""
+        added = sorted((name, info[0]) for name, info in snapshot.items()
+                       if name not in listing and not name.lower().endswith(LABEL_EXTENSION))
+        removed = sorted((name, is_dir) for name, is_dir in listing.items() if name not in snapshot)
+        if added or removed:
+            self.changed.emit(path, {'added': added, 'removed': removed, 'modified': []})
@@ -0,0 +1,103 @@
+import os
+import threading
+from collections import OrderedDict
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+
+def file_source_key(path):
+    """파일 경로와 수정 시각/크기로 원본 이미지 식별 키 생성"""
+    try:
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def estimate_nbytes(value):
+    """캐시 항목의 대략적인 메모리 크기 (numpy 배열, dict, list, tuple 재귀 합산)"""
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(item) for item in value)
+    return 64
+
+
+class FrameCache:
+    """바이트 예산으로 제한되는 스레드 안전 LRU 캐시
+
+    디코딩된 이미지, 파싱된 라벨, 처리 결과를 함께 보관한다.
+    예산을 넘으면 가장 오래 사용되지 않은 항목부터 제거한다.
+    """
+
+    def __init__(self, max_bytes=1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """항목 조회 (없으면 None) 후 최근 사용으로 표시"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """항목 저장 후 예산을 넘는 오래된 항목 제거"""
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return value
+            self._entries[key] = (value, nbytes)
+            self._total_bytes += nbytes
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+        return value
+
+    def invalidate(self, predicate):
+        """조건에 맞는 키를 가진 항목 제거"""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                _, nbytes = self._entries.pop(key)
+                self._total_bytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+
+def neighbor_image_indexes(tree_view, index, count):
+    """트리 표시 순서(방향키 이동 순서)로 index 다음의 이미지 항목 최대 count개 반환"""
+    neighbors = []
+    current = tree_view.indexBelow(index)
+    # 펼쳐진 폴더 안의 폴더 항목은 건너뛰되, 무한히 탐색하지 않도록 제한
+    visited = 0
+    while current.isValid() and len(neighbors) < count and visited < count * 20:
+        visited += 1
+        name = current.data() or ""
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            neighbors.append(current)
+        current = tree_view.indexBelow(current)
+    return neighbors
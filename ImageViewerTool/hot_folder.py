@@ -0,0 +1,106 @@
+"""핫 폴더 스트리밍 검사
+
+입력 폴더에 새로 들어오는 이미지를 도착 순서대로 디코딩 → 전처리 → 검출 → 그리기 → 저장한다.
+Ctrl+C로 종료하면 큐에 남은 이미지를 처리한 뒤 끝낸다.
+
+    python ImageViewerTool/hot_folder.py --model best.pt --folder camera/ --output inspected/ --params params.json
+"""
+import sys
+import os
+import json
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.execution_resources import configure_resources
+from batch_eval import load_params
+from batch_inference import BatchingInference
+from inference_backends import BACKENDS, load_backend
+from sliced_inference import DEFAULT_TILE_OVERLAP, SLICE_MERGE_METHODS, slicing_options
+from result_export import ResultsWriter
+from stream_pipeline import DROP_POLICIES, HotFolderSource, StreamingPipeline, draw_boxes, format_stats
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="핫 폴더 스트리밍 검사")
+    parser.add_argument('--model', required=True, help="YOLO 가중치 경로 (.pt, .onnx, OpenVINO .xml)")
+    parser.add_argument('--backend', choices=BACKENDS + ('auto',), default='auto',
+                        help="추론 백엔드 (auto: 파일 형식으로 선택)")
+    parser.add_argument('--folder', required=True, help="감시할 입력 폴더")
+    parser.add_argument('--output', required=True, help="결과 폴더 (results.jsonl, annotated/)")
+    parser.add_argument('--params', help="전처리 파라미터 JSON (뷰어의 Export Params)")
+    parser.add_argument('--conf', type=float, default=0.25, help="신뢰도 임계값")
+    parser.add_argument('--nms-iou', type=float, default=0.45, help="클래스별 NMS IoU 임계값")
+    parser.add_argument('--queue-size', type=int, default=4, help="단계 사이 큐 크기")
+    parser.add_argument('--drop-policy', choices=DROP_POLICIES, default='block',
+                        help="큐가 가득 찼을 때 (block: 앞 단계 대기, drop_oldest/drop_newest: 프레임 버림)")
+    parser.add_argument('--poll-interval', type=float, default=0.2, help="입력 폴더 확인 주기(초)")
+    parser.add_argument('--existing', action='store_true', help="시작 시점에 이미 있던 이미지도 처리")
+    parser.add_argument('--export', help="예측/GT/매칭 결과를 열 파일(.npy 청크)로 기록할 폴더")
+    parser.add_argument('--no-images', action='store_true', help="그린 이미지를 저장하지 않음 (results.jsonl만 기록)")
+    parser.add_argument('--max-batch', type=int, default=8, help="최대 추론 배치 크기")
+    parser.add_argument('--target-latency', type=float, default=0.3,
+                        help="배치 한 번의 목표 추론 시간(초), 넘으면 배치 크기를 줄임")
+    parser.add_argument('--stats-every', type=float, default=5.0, help="상태 로그 주기(초)")
+    parser.add_argument('--slice-size', type=int, default=0,
+                        help="분할(타일) 추론 타일 크기 (0: 전체 이미지 한 번 추론)")
+    parser.add_argument('--slice-overlap', type=float, default=DEFAULT_TILE_OVERLAP, help="타일 겹침 비율")
+    parser.add_argument('--slice-merge', choices=SLICE_MERGE_METHODS, default='nms', help="타일 간 중복 박스 병합 방식")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    resources = configure_resources('batch')
+    params = load_params(args.params)
+    slicing = slicing_options(args.slice_size, args.slice_overlap, args.slice_merge) if args.slice_size else None
+
+    model = load_backend(args.model, args.backend, resources.inference_threads)
+    resources.apply_torch()
+    model.warmup()
+    names = dict(model.names)
+
+    inference = BatchingInference(model, max_batch_size=args.max_batch, target_latency=args.target_latency)
+    exporter = None
+    if args.export:
+        exporter = ResultsWriter(args.export, metadata={
+            'source': 'hot_folder', 'model': os.path.abspath(args.model), 'backend': model.name,
+            'folder': os.path.abspath(args.folder), 'preprocessing': params, 'slicing': slicing,
+        })
+    pipeline = StreamingPipeline(
+        inference, params, args.output, conf_threshold=args.conf, iou_threshold=args.nms_iou, slicing=slicing,
+        queue_size=args.queue_size, drop_policy=args.drop_policy,
+        draw=lambda image, detections: draw_boxes(image, detections, names), save_images=not args.no_images,
+        exporter=exporter
+    ).start()
+    source = HotFolderSource(args.folder, pipeline.submit, poll_interval=args.poll_interval,
+                             include_existing=args.existing).start()
+    logging.info(f"핫 폴더 검사 시작: {os.path.abspath(args.folder)} -> {os.path.abspath(args.output)} "
+                 f"(queue={args.queue_size}, policy={args.drop_policy})")
+
+    try:
+        while True:
+            time.sleep(args.stats_every)
+            logging.info(f"스트리밍: {format_stats(pipeline.stats())}")
+    except KeyboardInterrupt:
+        logging.info("종료 요청, 남은 이미지 처리 중...")
+    finally:
+        # 새 도착을 먼저 멈춰 종료 중에 들어온 이미지를 닫힌 큐에 버리지 않고 입력 폴더에 그대로 둠
+        source.stop()
+        finished = pipeline.stop(drain=True)
+        stats = pipeline.stats()
+        stats['inference'] = inference.report()
+        logging.info(f"핫 폴더 검사 종료: {json.dumps(stats, ensure_ascii=False)}")
+        if finished:
+            inference.close()
+        else:
+            # 그리기 단계가 아직 기다리는 추론을 취소하지 않도록 닫지 않음
+            logging.warning("처리 중인 이미지가 남아 추론 계층을 닫지 않고 종료합니다")
+        resources.shutdown()
+
+
+if __name__ == '__main__':
+    main()
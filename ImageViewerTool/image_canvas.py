@@ -0,0 +1,297 @@
+import math
+import time
+import cv2
+import numpy as np
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QImage, QPainter, QPen, QColor
+
+# 오버레이 라벨 기본 글자 크기 (pt, 확대 배율과 무관)
+DEFAULT_LABEL_SIZE = 9
+
+
+def paint_boxes(painter, rects, labels=None, color=QColor(255, 0, 0), label_size=DEFAULT_LABEL_SIZE, row=0):
+    """화면 좌표 박스와 라벨을 QPainter로 그리기 (rects: (N, 4) x0, y0, x1, y1)
+
+    선 두께와 글자 크기는 화면 픽셀 기준이므로 확대 배율과 관계없이 같은 크기로 보인다.
+    row는 같은 박스에 여러 레이어의 라벨이 겹치지 않도록 박스 위로 쌓는 줄 번호다.
+    """
+    font = painter.font()
+    font.setPointSizeF(label_size)
+    painter.setFont(font)
+    metrics = painter.fontMetrics()
+    text_height = metrics.height()
+    pen = QPen(color, 2)
+    pen.setCosmetic(True)
+    painter.setBrush(Qt.BrushStyle.NoBrush)
+
+    for index, (x0, y0, x1, y1) in enumerate(np.asarray(rects, np.float64).reshape(-1, 4).tolist()):
+        painter.setPen(pen)
+        painter.drawRect(QRectF(x0, y0, x1 - x0, y1 - y0))
+        if labels is None or not labels[index]:
+            continue
+        label = labels[index]
+        background = QRectF(x0, y0 - text_height * (row + 1), metrics.horizontalAdvance(label) + 4, text_height)
+        painter.fillRect(background, color)
+        painter.setPen(Qt.GlobalColor.white)
+        painter.drawText(background.adjusted(2, 0, 0, 0), Qt.AlignmentFlag.AlignVCenter, label)
+
+
+def crop_padded(image, x0, y0, x1, y1):
+    """이미지의 (x0, y0, x1, y1) 영역 복사본 (이미지 밖은 검은색으로 채움, 영역 크기만큼만 복사)"""
+    height, width = image.shape[:2]
+    cx0, cy0 = min(max(x0, 0), width), min(max(y0, 0), height)
+    cx1, cy1 = max(min(x1, width), cx0), max(min(y1, height), cy0)
+    roi = image[cy0:cy1, cx0:cx1]
+    if (cx0, cy0, cx1, cy1) == (x0, y0, x1, y1):
+        return np.ascontiguousarray(roi)
+    padded = np.zeros((y1 - y0, x1 - x0) + image.shape[2:], image.dtype)
+    padded[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0] = roi
+    return padded
+
+
+class ImageCanvas(QWidget):
+    """처리된 프레임을 확대/축소/이동하며 보여주는 뷰 전용 위젯
+
+    확대/이동은 캐시된 프레임과 해상도 피라미드에 대한 보기 연산일 뿐이며 재처리나 추론을 일으키지 않는다.
+    화면에 보이는 영역만 잘라 최종 화면 크기로 한 번만 리샘플링하고(축소는 INTER_AREA),
+    결과는 프레임 사이에 재사용하는 BGR 버퍼에 써서 색 변환이나 QImage 복사 없이 그린다.
+    새 프레임은 원본에서 바로 리샘플링하고, 같은 프레임을 확대/이동할 때부터 해상도 피라미드를 만들어 사용한다.
+    박스와 라벨은 프레임에 그리지 않고 이름별 오버레이 레이어로 보관해 화면 해상도로 그리므로,
+    레이어 표시 전환이나 라벨 크기 변경은 다시 그리기만 일으킨다.
+    """
+
+    MIN_ZOOM = 0.5
+    MAX_SCALE = 20.0
+
+    def __init__(self, placeholder="", parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+        self.frame = None
+        self._pyramid = []
+        self.zoom = 1.0          # 화면 맞춤 배율 대비 확대 비율
+        self.center = None       # 뷰 중앙에 오는 이미지 좌표 (x, y)
+        self._drag_origin = None
+        self._rendered = None    # (뷰 상태 키, QImage, 목표 영역)
+        self._buffer = None      # 리샘플링 출력 버퍼 (크기가 같으면 재사용, QImage가 직접 참조)
+        self._frame_renders = 0  # 현재 프레임을 그린 보기 상태 수 (2 이상이면 피라미드 사용)
+        self._overlays = {}      # 레이어 이름 → (이미지 좌표 박스, 라벨 목록, 색, 라벨 줄)
+        self._hidden = set()
+        self.label_size = DEFAULT_LABEL_SIZE
+        self.telemetry = None    # 설정하면 그리기 시간을 'canvas_paint' 단계로 기록 (StageTelemetry)
+        self.setMouseTracking(True)
+        self.setMinimumSize(100, 100)
+
+    # 프레임 관리
+    def set_frame(self, image, reset_view=False):
+        """표시할 BGR 프레임 설정 (크기가 같으면 현재 확대/이동 상태 유지)"""
+        if image is self.frame and not reset_view:
+            # 같은 프레임이면 피라미드와 리샘플링 결과 재사용 (오버레이만 바뀐 경우)
+            self.update()
+            return
+        same_size = self.frame is not None and self.frame.shape[:2] == image.shape[:2]
+        self.frame = image
+        self._pyramid = [image]
+        self._rendered = None
+        self._frame_renders = 0
+        if reset_view or not same_size:
+            self.reset_view()
+        self.update()
+
+    def clear_frame(self, placeholder=None):
+        """프레임 제거 후 안내 문구 표시"""
+        self.frame = None
+        self._pyramid = []
+        self._rendered = None
+        self._overlays.clear()
+        if placeholder is not None:
+            self.placeholder = placeholder
+        self.update()
+
+    # 오버레이 레이어
+    def set_overlay(self, name, xyxy, labels=None, color=QColor(255, 0, 0), row=0):
+        """이미지 좌표 박스 (N, 4)와 라벨로 레이어 설정 (표시 여부는 유지)"""
+        self._overlays[name] = (np.asarray(xyxy, np.float64).reshape(-1, 4), labels, color, row)
+        self.update()
+
+    def clear_overlays(self):
+        self._overlays.clear()
+        self.update()
+
+    def set_overlay_visible(self, name, visible):
+        """레이어 표시 전환 (다시 그리기만 함)"""
+        if visible:
+            self._hidden.discard(name)
+        else:
+            self._hidden.add(name)
+        self.update()
+
+    def set_label_size(self, size):
+        self.label_size = size
+        self.update()
+
+    def reset_view(self):
+        """화면 맞춤 배율과 중앙 정렬로 되돌리기"""
+        self.zoom = 1.0
+        if self.frame is not None:
+            height, width = self.frame.shape[:2]
+            self.center = (width / 2.0, height / 2.0)
+        self._rendered = None
+        self.update()
+
+    def pyramid_level(self, level):
+        """해상도 피라미드 단계 (필요할 때만 생성, 프레임별로 캐시)"""
+        while len(self._pyramid) <= level:
+            previous = self._pyramid[-1]
+            if min(previous.shape[:2]) < 2:
+                break
+            self._pyramid.append(cv2.pyrDown(previous))
+        return min(level, len(self._pyramid) - 1)
+
+    # 좌표 변환
+    def fit_scale(self):
+        height, width = self.frame.shape[:2]
+        return min(self.width() / width, self.height() / height)
+
+    def view_scale(self):
+        """화면 픽셀 / 이미지 픽셀"""
+        return self.fit_scale() * self.zoom
+
+    def image_to_widget(self, x, y):
+        scale = self.view_scale()
+        return ((x - self.center[0]) * scale + self.width() / 2.0,
+                (y - self.center[1]) * scale + self.height() / 2.0)
+
+    def widget_to_image(self, x, y):
+        scale = self.view_scale()
+        return ((x - self.width() / 2.0) / scale + self.center[0],
+                (y - self.height() / 2.0) / scale + self.center[1])
+
+    # 렌더링
+    def render_viewport(self):
+        """보이는 영역만 잘라 리샘플링한 QImage와 위젯 내 목표 영역 반환"""
+        scale = self.view_scale()
+        state = (self.width(), self.height(), scale, self.center)
+        if self._rendered is not None and self._rendered[0] == state:
+            return self._rendered[1], self._rendered[2]
+
+        height, width = self.frame.shape[:2]
+        left, top = self.widget_to_image(0, 0)
+        right, bottom = self.widget_to_image(self.width(), self.height())
+        left, top = max(0, math.floor(left)), max(0, math.floor(top))
+        right, bottom = min(width, math.ceil(right)), min(height, math.ceil(bottom))
+        if right <= left or bottom <= top:
+            self._rendered = (state, None, None)
+            return None, None
+
+        # 확대/이동 중에는 축소 배율에 맞는 피라미드 단계에서 잘라내기 (단계마다 해상도 1/2)
+        # 새 프레임의 첫 표시는 피라미드 생성 없이 원본에서 한 번만 리샘플링
+        self._frame_renders += 1
+        level = 0
+        if scale < 1.0 and self._frame_renders > 1:
+            level = self.pyramid_level(max(0, int(math.floor(math.log2(1.0 / scale)))))
+        factor = 2 ** level
+        source = self._pyramid[level]
+        lx0, ly0 = left // factor, top // factor
+        lx1 = min(source.shape[1], -(-right // factor))
+        ly1 = min(source.shape[0], -(-bottom // factor))
+        crop = source[ly0:ly1, lx0:lx1]
+
+        x0, y0 = self.image_to_widget(lx0 * factor, ly0 * factor)
+        x1, y1 = self.image_to_widget(lx1 * factor, ly1 * factor)
+        target_width = max(1, int(round(x1 - x0)))
+        target_height = max(1, int(round(y1 - y0)))
+
+        if target_width < crop.shape[1]:
+            interpolation = cv2.INTER_AREA
+        elif scale >= 4.0:
+            interpolation = cv2.INTER_NEAREST  # 확대 시 픽셀 경계를 그대로 보여줌
+        else:
+            interpolation = cv2.INTER_LINEAR
+        shape = (target_height, target_width, 3)
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, np.uint8)
+        cv2.resize(crop, (target_width, target_height), dst=self._buffer, interpolation=interpolation)
+        # 이전 QImage는 _rendered 교체와 함께 버려지므로 버퍼를 복사 없이 감쌀 수 있음
+        q_image = QImage(self._buffer.data, target_width, target_height, target_width * 3,
+                         QImage.Format.Format_BGR888)
+
+        target = QRectF(x0, y0, target_width, target_height)
+        self._rendered = (state, q_image, target)
+        return q_image, target
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.frame is None:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.placeholder)
+            return
+
+        start = time.perf_counter()
+        q_image, target = self.render_viewport()
+        if q_image is not None:
+            painter.drawImage(target.topLeft(), q_image)
+        self.paint_overlay(painter)
+        if self.telemetry is not None:
+            self.telemetry.record('canvas_paint', start, time.perf_counter() - start)
+
+    def paint_overlay(self, painter):
+        """오버레이 레이어를 화면 좌표로 변환해 그리기 (보이는 영역 밖의 박스는 건너뜀)"""
+        scale = self.view_scale()
+        offset = np.tile([self.width() / 2.0 - self.center[0] * scale,
+                          self.height() / 2.0 - self.center[1] * scale], 2)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for name, (xyxy, labels, color, row) in self._overlays.items():
+            if name in self._hidden or len(xyxy) == 0:
+                continue
+            rects = xyxy * scale + offset
+            visible = np.flatnonzero((rects[:, 2] >= 0) & (rects[:, 0] <= self.width()) &
+                                     (rects[:, 3] >= 0) & (rects[:, 1] <= self.height()))
+            if visible.size == 0:
+                continue
+            paint_boxes(painter, rects[visible], None if labels is None else [labels[i] for i in visible],
+                        color, self.label_size, row)
+
+    def resizeEvent(self, event):
+        self._rendered = None
+        super().resizeEvent(event)
+
+    # 마우스 조작
+    def wheelEvent(self, event):
+        """커서 위치를 중심으로 확대/축소"""
+        if self.frame is None:
+            return
+        position = event.position()
+        anchor = self.widget_to_image(position.x(), position.y())
+
+        factor = 1.1 if event.angleDelta().y() > 0 else 1 / 1.1
+        max_zoom = self.MAX_SCALE / self.fit_scale()
+        self.zoom = max(self.MIN_ZOOM, min(self.zoom * factor, max(max_zoom, 1.0)))
+
+        # 확대 후에도 커서 아래의 이미지 좌표가 그대로 있도록 중심 이동
+        scale = self.view_scale()
+        self.center = (anchor[0] - (position.x() - self.width() / 2.0) / scale,
+                       anchor[1] - (position.y() - self.height() / 2.0) / scale)
+        self.update()
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.frame is not None:
+            self._drag_origin = (event.position(), self.center)
+            self.setCursor(Qt.CursorShape.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is None:
+            return
+        origin, center = self._drag_origin
+        delta = event.position() - origin
+        scale = self.view_scale()
+        self.center = (center[0] - delta.x() / scale, center[1] - delta.y() / scale)
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+        self.unsetCursor()
+
+    def mouseDoubleClickEvent(self, event):
+        """더블 클릭으로 화면 맞춤 보기 복원"""
+        self.reset_view()
@@ -0,0 +1,320 @@
+import os
+import ast
+import time
+import logging
+import cv2
+import numpy as np
+from box_ops import batched_nms
+from detections import Detections
+from matching import match_boxes
+
+# 모델 경로/백엔드 기본값 (환경 변수 VDT_MODEL, VDT_BACKEND로 변경)
+DEFAULT_MODEL_PATH = r"E:\GitHub\swh_data\test\240730E150.pt"
+BACKENDS = ('ultralytics', 'onnxruntime', 'openvino')
+LETTERBOX_COLOR = (114, 114, 114)
+MAX_NMS_CANDIDATES = 30000
+
+
+def letterbox(image, size):
+    """비율을 유지해 size x size로 축소/확대 후 회색 여백 추가, (이미지, 배율, (좌, 상) 여백) 반환"""
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    return image, ratio, (left, top)
+
+
+def to_blob(images):
+    """BGR uint8 이미지 목록을 (N, 3, H, W) float32 RGB [0, 1] 텐서로 변환"""
+    batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def decode_yolo_output(output, image_shape, ratio, pad, conf=0.25, iou=0.45, max_det=300):
+    """YOLOv8/11 내보내기 출력 (4 + 클래스 수, 앵커 수)을 원본 좌표의 Detections로 변환"""
+    predictions = output.T
+    scores = predictions[:, 4:]
+    class_id = scores.argmax(axis=1)
+    confidence = scores[np.arange(len(scores)), class_id]
+
+    keep = confidence >= conf
+    boxes, confidence, class_id = predictions[keep, :4], confidence[keep], class_id[keep]
+    if len(confidence) > MAX_NMS_CANDIDATES:
+        top = np.argsort(-confidence)[:MAX_NMS_CANDIDATES]
+        boxes, confidence, class_id = boxes[top], confidence[top], class_id[top]
+
+    # (cx, cy, w, h) → (x1, y1, x2, y2), 여백과 배율을 되돌려 원본 좌표로
+    xyxy = np.empty_like(boxes)
+    xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+    xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+    xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad[0]) / ratio
+    xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad[1]) / ratio
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, image_shape[1])
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, image_shape[0])
+
+    selected = batched_nms(xyxy, confidence, class_id, iou)[:max_det]
+    return Detections(xyxy[selected], confidence[selected], class_id[selected])
+
+
+class InferenceBackend:
+    """검출 모델 실행 백엔드 공통 인터페이스
+
+    predict()는 BGR 이미지 목록을 받아 이미지별 Detections 목록을 반환한다.
+    weights_path는 결과 캐시 키에 쓰이는 가중치 파일이다.
+    """
+
+    name = 'base'
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.weights_path = model_path
+        self.names = {}
+        self.input_size = 640
+
+    def predict(self, images, conf=0.25, iou=0.45, max_det=300, **kwargs):
+        raise NotImplementedError
+
+    def __call__(self, images, **options):
+        return self.predict(images, **options)
+
+    def warmup(self, runs=1):
+        """더미 입력으로 첫 추론의 초기화 비용을 미리 지불"""
+        dummy = np.full((self.input_size, self.input_size, 3), LETTERBOX_COLOR[0], np.uint8)
+        for _ in range(runs):
+            self.predict([dummy])
+
+
+class UltralyticsBackend(InferenceBackend):
+    """ultralytics YOLO (PyTorch .pt)"""
+
+    name = 'ultralytics'
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.names = dict(getattr(self.model, 'names', None) or {})
+
+    def predict(self, images, conf=0.25, iou=0.45, max_det=300, **kwargs):
+        results = self.model(list(images), conf=conf, iou=iou, max_det=max_det, verbose=False)
+        return [Detections.from_results(result) for result in results]
+
+
+class LetterboxBackend(InferenceBackend):
+    """letterbox 전처리와 NumPy 후처리를 공유하는 내보내기 모델 백엔드"""
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        self.dynamic_batch = False
+
+    def run(self, blob):
+        """(N, 3, H, W) 입력에 대한 원시 출력 (N, 4 + 클래스 수, 앵커 수)"""
+        raise NotImplementedError
+
+    def predict(self, images, conf=0.25, iou=0.45, max_det=300, **kwargs):
+        prepared = [letterbox(image, self.input_size) for image in images]
+        blobs = [to_blob([padded for padded, _, _ in prepared])]
+        if not self.dynamic_batch:
+            # 배치 크기가 1로 고정된 모델은 한 장씩 실행
+            blobs = [blob[None] for blob in blobs[0]]
+        outputs = np.concatenate([self.run(blob) for blob in blobs])
+        return [
+            decode_yolo_output(output, image.shape, ratio, pad, conf, iou, max_det)
+            for output, image, (_, ratio, pad) in zip(outputs, images, prepared)
+        ]
+
+
+def parse_names(value):
+    """ultralytics 메타데이터의 names 문자열("{0: 'Door', ...}")을 dict로 변환"""
+    try:
+        names = ast.literal_eval(value) if isinstance(value, str) else dict(value)
+        return {int(key): str(name) for key, name in names.items()}
+    except (ValueError, SyntaxError, TypeError, AttributeError):
+        return {}
+
+
+class OnnxRuntimeBackend(LetterboxBackend):
+    """ONNX Runtime CPU 실행 (ultralytics format='onnx' 내보내기 모델, int8 양자화 모델 포함)"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, threads=None):
+        super().__init__(model_path)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        self.dynamic_batch = not isinstance(batch, int)
+        self.input_size = height if isinstance(height, int) else 640
+        self.names = parse_names(self.session.get_modelmeta().custom_metadata_map.get('names', ''))
+
+    def run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoBackend(LetterboxBackend):
+    """OpenVINO IR CPU 실행 (.xml, 같은 이름의 .bin 가중치)"""
+
+    name = 'openvino'
+
+    def __init__(self, model_path, threads=None):
+        if os.path.isdir(model_path):
+            model_path = next(os.path.join(model_path, name) for name in sorted(os.listdir(model_path))
+                              if name.endswith('.xml'))
+        super().__init__(model_path)
+        import openvino as ov
+        core = ov.Core()
+        model = core.read_model(model_path)
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        self.compiled = core.compile_model(model, 'CPU', config)
+        self.weights_path = os.path.splitext(model_path)[0] + '.bin'
+
+        shape = model.input(0).partial_shape
+        self.dynamic_batch = shape[0].is_dynamic
+        self.input_size = shape[2].get_length() if shape[2].is_static else 640
+        try:
+            self.names = parse_names(model.get_rt_info(['model_info', 'names']).astype(str))
+        except Exception:
+            self.names = {}
+
+    def run(self, blob):
+        return self.compiled([blob])[self.compiled.output(0)]
+
+
+def detect_backend(model_path):
+    """파일 형식으로 백엔드 선택"""
+    if os.path.isdir(model_path) or model_path.endswith('.xml'):
+        return 'openvino'
+    if model_path.endswith('.onnx'):
+        return 'onnxruntime'
+    return 'ultralytics'
+
+
+def resolve_model(model_path=None, backend=None):
+    """(모델 경로, 백엔드 이름), 인자 > 환경 변수 VDT_MODEL/VDT_BACKEND > 기본값 순"""
+    model_path = model_path or os.environ.get('VDT_MODEL') or DEFAULT_MODEL_PATH
+    backend = backend or os.environ.get('VDT_BACKEND') or 'auto'
+    if backend == 'auto':
+        backend = detect_backend(model_path)
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 백엔드: {backend} (가능: {', '.join(BACKENDS)})")
+    return model_path, backend
+
+
+def load_backend(model_path=None, backend=None, threads=None):
+    """모델 로드 후 InferenceBackend 반환"""
+    model_path, backend = resolve_model(model_path, backend)
+    start = time.perf_counter()
+    if backend == 'onnxruntime':
+        model = OnnxRuntimeBackend(model_path, threads)
+    elif backend == 'openvino':
+        model = OpenVinoBackend(model_path, threads)
+    else:
+        model = UltralyticsBackend(model_path)
+    logging.info(f"모델 로드: {model_path} ({backend}, {time.perf_counter() - start:.2f}s)")
+    return model
+
+
+def calibration_blobs(image_paths, input_size, params=None):
+    """int8 보정용 입력 텐서 생성 (params가 있으면 뷰어와 같은 전처리 적용)"""
+    from preprocessing import PreprocessingPipeline
+    pipeline = PreprocessingPipeline() if params is not None else None
+    for image_path in image_paths:
+        image = cv2.imdecode(np.fromfile(image_path, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+        if pipeline is not None:
+            image = pipeline.run(image, params)
+        yield to_blob([letterbox(image, input_size)[0]])
+
+
+def quantize_onnx(model_path, output_path, image_paths, params=None, exclude_nodes=None):
+    """ONNX 모델 int8 정적 양자화 (QDQ, 가중치 채널별), 보정 이미지로 활성값 범위 측정"""
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    backend = OnnxRuntimeBackend(model_path)
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self._blobs = calibration_blobs(image_paths, backend.input_size, params)
+
+        def get_next(self):
+            blob = next(self._blobs, None)
+            return None if blob is None else {backend.input_name: blob}
+
+    quantize_static(
+        model_path, output_path, Reader(),
+        quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+        per_channel=True, nodes_to_exclude=exclude_nodes or []
+    )
+    logging.info(f"ONNX int8 양자화 완료: {output_path}")
+    return output_path
+
+
+def quantize_openvino(model_path, output_path, image_paths, params=None):
+    """OpenVINO IR int8 양자화 (NNCF 학습 후 양자화)"""
+    import nncf
+    import openvino as ov
+
+    model = ov.Core().read_model(model_path)
+    shape = model.input(0).partial_shape
+    input_size = shape[2].get_length() if shape[2].is_static else 640
+    blobs = list(calibration_blobs(image_paths, input_size, params))
+    quantized = nncf.quantize(model, nncf.Dataset(blobs), preset=nncf.QuantizationPreset.MIXED,
+                              subset_size=len(blobs))
+    ov.save_model(quantized, output_path)
+    logging.info(f"OpenVINO int8 양자화 완료: {output_path}")
+    return output_path
+
+
+def parity_check(reference, candidate, images, conf=0.25, iou=0.45, match_iou=0.5):
+    """두 백엔드의 검출 결과 비교 (같은 클래스끼리 1:1 매칭)
+
+    기준 대비 recall/precision, 매칭 박스의 평균 IoU와 신뢰도 차이, 백엔드별 이미지당 시간을 반환한다.
+    """
+    totals = {'reference_boxes': 0, 'candidate_boxes': 0, 'matched': 0}
+    ious, confidence_deltas = [], []
+    seconds = {'reference': 0.0, 'candidate': 0.0}
+    for image in images:
+        start = time.perf_counter()
+        expected = reference.predict([image], conf=conf, iou=iou)[0]
+        seconds['reference'] += time.perf_counter() - start
+        start = time.perf_counter()
+        actual = candidate.predict([image], conf=conf, iou=iou)[0]
+        seconds['candidate'] += time.perf_counter() - start
+
+        matches = match_boxes(actual.xyxy, actual.confidence, actual.class_id,
+                              expected.xyxy, expected.class_id, match_iou)
+        hit = matches.true_positive
+        totals['reference_boxes'] += len(expected)
+        totals['candidate_boxes'] += len(actual)
+        totals['matched'] += int(hit.sum())
+        ious.extend(matches.pred_iou[hit].tolist())
+        confidence_deltas.extend(
+            np.abs(actual.confidence[hit] - expected.confidence[matches.pred_gt[hit]]).tolist())
+
+    image_count = max(1, len(images))
+    return {
+        **totals,
+        'recall': totals['matched'] / totals['reference_boxes'] if totals['reference_boxes'] else 1.0,
+        'precision': totals['matched'] / totals['candidate_boxes'] if totals['candidate_boxes'] else 1.0,
+        'mean_iou': float(np.mean(ious)) if ious else 0.0,
+        'max_confidence_delta': float(np.max(confidence_deltas)) if confidence_deltas else 0.0,
+        'mean_confidence_delta': float(np.mean(confidence_deltas)) if confidence_deltas else 0.0,
+        'reference_ms_per_image': seconds['reference'] * 1000 / image_count,
+        'candidate_ms_per_image': seconds['candidate'] * 1000 / image_count,
+    }
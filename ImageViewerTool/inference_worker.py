@@ -0,0 +1,81 @@
+import logging
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class InferenceWorker(QThread):
+    """전처리와 추론을 GUI 스레드 밖에서 실행하는 백그라운드 워커
+
+    요청은 한 칸짜리 슬롯에 저장되어 새 요청이 들어오면 처리되지 않은 이전 요청을 덮어쓴다.
+    슬라이더를 드래그하는 동안 쌓이는 중간 요청은 버려지고 항상 가장 최근 요청만 처리된다.
+    처리할 요청이 없을 때는 미리 읽기(prefetch) 요청을 처리하며, 그 결과는 전달하지 않는다.
+    process_batch가 주어지면 대기 중인 미리 읽기 요청을 한꺼번에 넘겨 배치 추론할 수 있게 한다.
+    process_batch는 has_pending()으로 새 요청이 왔는지 확인해 남은 미리 읽기를 중단할 수 있다.
+    """
+
+    result_ready = pyqtSignal(object)
+
+    def __init__(self, process, parent=None, process_batch=None):
+        super().__init__(parent)
+        self._process = process
+        self._process_batch = process_batch
+        self._condition = threading.Condition()
+        self._pending = None
+        self._prefetch = []
+        self._running = True
+
+    def submit(self, request):
+        """처리 요청 (아직 시작되지 않은 이전 요청은 폐기)"""
+        with self._condition:
+            self._pending = request
+            self._condition.notify()
+
+    def has_pending(self):
+        """처리를 기다리는 표시 요청이 있는지 (미리 읽기 중단 확인용)"""
+        return self._pending is not None
+
+    def prefetch(self, requests):
+        """미리 읽기 요청 목록 교체 (이전 목록 중 남은 요청은 폐기)"""
+        with self._condition:
+            self._prefetch = list(requests)
+            self._condition.notify()
+
+    def stop(self):
+        """워커 종료 후 스레드가 끝날 때까지 대기"""
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._prefetch = []
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        # 로그/trace에서 구분되도록 Qt 스레드에 이름 지정
+        threading.current_thread().name = "inference-worker"
+        while True:
+            with self._condition:
+                while self._running and self._pending is None and not self._prefetch:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                if self._pending is not None:
+                    request, self._pending = self._pending, None
+                    is_prefetch = False
+                elif self._process_batch is not None:
+                    request, self._prefetch = self._prefetch, []
+                    is_prefetch = True
+                else:
+                    request = self._prefetch.pop(0)
+                    is_prefetch = True
+
+            try:
+                if is_prefetch and self._process_batch is not None:
+                    self._process_batch(request)
+                    continue
+                result = self._process(request)
+            except Exception as e:
+                logging.error(f"백그라운드 처리 오류: {e}")
+                continue
+
+            if result is not None and not is_prefetch:
+                self.result_ready.emit(result)
@@ -0,0 +1,297 @@
+import os
+import copy
+import logging
+import numpy as np
+from frame_cache import IMAGE_EXTENSIONS
+from label_store import label_path_for, parse_label_text
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow가 없으면 OpenCV 디코딩으로 크기 확인
+    Image = None
+
+INDEX_FILENAME = '.vdt_label_index.npz'
+INDEX_VERSION = 1
+
+# 이미지별 열: 경로(루트 기준 상대), 이미지/라벨 파일 서명, 이미지 크기
+IMAGE_COLUMNS = ('path', 'image_mtime_ns', 'image_size', 'label_mtime_ns', 'label_size', 'width', 'height')
+# 박스별 열: 이미지 id, 클래스, 픽셀 좌표 중심/크기, 파생 면적/종횡비
+BOX_COLUMNS = ('image_id', 'class_id', 'x', 'y', 'w', 'h', 'area', 'aspect')
+
+
+def image_dimensions(path):
+    """이미지 헤더만 읽어 (width, height) 반환 (실패 시 (0, 0))"""
+    try:
+        if Image is not None:
+            with Image.open(path) as image:
+                return image.size
+        import cv2
+        image = cv2.imdecode(np.fromfile(path, np.uint8), cv2.IMREAD_UNCHANGED)
+        if image is not None:
+            return image.shape[1], image.shape[0]
+    except Exception as e:
+        logging.error(f"이미지 크기 확인 오류: {e}")
+    return 0, 0
+
+
+def scan_images(root):
+    """폴더 아래 모든 이미지의 루트 기준 상대 경로 (정렬됨)"""
+    paths = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        paths.append(os.path.relpath(entry.path, root))
+        except OSError as e:
+            logging.error(f"폴더 스캔 오류: {e}")
+    paths.sort()
+    return paths
+
+
+def file_signature(path):
+    """(mtime_ns, size), 파일이 없으면 (0, -1)"""
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, -1
+
+
+def empty_columns():
+    return {
+        'image': {
+            'path': np.zeros(0, dtype=str),
+            'image_mtime_ns': np.zeros(0, np.int64),
+            'image_size': np.zeros(0, np.int64),
+            'label_mtime_ns': np.zeros(0, np.int64),
+            'label_size': np.zeros(0, np.int64),
+            'width': np.zeros(0, np.int32),
+            'height': np.zeros(0, np.int32),
+        },
+        'box': {
+            'image_id': np.zeros(0, np.int32),
+            'class_id': np.zeros(0, np.int16),
+            'x': np.zeros(0, np.float32),
+            'y': np.zeros(0, np.float32),
+            'w': np.zeros(0, np.float32),
+            'h': np.zeros(0, np.float32),
+            'area': np.zeros(0, np.float32),
+            'aspect': np.zeros(0, np.float32),
+        },
+    }
+
+
+class LabelIndex:
+    """폴더 전체 라벨을 열 배열로 보관하는 인덱스
+
+    박스 한 개가 한 행이며 모든 조회는 열 배열에 대한 NumPy 마스크 연산이다.
+    폴더 루트의 INDEX_FILENAME에 저장되며, update()는 서명이 바뀐 이미지/라벨만 다시 읽는다.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        columns = empty_columns()
+        self.images = columns['image']
+        self.boxes = columns['box']
+
+    # 저장/불러오기
+    def load(self):
+        """저장된 인덱스 불러오기 (없거나 버전이 다르면 False)"""
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    return False
+                self.images = {name: data['image_' + name] for name in IMAGE_COLUMNS}
+                self.boxes = {name: data['box_' + name] for name in BOX_COLUMNS}
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logging.error(f"라벨 인덱스 로드 오류: {e}")
+            return False
+
+    def save(self):
+        """인덱스 저장 (임시 파일에 쓴 뒤 교체)"""
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            arrays = {'version': np.int32(INDEX_VERSION)}
+            arrays.update({'image_' + name: values for name, values in self.images.items()})
+            arrays.update({'box_' + name: values for name, values in self.boxes.items()})
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            logging.error(f"라벨 인덱스 저장 오류: {e}")
+
+    # 증분 갱신
+    def update(self, progress=None, dirty=None):
+        """폴더를 다시 스캔해 추가/변경/삭제된 이미지만 반영, 변경이 있었는지 반환
+
+        dirty(루트 기준 상대 경로 목록)가 주어지면 폴더를 스캔하지 않고 그 이미지들만 다시 확인한다.
+        """
+        previous = {path: image_id for image_id, path in enumerate(self.images['path'].tolist())}
+        if dirty is None:
+            paths = scan_images(self.root)
+        else:
+            dirty = set(dirty)
+            paths = sorted(
+                path for path in set(previous) | dirty
+                if path not in dirty or os.path.isfile(os.path.join(self.root, path))
+            )
+
+        rows = []          # 새 이미지 테이블 (경로 순서)
+        changed = []       # (새 image_id, 절대 경로)가 다시 파싱할 대상
+        keep_old_ids = []  # 그대로 유지하는 이전 image_id
+        remap = np.full(len(previous), -1, np.int32)
+
+        for new_id, path in enumerate(paths):
+            old_id = previous.get(path)
+            if dirty is not None and old_id is not None and path not in dirty:
+                # 변경 알림이 없는 이미지는 저장된 서명을 그대로 사용
+                remap[old_id] = new_id
+                keep_old_ids.append(old_id)
+                rows.append(tuple(self.images[name][old_id].item() for name in IMAGE_COLUMNS))
+                continue
+
+            full_path = os.path.join(self.root, path)
+            image_signature = file_signature(full_path)
+            label_signature = file_signature(label_path_for(full_path))
+
+            if old_id is not None and (
+                    int(self.images['image_mtime_ns'][old_id]), int(self.images['image_size'][old_id])) == image_signature:
+                width, height = int(self.images['width'][old_id]), int(self.images['height'][old_id])
+                if (int(self.images['label_mtime_ns'][old_id]), int(self.images['label_size'][old_id])) == label_signature:
+                    remap[old_id] = new_id
+                    keep_old_ids.append(old_id)
+                else:
+                    changed.append((new_id, full_path))
+            else:
+                width, height = image_dimensions(full_path)
+                changed.append((new_id, full_path))
+            rows.append((path, *image_signature, *label_signature, width, height))
+
+            if progress is not None and new_id % 1000 == 0:
+                progress(new_id, len(paths))
+
+        if not changed and len(keep_old_ids) == len(previous) and len(paths) == len(previous):
+            return False
+
+        images = empty_columns()['image']
+        if rows:
+            columns = list(zip(*rows))
+            for name, values in zip(IMAGE_COLUMNS, columns):
+                images[name] = np.asarray(values, dtype=images[name].dtype if name != 'path' else str)
+
+        # 유지하는 박스는 image_id만 새 번호로 바꾸고, 변경된 이미지는 라벨을 다시 파싱
+        kept = remap[self.boxes['image_id']] >= 0
+        parts = [{name: values[kept] for name, values in self.boxes.items()}]
+        parts[0]['image_id'] = remap[parts[0]['image_id']]
+        for new_id, full_path in changed:
+            parts.append(self._parse_boxes(new_id, full_path, images['width'][new_id], images['height'][new_id]))
+
+        boxes = {name: np.concatenate([part[name] for part in parts]) for name in BOX_COLUMNS}
+        order = np.argsort(boxes['image_id'], kind='stable')
+        self.boxes = {name: values[order] for name, values in boxes.items()}
+        self.images = images
+        return True
+
+    def _parse_boxes(self, image_id, image_path, width, height):
+        """이미지 하나의 라벨을 박스 열로 변환 (좌표는 픽셀 단위)"""
+        try:
+            with open(label_path_for(image_path), 'r') as f:
+                labels = parse_label_text(f.read())
+        except OSError:
+            labels = np.zeros((0, 5))
+
+        w = (labels[:, 3] * width).astype(np.float32)
+        h = (labels[:, 4] * height).astype(np.float32)
+        return {
+            'image_id': np.full(len(labels), image_id, np.int32),
+            'class_id': labels[:, 0].astype(np.int16),
+            'x': (labels[:, 1] * width).astype(np.float32),
+            'y': (labels[:, 2] * height).astype(np.float32),
+            'w': w,
+            'h': h,
+            'area': w * h,
+            'aspect': np.divide(w, h, out=np.zeros_like(w), where=h > 0),
+        }
+
+    # 조회
+    def __len__(self):
+        return len(self.boxes['image_id'])
+
+    @property
+    def image_count(self):
+        return len(self.images['path'])
+
+    def select(self, class_ids=None, **ranges):
+        """조건에 맞는 박스 마스크
+
+        class_ids: 클래스 id 또는 목록, ranges: 열 이름=(최소, 최대) (None은 제한 없음)
+        파생 열 'max_side'(w, h 중 큰 값)도 사용할 수 있다.
+        """
+        mask = np.ones(len(self), bool)
+        if class_ids is not None:
+            mask &= np.isin(self.boxes['class_id'], np.atleast_1d(class_ids))
+        for name, (low, high) in ranges.items():
+            values = self.column(name)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values < high
+        return mask
+
+    def column(self, name):
+        if name == 'max_side':
+            return np.maximum(self.boxes['w'], self.boxes['h'])
+        return self.boxes[name]
+
+    def image_hits(self, mask):
+        """마스크에 해당하는 (절대 경로, 박스 수) 목록 (박스 수 내림차순)"""
+        counts = np.bincount(self.boxes['image_id'][mask], minlength=self.image_count)
+        image_ids = np.flatnonzero(counts)
+        image_ids = image_ids[np.argsort(-counts[image_ids], kind='stable')]
+        return [(os.path.join(self.root, self.images['path'][i]), int(counts[i])) for i in image_ids]
+
+    def class_counts(self, mask=None):
+        """클래스별 박스 수 {class_id: count}"""
+        class_ids = self.boxes['class_id'] if mask is None else self.boxes['class_id'][mask]
+        counts = np.bincount(class_ids.astype(np.int64)) if len(class_ids) else np.zeros(0, np.int64)
+        return {int(class_id): int(count) for class_id, count in enumerate(counts) if count}
+
+    def statistics(self, mask=None):
+        """박스 수, 이미지 수, 면적/종횡비 분위수 요약"""
+        mask = np.ones(len(self), bool) if mask is None else mask
+        area = self.boxes['area'][mask]
+        aspect = self.boxes['aspect'][mask]
+        summary = {
+            'boxes': int(mask.sum()),
+            'images': int(len(np.unique(self.boxes['image_id'][mask]))),
+        }
+        if len(area):
+            summary['area_percentiles'] = dict(zip((5, 50, 95), np.percentile(area, (5, 50, 95)).tolist()))
+            summary['aspect_percentiles'] = dict(zip((5, 50, 95), np.percentile(aspect, (5, 50, 95)).tolist()))
+        return summary
+
+
+def build_label_index(root, progress=None):
+    """저장된 인덱스를 불러와 증분 갱신 후 변경이 있으면 저장 (백그라운드 스레드용)"""
+    index = LabelIndex(root)
+    index.load()
+    if index.update(progress):
+        index.save()
+    return index
+
+
+def refresh_label_index(index, dirty):
+    """변경된 이미지만 반영한 새 인덱스 반환 (조회 중일 수 있는 기존 인덱스는 수정하지 않음)"""
+    updated = copy.copy(index)
+    if updated.update(dirty=dirty):
+        updated.save()
+    return updated
@@ -0,0 +1,118 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+EMPTY_LABELS = np.zeros((0, 5), np.float64)
+EMPTY_LABELS.setflags(write=False)
+
+
+def label_path_for(image_path):
+    """이미지에 대응하는 YOLO 라벨 파일 경로"""
+    return os.path.splitext(image_path)[0] + '.txt'
+
+
+def parse_label_text(text):
+    """YOLO 라벨 텍스트를 (N, 5) [class, x_center, y_center, width, height] 배열로 파싱"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return EMPTY_LABELS
+
+    rows = [line.split() for line in lines]
+    if all(len(row) == 5 for row in rows):
+        # 모든 줄이 5개 값인 일반적인 경우는 한 번에 변환 (전체 토큰 수만 보면 4개/6개 줄이 섞여도 통과함)
+        try:
+            return np.array(rows, np.float64)
+        except ValueError:
+            pass
+
+    # 잘못된 줄이 섞여 있으면 줄 단위로 파싱하고 오류 줄은 건너뜀
+    rows = []
+    for line in lines:
+        try:
+            values = [float(value) for value in line.split()]
+            if len(values) != 5:
+                raise ValueError(f"값 개수 {len(values)}")
+            rows.append(values)
+        except ValueError as e:
+            logging.error(f"라벨 라인 파싱 오류: {e}")
+    return np.array(rows, np.float64).reshape(-1, 5) if rows else EMPTY_LABELS
+
+
+class LabelStore:
+    """라벨 파일을 한 번만 파싱해 (경로, 수정 시각, 크기)로 캐시하는 저장소
+
+    조회할 때마다 stat으로 수정 여부만 확인하고, 파일이 바뀐 경우에만 다시 읽는다.
+    반환되는 배열은 공유되므로 읽기 전용이며, 기존 float 파싱과 같은 정수 좌표가 나오도록 float64로 보관한다.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, label_path):
+        """라벨 파일의 정규화 좌표 배열 반환 (파일이 없으면 빈 배열)"""
+        try:
+            stat = os.stat(label_path)
+        except OSError:
+            self.invalidate(label_path)
+            return EMPTY_LABELS
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(label_path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(label_path)
+                return entry[1]
+
+        try:
+            with open(label_path, 'r') as f:
+                labels = parse_label_text(f.read())
+        except OSError as e:
+            logging.error(f"라벨 파일 읽기 오류: {e}")
+            return EMPTY_LABELS
+        labels.setflags(write=False)
+
+        with self._lock:
+            self._entries[label_path] = (signature, labels)
+            self._entries.move_to_end(label_path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return labels
+
+    def labels_for_image(self, image_path):
+        """이미지의 라벨 배열 반환"""
+        return self.load(label_path_for(image_path))
+
+    def pixel_boxes(self, image_path, img_width, img_height):
+        """(class_id (N,), xyxy (N, 4) int32) 픽셀 좌표 반환"""
+        labels = self.labels_for_image(image_path)
+        class_ids = labels[:, 0].astype(np.int32)
+        half_w = labels[:, 3] / 2
+        half_h = labels[:, 4] / 2
+        xyxy = np.stack([
+            (labels[:, 1] - half_w) * img_width,
+            (labels[:, 2] - half_h) * img_height,
+            (labels[:, 1] + half_w) * img_width,
+            (labels[:, 2] + half_h) * img_height,
+        ], axis=1)
+        return class_ids, np.trunc(xyxy).astype(np.int32)
+
+    def boxes(self, image_path, img_width, img_height):
+        """기존 박스 dict 형식 목록 반환 ({'class_id', 'coords'})"""
+        class_ids, xyxy = self.pixel_boxes(image_path, img_width, img_height)
+        return [
+            {'class_id': int(class_id), 'coords': tuple(int(v) for v in coords)}
+            for class_id, coords in zip(class_ids, xyxy)
+        ]
+
+    def invalidate(self, label_path):
+        """특정 라벨 파일 캐시 제거"""
+        with self._lock:
+            self._entries.pop(label_path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,106 @@
+import logging
+import numpy as np
+from box_ops import iou_matrix
+
+MATCH_IOU = 0.5
+MATCH_METHODS = ('greedy', 'optimal')
+
+
+class Matches:
+    """예측-GT 1:1 매칭 결과
+
+    pred_gt: (N,) 매칭된 GT 인덱스 (-1은 미매칭), pred_iou: (N,) 매칭 IoU
+    best_iou: (N,) 같은 클래스 GT와의 최대 IoU (매칭 여부와 무관), gt_pred: (M,) 매칭된 예측 인덱스
+    """
+
+    def __init__(self, pred_gt, pred_iou, best_iou, gt_pred):
+        self.pred_gt = pred_gt
+        self.pred_iou = pred_iou
+        self.best_iou = best_iou
+        self.gt_pred = gt_pred
+
+    @property
+    def true_positive(self):
+        return self.pred_gt >= 0
+
+    @property
+    def missed_gt(self):
+        return self.gt_pred < 0
+
+    def counts(self):
+        """(TP, FP, FN)"""
+        tp = int(self.true_positive.sum())
+        return tp, len(self.pred_gt) - tp, int(self.missed_gt.sum())
+
+
+def class_aware_iou(pred_xyxy, pred_classes, gt_xyxy, gt_classes):
+    """(N, M) IoU 행렬, 클래스가 다른 쌍은 0"""
+    ious = iou_matrix(pred_xyxy, gt_xyxy)
+    same_class = np.asarray(pred_classes)[:, None] == np.asarray(gt_classes)[None, :]
+    return np.where(same_class, ious, 0.0).astype(np.float32)
+
+
+def greedy_assignment(ious, scores, iou_threshold):
+    """신뢰도 높은 예측부터 아직 매칭되지 않은 GT 중 IoU 최대인 것에 매칭 (COCO 방식)"""
+    pred_gt = np.full(ious.shape[0], -1, np.int64)
+    available = np.ones(ious.shape[1], bool)
+    for pred in np.argsort(-np.asarray(scores), kind='stable'):
+        candidates = np.where(available, ious[pred], -1.0)
+        gt = int(np.argmax(candidates)) if candidates.size else -1
+        if gt >= 0 and candidates[gt] >= iou_threshold:
+            pred_gt[pred] = gt
+            available[gt] = False
+    return pred_gt
+
+
+def optimal_assignment(ious, iou_threshold):
+    """IoU 합이 최대가 되는 1:1 매칭 (헝가리안 알고리즘, 임계값 미만 쌍 제외)"""
+    from scipy.optimize import linear_sum_assignment
+
+    valid = ious >= iou_threshold
+    pred_gt = np.full(ious.shape[0], -1, np.int64)
+    if not valid.any():
+        return pred_gt
+    # 유효한 쌍이 있는 행/열만 풀어 행렬 크기를 줄임
+    rows = np.flatnonzero(valid.any(axis=1))
+    cols = np.flatnonzero(valid.any(axis=0))
+    cost = np.where(valid[np.ix_(rows, cols)], -ious[np.ix_(rows, cols)], 0.0)
+    row_ids, col_ids = linear_sum_assignment(cost)
+    keep = valid[rows[row_ids], cols[col_ids]]
+    pred_gt[rows[row_ids[keep]]] = cols[col_ids[keep]]
+    return pred_gt
+
+
+def match_boxes(pred_xyxy, pred_scores, pred_classes, gt_xyxy, gt_classes,
+                iou_threshold=MATCH_IOU, method='greedy'):
+    """클래스를 구분한 예측-GT 1:1 매칭 (GUI와 배치 평가 공용)"""
+    pred_xyxy = np.asarray(pred_xyxy, np.float32).reshape(-1, 4)
+    gt_xyxy = np.asarray(gt_xyxy, np.float32).reshape(-1, 4)
+    ious = class_aware_iou(pred_xyxy, pred_classes, gt_xyxy, gt_classes)
+
+    if method == 'optimal':
+        try:
+            pred_gt = optimal_assignment(ious, iou_threshold)
+        except ImportError:
+            logging.warning("scipy가 없어 greedy 매칭으로 대체합니다")
+            pred_gt = greedy_assignment(ious, pred_scores, iou_threshold)
+    elif method == 'greedy':
+        pred_gt = greedy_assignment(ious, pred_scores, iou_threshold)
+    else:
+        raise ValueError(f"지원하지 않는 매칭 방식: {method}")
+
+    matched = pred_gt >= 0
+    pred_iou = np.zeros(len(pred_gt), np.float32)
+    pred_iou[matched] = ious[np.flatnonzero(matched), pred_gt[matched]]
+    best_iou = ious.max(axis=1) if ious.shape[1] else np.zeros(len(pred_gt), np.float32)
+    gt_pred = np.full(len(gt_xyxy), -1, np.int64)
+    gt_pred[pred_gt[matched]] = np.flatnonzero(matched)
+    return Matches(pred_gt, pred_iou, best_iou, gt_pred)
+
+
+def match_detections(detections, gt_boxes, iou_threshold=MATCH_IOU, method='greedy'):
+    """Detections와 박스 dict 목록({'class_id', 'coords'}) 매칭"""
+    gt_xyxy = np.array([box['coords'] for box in gt_boxes], np.float32).reshape(-1, 4)
+    gt_classes = np.array([box['class_id'] for box in gt_boxes], np.int32)
+    return match_boxes(detections.xyxy, detections.confidence, detections.class_id,
+                       gt_xyxy, gt_classes, iou_threshold, method)
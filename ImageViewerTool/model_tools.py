@@ -0,0 +1,99 @@
+"""검출 모델 도구 (int8 양자화, 백엔드 간 결과 비교)
+
+    python ImageViewerTool/model_tools.py quantize --model best.onnx --folder calib/ --output best_int8.onnx
+    python ImageViewerTool/model_tools.py parity --reference best.pt --candidate best_int8.onnx --folder calib/
+"""
+import sys
+import os
+import json
+import logging
+import argparse
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.execution_resources import configure_resources
+from preprocessing import PreprocessingPipeline
+from label_index import scan_images
+from batch_eval import load_params
+from inference_backends import (
+    BACKENDS, load_backend, resolve_model, quantize_onnx, quantize_openvino, parity_check
+)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def folder_images(folder, limit):
+    """폴더 아래 이미지 경로 (앞에서부터 limit장)"""
+    return [os.path.join(folder, path) for path in scan_images(folder)][:limit]
+
+
+def quantize(args):
+    params = load_params(args.params) if args.params or not args.raw else None
+    image_paths = folder_images(args.folder, args.limit)
+    logging.info(f"보정 이미지: {len(image_paths)}장")
+    model_path, backend = resolve_model(args.model, args.backend)
+    if backend == 'onnxruntime':
+        return quantize_onnx(model_path, args.output, image_paths, params, args.exclude)
+    if backend == 'openvino':
+        return quantize_openvino(model_path, args.output, image_paths, params)
+    raise SystemExit("int8 양자화는 onnxruntime/openvino 모델만 지원합니다. 먼저 ONNX/OpenVINO로 내보내세요.")
+
+
+def parity(args):
+    resources = configure_resources('interactive')
+    params = load_params(args.params)
+    reference = load_backend(args.reference, args.reference_backend, resources.inference_threads)
+    candidate = load_backend(args.candidate, args.candidate_backend, resources.inference_threads)
+
+    pipeline = PreprocessingPipeline()
+    images = []
+    for image_path in folder_images(args.folder, args.limit):
+        image = cv2.imdecode(np.fromfile(image_path, np.uint8), cv2.IMREAD_COLOR)
+        if image is not None:
+            images.append(pipeline.run(image, params))
+
+    report = parity_check(reference, candidate, images, conf=args.conf, iou=args.iou)
+    print(json.dumps(report, indent=2))
+    if report['recall'] < args.min_recall or report['precision'] < args.min_recall:
+        logging.error(f"백엔드 결과 불일치: recall={report['recall']:.3f}, precision={report['precision']:.3f}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검출 모델 도구")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    quantize_parser = commands.add_parser('quantize', help="int8 학습 후 양자화")
+    quantize_parser.add_argument('--model', required=True, help="ONNX 모델 또는 OpenVINO IR(.xml)")
+    quantize_parser.add_argument('--backend', choices=BACKENDS + ('auto',), default='auto')
+    quantize_parser.add_argument('--folder', required=True, help="보정용 이미지 폴더")
+    quantize_parser.add_argument('--output', required=True, help="양자화 모델 저장 경로")
+    quantize_parser.add_argument('--params', help="전처리 파라미터 JSON (모델 입력과 같은 전처리로 보정)")
+    quantize_parser.add_argument('--raw', action='store_true', help="전처리 없이 원본 이미지로 보정")
+    quantize_parser.add_argument('--limit', type=int, default=300, help="보정 이미지 수")
+    quantize_parser.add_argument('--exclude', nargs='*', help="양자화에서 제외할 ONNX 노드 이름")
+
+    parity_parser = commands.add_parser('parity', help="두 백엔드의 검출 결과 비교")
+    parity_parser.add_argument('--reference', required=True, help="기준 모델 (예: .pt)")
+    parity_parser.add_argument('--candidate', required=True, help="비교 모델 (예: int8 .onnx)")
+    parity_parser.add_argument('--reference-backend', choices=BACKENDS + ('auto',), default='auto')
+    parity_parser.add_argument('--candidate-backend', choices=BACKENDS + ('auto',), default='auto')
+    parity_parser.add_argument('--folder', required=True, help="비교용 이미지 폴더")
+    parity_parser.add_argument('--params', help="전처리 파라미터 JSON")
+    parity_parser.add_argument('--limit', type=int, default=100)
+    parity_parser.add_argument('--conf', type=float, default=0.25)
+    parity_parser.add_argument('--iou', type=float, default=0.45)
+    parity_parser.add_argument('--min-recall', type=float, default=0.95,
+                               help="기준 대비 recall/precision이 이 값보다 낮으면 실패")
+
+    args = parser.parse_args(argv)
+    if args.command == 'quantize':
+        quantize(args)
+        return 0
+    return parity(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
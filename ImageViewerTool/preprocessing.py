@@ -0,0 +1,150 @@
+import cv2
+
+
+def odd_kernel(size):
+    """커널 크기를 홀수로 보정"""
+    size = int(size)
+    return size + 1 if size % 2 == 0 else size
+
+
+class PreprocessingPipeline:
+    """순서가 정해진 전처리 단계 체인
+
+    각 단계는 자신과 모든 상위 단계의 파라미터로 만든 키와 함께 마지막 출력을 보관한다.
+    파라미터가 바뀌면 해당 단계부터 다시 계산하고, 그 위 단계는 캐시를 그대로 사용한다.
+    비활성화된 단계는 입력을 그대로 전달하므로 추가 메모리를 쓰지 않는다.
+    """
+
+    # (단계 이름, 활성화 플래그, 단계 파라미터)
+    STAGES = (
+        ("median_blur", "use_median_blur", ("median_blur_kernel",)),
+        ("bilateral_filter", "use_bilateral_filter",
+         ("bilateral_filter_diameter", "bilateral_filter_sigma_color", "bilateral_filter_sigma_space")),
+        ("gaussian_blur", None, ("gaussian_blur_kernel",)),
+        ("hist_equalization", "use_hist_equalization", ()),
+        ("clahe", None, ("clahe_clip_limit",)),
+        ("morphological", "use_morphological", ("morph_kernel_size",)),
+        ("adaptive_threshold", "use_adaptive_threshold", ("adaptive_thresh_block_size", "adaptive_thresh_c")),
+        ("canny", "use_canny", ("canny_threshold1", "canny_threshold2")),
+    )
+
+    PARAM_NAMES = tuple(
+        name
+        for _, toggle, params in STAGES
+        for name in ((toggle,) if toggle else ()) + params
+    )
+
+    # 뷰어 시작 시 값과 같은 기본 파라미터 (배치 실행에서 --params로 덮어씀)
+    DEFAULT_PARAMS = {
+        "use_median_blur": False, "median_blur_kernel": 3,
+        "use_bilateral_filter": False, "bilateral_filter_diameter": 9,
+        "bilateral_filter_sigma_color": 75, "bilateral_filter_sigma_space": 75,
+        "gaussian_blur_kernel": 15,
+        "use_hist_equalization": False,
+        "clahe_clip_limit": 2.0,
+        "use_morphological": False, "morph_kernel_size": 3,
+        "use_adaptive_threshold": False, "adaptive_thresh_block_size": 11, "adaptive_thresh_c": 2,
+        "use_canny": False, "canny_threshold1": 100, "canny_threshold2": 200,
+    }
+
+    def __init__(self):
+        self._cache = {}
+        self._clahe = None
+        self._clahe_clip_limit = None
+        self._morph_kernels = {}
+
+    @staticmethod
+    def stage_key(stage, params):
+        """단계 파라미터 키 (비활성 단계는 파라미터와 무관하게 동일한 키)"""
+        _, toggle, names = stage
+        if toggle and not params[toggle]:
+            return "off"
+        return tuple(params[name] for name in names)
+
+    def clear(self):
+        """캐시된 단계 출력 제거"""
+        self._cache.clear()
+
+    def run(self, image, params, source_key=None):
+        """전처리 실행 후 BGR 이미지 반환 (반환값은 호출자가 자유롭게 수정 가능)
+
+        source_key가 None이면 캐시를 사용하지 않는다.
+        """
+        key = ("gray", source_key)
+        cached = self._cache.get("gray")
+        if source_key is not None and cached is not None and cached[0] == key:
+            processed = cached[1]
+        else:
+            processed = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if source_key is not None:
+                self._cache["gray"] = (key, processed)
+
+        for stage in self.STAGES:
+            name = stage[0]
+            key = (key, self.stage_key(stage, params))
+            cached = self._cache.get(name)
+            if source_key is not None and cached is not None and cached[0] == key:
+                processed = cached[1]
+                continue
+
+            processed = self.apply_stage(name, processed, params)
+            if source_key is not None:
+                self._cache[name] = (key, processed)
+
+        return cv2.cvtColor(processed, cv2.COLOR_GRAY2BGR)
+
+    def apply_stage(self, name, processed, params):
+        """단일 단계 적용 (비활성 단계는 입력을 그대로 반환)"""
+        if name == "median_blur":
+            if params["use_median_blur"]:
+                processed = cv2.medianBlur(processed, odd_kernel(params["median_blur_kernel"]))
+
+        elif name == "bilateral_filter":
+            if params["use_bilateral_filter"]:
+                processed = cv2.bilateralFilter(
+                    processed,
+                    params["bilateral_filter_diameter"],
+                    params["bilateral_filter_sigma_color"],
+                    params["bilateral_filter_sigma_space"]
+                )
+
+        elif name == "gaussian_blur":
+            kernel_size = odd_kernel(params["gaussian_blur_kernel"])
+            processed = cv2.GaussianBlur(processed, (kernel_size, kernel_size), 0)
+
+        elif name == "hist_equalization":
+            if params["use_hist_equalization"]:
+                processed = cv2.equalizeHist(processed)
+
+        elif name == "clahe":
+            # CLAHE 객체는 재사용하고 clip limit만 변경
+            if self._clahe is None:
+                self._clahe = cv2.createCLAHE(clipLimit=params["clahe_clip_limit"], tileGridSize=(8, 8))
+            elif self._clahe_clip_limit != params["clahe_clip_limit"]:
+                self._clahe.setClipLimit(params["clahe_clip_limit"])
+            self._clahe_clip_limit = params["clahe_clip_limit"]
+            processed = self._clahe.apply(processed)
+
+        elif name == "morphological":
+            if params["use_morphological"]:
+                size = params["morph_kernel_size"]
+                if size not in self._morph_kernels:
+                    self._morph_kernels[size] = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+                processed = cv2.morphologyEx(processed, cv2.MORPH_CLOSE, self._morph_kernels[size])
+
+        elif name == "adaptive_threshold":
+            if params["use_adaptive_threshold"]:
+                processed = cv2.adaptiveThreshold(
+                    processed,
+                    255,
+                    cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                    cv2.THRESH_BINARY,
+                    params["adaptive_thresh_block_size"],
+                    params["adaptive_thresh_c"]
+                )
+
+        elif name == "canny":
+            if params["use_canny"]:
+                processed = cv2.Canny(processed, params["canny_threshold1"], params["canny_threshold2"])
+
+        return processed
@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import numpy as np
+from detections import Detections
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "VisionDefectToolkit", "results")
+
+
+def content_hash(data):
+    """바이트 내용 해시 (이미지 파일 식별용)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """파일 내용 해시 (모델 가중치 식별용)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """(모델 가중치 해시, 이미지 내용 해시, 전처리 파라미터)로 키를 만드는 디스크 검출 결과 캐시
+
+    GUI와 배치 실행이 같은 디렉터리를 공유할 수 있도록 항목마다 작은 npz 파일 하나를 원자적으로 기록한다.
+    조회 시 파일 수정 시각을 갱신하고, 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 파일부터 제거한다.
+    """
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024):
+        self.directory = directory or os.environ.get("VDT_RESULT_CACHE") or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._model_hashes = {}
+        self._total_bytes = None
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def model_hash(self, model_path):
+        """모델 가중치 파일 해시 (경로/수정 시각/크기가 같으면 재사용)"""
+        try:
+            stat = os.stat(model_path)
+        except OSError:
+            # 파일이 아닌 모델 식별자는 이름 자체를 키로 사용
+            return content_hash(str(model_path).encode('utf-8'))
+        memo_key = (model_path, stat.st_mtime_ns, stat.st_size)
+        if memo_key not in self._model_hashes:
+            self._model_hashes[memo_key] = file_hash(model_path)
+        return self._model_hashes[memo_key]
+
+    def make_key(self, model_digest, image_digest, params):
+        """캐시 키 생성 (파라미터는 정렬된 JSON으로 직렬화)"""
+        payload = json.dumps([model_digest, image_digest, params], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.npz')
+
+    def get(self, key):
+        """캐시된 검출 결과 반환 (없으면 None)"""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                detections = Detections.from_arrays(data)
+            os.utime(path)
+            return detections
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error(f"결과 캐시 읽기 오류: {e}")
+            return None
+
+    def put(self, key, detections):
+        """검출 결과 저장 (임시 파일에 쓴 뒤 교체하여 다른 프로세스와 충돌 방지)"""
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **detections.to_arrays())
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logging.error(f"결과 캐시 저장 오류: {e}")
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_total_bytes()
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.npz'):
+                    yield entry
+
+    def _scan_total_bytes(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _evict(self):
+        """최근 사용 순으로 정렬해 예산의 90%까지 줄어들 때까지 오래된 파일 제거"""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+    def clear(self):
+        """모든 캐시 파일 제거"""
+        with self._lock:
+            for entry in list(self._entries()):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = 0
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import shutil
+import threading
+import numpy as np
+from matching import MATCH_IOU, match_boxes
+
+EXPORT_VERSION = 1
+INDEX_FILENAME = 'index.json'
+# 청크 하나에 모으는 예측 + GT 행 수 (넘으면 열별 .npy로 기록)
+CHUNK_ROWS = 65536
+# 기록하지 않은 행이 이 시간(초) 넘게 기다리면 열린 마지막 청크를 다시 써서 기록
+# (느린 입고에서도 실행 중 결과를 읽을 수 있도록, 청크 수는 늘리지 않음)
+FLUSH_INTERVAL = 10.0
+
+# 테이블별 열과 dtype (이미지 id는 실행 전체에서 고유, *_index는 같은 이미지 안의 상대 행 번호)
+SCHEMA = {
+    'image': {'image_id': 'int32', 'path': 'str', 'width': 'int32', 'height': 'int32', 'time': 'float64'},
+    'pred': {
+        'image_id': 'int32', 'class_id': 'int16', 'confidence': 'float32',
+        'x1': 'float32', 'y1': 'float32', 'x2': 'float32', 'y2': 'float32',
+        'gt_index': 'int32', 'iou': 'float32', 'best_iou': 'float32',
+    },
+    'gt': {
+        'image_id': 'int32', 'class_id': 'int16',
+        'x1': 'float32', 'y1': 'float32', 'x2': 'float32', 'y2': 'float32', 'pred_index': 'int32',
+    },
+}
+
+
+def column_path(directory, chunk, table, column):
+    return os.path.join(directory, chunk, f"{table}_{column}.npy")
+
+
+class ResultsWriter:
+    """이미지별 예측, GT, 매칭 결과를 청크 단위 열(.npy) 파일로 스트리밍 기록
+
+    행은 메모리에 모았다가 chunk_NNNNNN/{테이블}_{열}.npy로 기록하고 index.json을 원자적으로 교체한다.
+    CHUNK_ROWS에 도달하기 전의 마지막 청크는 열린 상태('open')로 두고, 아직 기록하지 않은 행이
+    flush_interval초 넘게 기다리거나 flush()/close()가 호출되면 그때까지 모은 행 전체를 새 버전 폴더
+    (chunk_NNNNNN_V)에 다시 쓴다. 느린 입고에서도 청크 수는 행 수 / CHUNK_ROWS로 유지된다.
+    바뀐 이전 버전 폴더는 읽는 쪽을 위해 한 번의 기록 동안 남겨 두었다가 지운다.
+    새 이미지가 없는 동안에는 flush_if_due()를 주기적으로 호출한다.
+    실행 중에도 index.json에 있는 청크는 모두 완전하므로 ResultsReader로 바로 읽을 수 있다.
+    같은 폴더에 다시 열면 열린 마지막 청크에 이어서 기록한다.
+    """
+
+    def __init__(self, directory, metadata=None, chunk_rows=CHUNK_ROWS, iou_threshold=MATCH_IOU, method='greedy',
+                 flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self.iou_threshold = iou_threshold
+        self.method = method
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self.index = read_index(directory) or {
+            'version': EXPORT_VERSION, 'schema': SCHEMA, 'runs': [], 'chunks': [],
+            'images': 0, 'pred': 0, 'gt': 0,
+        }
+        # 이어서 기록할 때 이번 실행의 이미지는 first_image_id부터
+        self.first_image_id = self.index['images']
+        self.index['runs'].append({
+            'started': time.time(), 'first_image': self.first_image_id, 'iou_threshold': iou_threshold,
+            'method': method, **(metadata or {}),
+        })
+        self._next_image_id = self.first_image_id
+        self._reset_buffers()
+        self._superseded = []   # 다시 써서 index에서 빠진 청크 폴더 (읽는 쪽을 위해 한 번 남겨 둠)
+        self._resume_open_chunk()
+        self._remove_unreferenced()
+        # 결과가 없어도 실행 기록이 남도록 인덱스를 먼저 기록
+        write_index(directory, self.index)
+
+    def _reset_buffers(self):
+        self._buffers = {table: {column: [] for column in columns} for table, columns in SCHEMA.items()}
+        self._pending_rows = 0      # 현재 청크에 모은 행 수 (이미 기록한 열린 청크의 행 포함)
+        self._pending_since = None  # 아직 기록하지 않은 첫 행을 모은 시각
+        self._open_chunk = None     # 현재 청크의 열린 index 항목
+
+    def _resume_open_chunk(self):
+        """이전 실행이 남긴 열린 마지막 청크를 버퍼로 읽어 이어서 기록"""
+        chunks = self.index['chunks']
+        if not chunks or not chunks[-1].get('open'):
+            return
+        entry = chunks[-1]
+        for table, columns in SCHEMA.items():
+            for column in columns:
+                self._buffers[table][column].append(np.load(column_path(self.directory, entry['name'], table, column)))
+        self._pending_rows = entry['image'] + entry['pred'] + entry['gt']
+        self._open_chunk = entry
+
+    def _remove_unreferenced(self):
+        """index에 없는 청크 폴더 정리 (이전 실행이 남긴 이전 버전)"""
+        referenced = {entry['name'] for entry in self.index['chunks']}
+        for name in os.listdir(self.directory):
+            if name.startswith('chunk_') and name not in referenced:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def add(self, image_path, width, height, detections, gt_classes, gt_xyxy):
+        """이미지 한 장의 예측(Detections)과 GT (클래스 (M,), 픽셀 xyxy (M, 4)) 매칭 후 추가, 이미지 id 반환"""
+        gt_xyxy = np.asarray(gt_xyxy, np.float32).reshape(-1, 4)
+        gt_classes = np.asarray(gt_classes, np.int16).reshape(-1)
+        matches = match_boxes(detections.xyxy, detections.confidence, detections.class_id,
+                              gt_xyxy, gt_classes, self.iou_threshold, self.method)
+        with self._lock:
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            image_id = self._next_image_id
+            self._next_image_id += 1
+            self._append('image', image_id=[image_id], path=[image_path], width=[width], height=[height],
+                         time=[time.time()])
+            self._append('pred', image_id=np.full(len(detections), image_id), class_id=detections.class_id,
+                         confidence=detections.confidence, x1=detections.xyxy[:, 0], y1=detections.xyxy[:, 1],
+                         x2=detections.xyxy[:, 2], y2=detections.xyxy[:, 3], gt_index=matches.pred_gt,
+                         iou=matches.pred_iou, best_iou=matches.best_iou)
+            self._append('gt', image_id=np.full(len(gt_classes), image_id), class_id=gt_classes,
+                         x1=gt_xyxy[:, 0], y1=gt_xyxy[:, 1], x2=gt_xyxy[:, 2], y2=gt_xyxy[:, 3],
+                         pred_index=matches.gt_pred)
+            self._pending_rows += 1 + len(detections) + len(gt_classes)
+            if self._pending_rows >= self.chunk_rows:
+                self._write_chunk_locked(seal=True)
+            elif self._flush_due():
+                self._write_chunk_locked(seal=False)
+        return image_id
+
+    def _append(self, table, **columns):
+        for column, values in columns.items():
+            self._buffers[table][column].append(values)
+
+    def flush(self):
+        """모은 행을 열린 마지막 청크로 기록"""
+        with self._lock:
+            if self._pending_since is not None:
+                self._write_chunk_locked(seal=False)
+
+    def flush_if_due(self):
+        """기록하지 않은 행이 flush_interval초 넘게 기다렸으면 기록 (입고가 멈춘 동안 주기적으로 호출)"""
+        with self._lock:
+            if self._flush_due():
+                self._write_chunk_locked(seal=False)
+
+    def _flush_due(self):
+        return (self.flush_interval is not None and self._pending_since is not None
+                and time.monotonic() - self._pending_since >= self.flush_interval)
+
+    def _write_chunk_locked(self, seal):
+        """현재 청크의 모든 행을 새 폴더에 기록하고 index에서 열린 이전 버전을 교체 (seal이면 다음 청크 시작)"""
+        previous = self._open_chunk
+        if previous is not None:
+            number, version = len(self.index['chunks']) - 1, previous.get('revision', 0) + 1
+        else:
+            number, version = len(self.index['chunks']), 0
+        chunk = f"chunk_{number:06d}" if version == 0 else f"chunk_{number:06d}_{version}"
+        os.makedirs(os.path.join(self.directory, chunk), exist_ok=True)
+        counts = {}
+        for table, columns in SCHEMA.items():
+            for column, dtype in columns.items():
+                parts = self._buffers[table][column]
+                values = np.concatenate(parts) if parts else np.zeros(0)
+                values = values.astype(str if dtype == 'str' else dtype)
+                # 다음 기록은 이어 붙인 배열 하나에 새 행만 더함
+                self._buffers[table][column] = [values]
+                np.save(column_path(self.directory, chunk, table, column), values, allow_pickle=False)
+                counts[table] = len(values)
+
+        if previous is not None:
+            self.index['chunks'].pop()
+            for table in SCHEMA:
+                self.index['images' if table == 'image' else table] -= previous[table]
+        entry = {'name': chunk, **counts}
+        if not seal:
+            entry.update(open=True, revision=version)
+        self.index['chunks'].append(entry)
+        for table, count in counts.items():
+            self.index['images' if table == 'image' else table] += count
+        write_index(self.directory, self.index)
+
+        # 교체된 버전은 다음 기록까지 남겨 두어 이전 index로 연 읽기가 끝날 시간을 줌
+        for name in self._superseded:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        self._superseded = [previous['name']] if previous is not None else []
+
+        if seal:
+            self._reset_buffers()
+        else:
+            self._open_chunk = entry
+            self._pending_since = None
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            for name in self._superseded:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            self._superseded = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_index(directory):
+    """index.json 읽기 (없으면 None)"""
+    try:
+        with open(os.path.join(directory, INDEX_FILENAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    if index.get('version') != EXPORT_VERSION:
+        raise ValueError(f"지원하지 않는 결과 내보내기 버전: {index.get('version')}")
+    return index
+
+
+def write_index(directory, index):
+    """index.json 원자적 교체 (청크 파일을 모두 쓴 뒤 호출)"""
+    path = os.path.join(directory, INDEX_FILENAME)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, path)
+
+
+class ResultsReader:
+    """ResultsWriter가 기록한 열 파일을 메모리 매핑으로 읽기
+
+    chunks()는 청크별 열 memmap을 그대로 돌려주므로 수백만 행도 복사 없이 순회할 수 있고,
+    column()/table()은 필요한 열만 이어 붙인다.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index = read_index(directory)
+        if self.index is None:
+            raise FileNotFoundError(f"결과 인덱스가 없습니다: {os.path.join(directory, INDEX_FILENAME)}")
+
+    def __len__(self):
+        return self.index['pred']
+
+    @property
+    def image_count(self):
+        return self.index['images']
+
+    def chunks(self, table, columns=None):
+        """청크별 {열: memmap} 순회"""
+        columns = columns or tuple(SCHEMA[table])
+        for chunk in self.index['chunks']:
+            yield {
+                column: np.load(column_path(self.directory, chunk['name'], table, column), mmap_mode='r')
+                for column in columns
+            }
+
+    def column(self, table, column):
+        """한 열 전체 (청크가 하나면 memmap 그대로)"""
+        parts = [chunk[column] for chunk in self.chunks(table, (column,))]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.zeros(0, SCHEMA[table][column] if SCHEMA[table][column] != 'str' else str)
+        return np.concatenate(parts)
+
+    def table(self, table, columns=None):
+        return {column: self.column(table, column) for column in columns or SCHEMA[table]}
+
+    def image_paths(self):
+        """이미지 id 순서의 경로 배열"""
+        return self.column('image', 'path')
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import sqlite3
+import numpy as np
+from box_ops import iou_matrix
+from result_export import ResultsReader
+
+DB_VERSION = 1
+# 한 트랜잭션으로 넣는 이미지 수 (executemany 한 번의 행 수를 제한)
+IMPORT_BATCH_IMAGES = 2000
+QUERY_LIMIT = 1000
+# 조회 시 신뢰도 순 커서에서 한 번에 가져오는 행 수
+FETCH_ROWS = 4096
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    created REAL NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS images (
+    image_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+-- gt_class/gt_iou: 클래스와 무관하게 가장 많이 겹치는 GT (없으면 -1/0), iou: 1:1 매칭 IoU (미매칭 0)
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id INTEGER NOT NULL,
+    image_id INTEGER NOT NULL,
+    class_id INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    x1 REAL NOT NULL, y1 REAL NOT NULL, x2 REAL NOT NULL, y2 REAL NOT NULL,
+    matched INTEGER NOT NULL,
+    iou REAL NOT NULL,
+    gt_class INTEGER NOT NULL,
+    gt_iou REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ground_truth (
+    run_id INTEGER NOT NULL,
+    image_id INTEGER NOT NULL,
+    class_id INTEGER NOT NULL,
+    x1 REAL NOT NULL, y1 REAL NOT NULL, x2 REAL NOT NULL, y2 REAL NOT NULL,
+    matched INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pred_run_conf ON predictions (run_id, confidence);
+CREATE INDEX IF NOT EXISTS pred_run_class_conf ON predictions (run_id, class_id, confidence);
+CREATE INDEX IF NOT EXISTS pred_run_gt_class_conf ON predictions (run_id, gt_class, confidence);
+CREATE INDEX IF NOT EXISTS pred_run_iou ON predictions (run_id, iou);
+CREATE INDEX IF NOT EXISTS pred_image ON predictions (image_id, run_id);
+CREATE INDEX IF NOT EXISTS gt_run_class ON ground_truth (run_id, class_id, matched);
+CREATE INDEX IF NOT EXISTS gt_image ON ground_truth (image_id, run_id);
+"""
+
+# 조회 조건 이름 -> SQL 조건
+PRED_FILTERS = {
+    'pred_class': "p.class_id = ?",
+    'gt_class': "p.gt_class = ?",
+    'min_conf': "p.confidence >= ?",
+    'max_conf': "p.confidence < ?",
+    'min_iou': "p.iou >= ?",
+    'max_iou': "p.iou < ?",
+}
+# 결과 종류: tp(매칭됨), fp(미매칭), confused(다른 클래스 GT와 겹침)
+OUTCOMES = {
+    'tp': "p.matched = 1",
+    'fp': "p.matched = 0",
+    'confused': "p.gt_class >= 0 AND p.gt_class != p.class_id",
+}
+
+
+def overlap_classes(pred_xyxy, gt_xyxy, gt_classes):
+    """예측마다 클래스와 무관하게 IoU가 가장 큰 GT의 (클래스 (N,), IoU (N,)), GT가 없으면 -1/0"""
+    ious = iou_matrix(pred_xyxy, gt_xyxy)
+    if ious.shape[1] == 0:
+        return np.full(len(ious), -1, np.int64), np.zeros(len(ious), np.float32)
+    best = ious.argmax(axis=1)
+    best_iou = ious[np.arange(len(ious)), best]
+    gt_class = np.where(best_iou > 0, np.asarray(gt_classes)[best], -1)
+    return gt_class.astype(np.int64), best_iou
+
+
+def image_slices(image_ids):
+    """정렬된 image_id 열에서 {image_id: slice}"""
+    if len(image_ids) == 0:
+        return {}
+    starts = np.flatnonzero(np.diff(image_ids)) + 1
+    bounds = np.concatenate([[0], starts, [len(image_ids)]])
+    return {int(image_ids[start]): slice(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:])}
+
+
+class ResultsDatabase:
+    """여러 실행의 예측/GT 매칭 결과를 모아 조회하는 로컬 SQLite 저장소
+
+    실행(run)마다 result_export 폴더를 한 번에 가져오며, 같은 이미지 경로는 실행 사이에 image_id를 공유한다.
+    조회는 (run_id, 클래스, 신뢰도) 등 복합 인덱스를 타도록 조건을 구성하고 이미지 단위로 묶어 반환한다.
+    연결은 만든 스레드에서만 사용한다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA temp_store=MEMORY")
+        self.connection.execute("PRAGMA cache_size=-65536")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, DB_VERSION):
+            self.connection.close()
+            raise ValueError(f"지원하지 않는 결과 DB 버전: {version}")
+        with self.connection:
+            self.connection.executescript(SCHEMA_SQL)
+            self.connection.execute(f"PRAGMA user_version={DB_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 가져오기
+    def import_export(self, directory, name=None, first_image=0, progress=None):
+        """result_export 폴더를 새 실행으로 가져오기, run_id 반환
+
+        first_image: 이 번호 이상의 이미지만 가져옴 (이어서 기록한 폴더에서 마지막 실행만 가져올 때)
+        청크를 memmap으로 읽어 IMPORT_BATCH_IMAGES장씩 한 트랜잭션으로 넣는다.
+        """
+        reader = ResultsReader(directory)
+        metadata = {'export': os.path.abspath(directory), 'runs': reader.index['runs']}
+        name = name or os.path.basename(os.path.normpath(directory))
+        with self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (name, created, metadata) VALUES (?, ?, ?)",
+                (name, time.time(), json.dumps(metadata, ensure_ascii=False))
+            ).lastrowid
+
+        imported = 0
+        chunks = zip(reader.chunks('image'), reader.chunks('pred'), reader.chunks('gt'))
+        for images, preds, gts in chunks:
+            first = int(np.searchsorted(images['image_id'], first_image))
+            if first == len(images['image_id']):
+                continue
+            pred_slices = image_slices(preds['image_id'])
+            gt_slices = image_slices(gts['image_id'])
+            for start in range(first, len(images['image_id']), IMPORT_BATCH_IMAGES):
+                batch = slice(start, start + IMPORT_BATCH_IMAGES)
+                self._import_batch(run_id, images['image_id'][batch], images['path'][batch],
+                                   preds, pred_slices, gts, gt_slices)
+                imported += len(images['image_id'][batch])
+                if progress is not None:
+                    progress(imported, reader.image_count - first_image)
+        return run_id
+
+    def _import_batch(self, run_id, export_ids, paths, preds, pred_slices, gts, gt_slices):
+        paths = paths.tolist()
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO images (path) VALUES (?)", ((p,) for p in paths))
+            image_ids = dict(self._select_in("SELECT path, image_id FROM images WHERE path IN ({})", paths))
+
+            pred_rows = []
+            gt_rows = []
+            for export_id, path in zip(export_ids.tolist(), paths):
+                image_id = image_ids[path]
+                pred = pred_slices.get(export_id, slice(0, 0))
+                gt = gt_slices.get(export_id, slice(0, 0))
+                pred_xyxy = np.stack([preds[c][pred] for c in ('x1', 'y1', 'x2', 'y2')], axis=1)
+                gt_xyxy = np.stack([gts[c][gt] for c in ('x1', 'y1', 'x2', 'y2')], axis=1)
+                gt_class, gt_iou = overlap_classes(pred_xyxy, gt_xyxy, gts['class_id'][gt])
+
+                count = len(pred_xyxy)
+                pred_rows.extend(zip(
+                    [run_id] * count, [image_id] * count, preds['class_id'][pred].tolist(),
+                    preds['confidence'][pred].tolist(), *pred_xyxy.T.tolist(),
+                    (preds['gt_index'][pred] >= 0).astype(int).tolist(), preds['iou'][pred].tolist(),
+                    gt_class.tolist(), gt_iou.tolist(),
+                ))
+                count = len(gt_xyxy)
+                gt_rows.extend(zip(
+                    [run_id] * count, [image_id] * count, gts['class_id'][gt].tolist(), *gt_xyxy.T.tolist(),
+                    (gts['pred_index'][gt] >= 0).astype(int).tolist(),
+                ))
+            self.connection.executemany("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                        pred_rows)
+            self.connection.executemany("INSERT INTO ground_truth VALUES (?, ?, ?, ?, ?, ?, ?, ?)", gt_rows)
+
+    def _select_in(self, sql, values, params=(), size=900):
+        """IN (...) 조회를 SQLite 변수 수 제한에 맞춰 나눠 실행 (IN 목록은 params 뒤에 바인딩)"""
+        rows = []
+        for start in range(0, len(values), size):
+            part = values[start:start + size]
+            rows.extend(self.connection.execute(sql.format(",".join("?" * len(part))), (*params, *part)).fetchall())
+        return rows
+
+    # 조회
+    def runs(self):
+        """[(run_id, 이름, 생성 시각)] 최신 순"""
+        return self.connection.execute("SELECT run_id, name, created FROM runs ORDER BY run_id DESC").fetchall()
+
+    def delete_run(self, run_id):
+        with self.connection:
+            self.connection.execute("DELETE FROM predictions WHERE run_id = ?", (run_id,))
+            self.connection.execute("DELETE FROM ground_truth WHERE run_id = ?", (run_id,))
+            self.connection.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    def query_images(self, run_id, outcome=None, limit=QUERY_LIMIT, **filters):
+        """조건에 맞는 예측이 있는 이미지 [(경로, 예측 수, 최대 신뢰도)] (최대 신뢰도 내림차순)
+
+        filters: pred_class, gt_class, min_conf, max_conf, min_iou, max_iou (None은 조건 없음)
+        outcome: 'tp', 'fp', 'confused' (다른 클래스 GT와 겹친 예측)
+        예) 모델이 Crack(0)을 0.8 이상으로 예측했지만 GT는 Scratch(1): pred_class=0, gt_class=1, min_conf=0.8
+
+        GROUP BY로 조건에 맞는 행 전체를 모으지 않고, (run_id, [클래스,] confidence) 인덱스를 신뢰도
+        내림차순으로 읽으며 처음 나온 이미지 limit개에서 멈춘다. 예측 수는 그 이미지들만 따로 센다.
+        """
+        conditions = ["p.run_id = ?"]
+        params = [run_id]
+        for key, value in filters.items():
+            if value is not None:
+                conditions.append(PRED_FILTERS[key])
+                params.append(value)
+        if outcome is not None:
+            conditions.append(OUTCOMES[outcome])
+        where = " AND ".join(conditions)
+
+        # 이미지별 첫 행이 최대 신뢰도
+        max_confidence = {}
+        cursor = self.connection.execute(
+            f"SELECT p.image_id, p.confidence FROM predictions p WHERE {where} ORDER BY p.confidence DESC", params)
+        while len(max_confidence) < limit:
+            rows = cursor.fetchmany(FETCH_ROWS)
+            if not rows:
+                break
+            for image_id, confidence in rows:
+                if image_id not in max_confidence:
+                    max_confidence[image_id] = confidence
+                    if len(max_confidence) == limit:
+                        break
+        cursor.close()
+
+        counts = {
+            image_id: (path, count) for image_id, path, count in self._select_in(
+                # IN 목록이 길면 플래너가 조건 인덱스를 고르므로 이미지 인덱스를 지정
+                "SELECT p.image_id, i.path, COUNT(*) FROM predictions p INDEXED BY pred_image "
+                "JOIN images i ON i.image_id = p.image_id "
+                f"WHERE {where} AND p.image_id IN ({{}}) GROUP BY p.image_id",
+                list(max_confidence), params)
+        }
+        return [(*counts[image_id], confidence) for image_id, confidence in max_confidence.items()]
+
+    def missed_images(self, run_id, gt_class=None, limit=QUERY_LIMIT):
+        """매칭되지 않은 GT(미검출)가 있는 이미지 [(경로, 미검출 수)]"""
+        conditions = ["g.run_id = ?", "g.matched = 0"]
+        params = [run_id]
+        if gt_class is not None:
+            conditions.insert(1, "g.class_id = ?")
+            params.append(gt_class)
+        sql = (
+            "SELECT i.path, COUNT(*) FROM ground_truth g JOIN images i ON i.image_id = g.image_id "
+            f"WHERE {' AND '.join(conditions)} GROUP BY g.image_id ORDER BY COUNT(*) DESC LIMIT ?"
+        )
+        return self.connection.execute(sql, (*params, limit)).fetchall()
@@ -0,0 +1,74 @@
+"""검출 결과 DB 도구 (내보내기 폴더 가져오기, 실행 목록, 이미지 조회)
+
+    python ImageViewerTool/results_query.py import --db results.sqlite --export inspected/export --name line3
+    python ImageViewerTool/results_query.py runs --db results.sqlite
+    python ImageViewerTool/results_query.py query --db results.sqlite --run 2 --pred-class 0 --gt-class 1 --min-conf 0.8
+"""
+import sys
+import time
+import logging
+import argparse
+from results_db import OUTCOMES, QUERY_LIMIT, ResultsDatabase
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def import_run(results_db, args):
+    started = time.perf_counter()
+    run_id = results_db.import_export(args.export, args.name, first_image=args.first_image)
+    logging.info(f"가져오기 완료: run #{run_id} ({time.perf_counter() - started:.1f}s)")
+    return 0
+
+
+def list_runs(results_db, args):
+    for run_id, name, created in results_db.runs():
+        print(f"#{run_id}\t{name}\t{time.strftime('%Y-%m-%d %H:%M', time.localtime(created))}")
+    return 0
+
+
+def query(results_db, args):
+    started = time.perf_counter()
+    if args.outcome == 'missed':
+        hits = [(path, count, None) for path, count in results_db.missed_images(args.run, args.gt_class, args.limit)]
+    else:
+        hits = results_db.query_images(args.run, args.outcome, args.limit, pred_class=args.pred_class,
+                                       gt_class=args.gt_class, min_conf=args.min_conf, max_conf=args.max_conf,
+                                       min_iou=args.min_iou, max_iou=args.max_iou)
+    for path, count, confidence in hits:
+        print(f"{path}\t{count}" + (f"\t{confidence:.3f}" if confidence is not None else ""))
+    logging.info(f"{len(hits)} images ({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검출 결과 DB 도구")
+    parser.add_argument('--db', required=True, help="결과 DB 경로 (SQLite, 없으면 생성)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="result_export 폴더를 새 실행으로 추가")
+    import_parser.add_argument('--export', required=True, help="batch_eval/hot_folder의 --export 폴더")
+    import_parser.add_argument('--name', help="실행 이름 (기본: 폴더 이름)")
+    import_parser.add_argument('--first-image', type=int, default=0, help="이 번호 이상의 이미지만 가져옴")
+
+    commands.add_parser('runs', help="실행 목록")
+
+    query_parser = commands.add_parser('query', help="조건에 맞는 예측이 있는 이미지 조회")
+    query_parser.add_argument('--run', type=int, required=True, help="실행 번호")
+    query_parser.add_argument('--pred-class', type=int, help="예측 클래스 id")
+    query_parser.add_argument('--gt-class', type=int, help="가장 많이 겹치는 GT 클래스 id (-1: GT 없음)")
+    query_parser.add_argument('--outcome', choices=tuple(OUTCOMES) + ('missed',),
+                              help="tp/fp/confused(다른 클래스 GT와 겹침)/missed(미검출 GT)")
+    query_parser.add_argument('--min-conf', type=float)
+    query_parser.add_argument('--max-conf', type=float)
+    query_parser.add_argument('--min-iou', type=float, help="매칭 IoU 하한")
+    query_parser.add_argument('--max-iou', type=float, help="매칭 IoU 상한")
+    query_parser.add_argument('--limit', type=int, default=QUERY_LIMIT)
+
+    args = parser.parse_args(argv)
+    commands = {'import': import_run, 'runs': list_runs, 'query': query}
+    with ResultsDatabase(args.db) as results_db:
+        return commands[args.command](results_db, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
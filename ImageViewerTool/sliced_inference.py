@@ -0,0 +1,160 @@
+import threading
+from concurrent.futures import Future
+import numpy as np
+from box_ops import box_area, iou_matrix
+from detections import Detections
+
+# 고해상도 이미지를 겹치는 타일로 나눠 추론한 뒤 전체 좌표로 합친다.
+# 네트워크 입력 크기로 축소되며 사라지는 얇은 Scratch, 작은 Crack을 원래 해상도로 검출하기 위한 모드.
+SLICE_MERGE_METHODS = ('nms', 'wbf')
+DEFAULT_TILE_SIZE = 640
+DEFAULT_TILE_OVERLAP = 0.2
+
+
+def slicing_options(tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_TILE_OVERLAP, merge='nms',
+                    merge_threshold=0.5, full_image=True):
+    """분할 추론 설정 (요청, 프레임 캐시 키, 결과 캐시 키에 그대로 사용)
+
+    full_image가 True이면 타일보다 큰 결함을 위해 전체 이미지 추론 결과도 함께 병합한다.
+    """
+    if merge not in SLICE_MERGE_METHODS:
+        raise ValueError(f"지원하지 않는 병합 방식: {merge}")
+    if not 0.0 <= overlap < 1.0:
+        raise ValueError(f"타일 겹침 비율은 0 이상 1 미만이어야 합니다: {overlap}")
+    if tile_size < 32:
+        raise ValueError(f"타일 크기가 너무 작습니다: {tile_size}")
+    return {
+        'tile_size': int(tile_size),
+        'overlap': float(overlap),
+        'merge': merge,
+        'merge_threshold': float(merge_threshold),
+        'full_image': bool(full_image),
+    }
+
+
+def tile_grid(width, height, tile_size, overlap):
+    """겹치는 타일 (x0, y0, x1, y1) 배열, 마지막 타일은 이미지 끝에 맞춤 (패딩 없음)"""
+    def starts(length):
+        if length <= tile_size:
+            return np.zeros(1, np.int64)
+        stride = max(1, int(tile_size * (1.0 - overlap)))
+        return np.append(np.arange(0, length - tile_size, stride), length - tile_size)
+
+    x0, y0 = np.meshgrid(starts(width), starts(height))
+    x0, y0 = x0.ravel(), y0.ravel()
+    return np.stack([x0, y0, np.minimum(x0 + tile_size, width), np.minimum(y0 + tile_size, height)], axis=1)
+
+
+def intersects(xyxy, rect):
+    """rect (x0, y0, x1, y1)와 겹치는 박스 마스크"""
+    return ((xyxy[:, 0] < rect[2]) & (xyxy[:, 2] > rect[0]) &
+            (xyxy[:, 1] < rect[3]) & (xyxy[:, 3] > rect[1]))
+
+
+def duplicate_pairs(xyxy, class_id, source, rects, merge_threshold):
+    """서로 겹치는 타일 쌍에서만 중복 후보 (i, j) 쌍 계산
+
+    한 타일의 박스는 다른 타일과 겹치는 영역에 걸쳐 있을 때만 그 타일의 박스와 중복될 수 있으므로
+    모든 박스 쌍 대신 겹침 영역에 걸친 박스끼리만 비교한다.
+    """
+    members = [np.flatnonzero(source == s) for s in range(len(rects))]
+    areas = box_area(xyxy)
+    rect_overlap = iou_matrix(rects, rects) > 0
+    pairs = []
+    for a, b in zip(*np.nonzero(np.triu(rect_overlap, k=1))):
+        left = members[a][intersects(xyxy[members[a]], rects[b])]
+        right = members[b][intersects(xyxy[members[b]], rects[a])]
+        if left.size == 0 or right.size == 0:
+            continue
+        top_left = np.maximum(xyxy[left, None, :2], xyxy[None, right, :2])
+        bottom_right = np.minimum(xyxy[left, None, 2:], xyxy[None, right, 2:])
+        wh = np.clip(bottom_right - top_left, 0, None)
+        smaller = np.minimum(areas[left, None], areas[None, right])
+        overlap = np.divide(wh[..., 0] * wh[..., 1], smaller, out=np.zeros(smaller.shape, np.float32),
+                            where=smaller > 0)
+        same_class = class_id[left, None] == class_id[None, right]
+        i, j = np.nonzero((overlap >= merge_threshold) & same_class)
+        pairs.append(np.stack([left[i], right[j]], axis=1))
+    return np.concatenate(pairs) if pairs else np.zeros((0, 2), np.int64)
+
+
+def merge_sliced(results, rects, merge='nms', merge_threshold=0.5):
+    """타일별 Detections를 전체 좌표로 옮긴 뒤 서로 다른 타일에서 나온 중복 박스 병합
+
+    rects는 결과별 타일 영역 (x0, y0, x1, y1)이다. 타일 경계에서 잘린 박스는 IoU가 낮으므로
+    작은 박스 기준 겹침 비율(IoS)로 중복을 판단한다. 같은 타일 안의 후보끼리는 병합하지 않는다
+    (신뢰도/IoU 임계값은 표시할 때 후보에 적용).
+    nms는 신뢰도가 가장 높은 박스를 남기고, wbf는 신뢰도 가중 평균 좌표와 최대 신뢰도로 합친다.
+    """
+    if not results:
+        return Detections()
+    rects = np.asarray(rects, np.float32).reshape(-1, 4)
+    xyxy = np.concatenate([result.xyxy + np.tile(rect[:2], 2) for result, rect in zip(results, rects)])
+    confidence = np.concatenate([result.confidence for result in results])
+    class_id = np.concatenate([result.class_id for result in results])
+    source = np.repeat(np.arange(len(results)), [len(result) for result in results])
+    if len(confidence) == 0:
+        return Detections()
+
+    order = np.argsort(-confidence, kind='stable')
+    xyxy, confidence, class_id, source = xyxy[order], confidence[order], class_id[order], source[order]
+    pairs = duplicate_pairs(xyxy, class_id, source, rects, merge_threshold)
+    if len(pairs) == 0:
+        return Detections(xyxy, confidence, class_id)
+
+    # 정렬 후 인덱스가 곧 신뢰도 순위이므로 앞쪽(높은 신뢰도) 박스가 뒤쪽 중복을 흡수
+    pairs = np.sort(pairs, axis=1)
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    starts = np.searchsorted(pairs[:, 0], np.arange(len(confidence) + 1))
+    merged = xyxy.copy()
+    alive = np.ones(len(confidence), bool)
+    for best in np.unique(pairs[:, 0]):
+        if not alive[best]:
+            continue
+        duplicates = pairs[starts[best]:starts[best + 1], 1]
+        duplicates = duplicates[alive[duplicates]]
+        if duplicates.size == 0:
+            continue
+        alive[duplicates] = False
+        if merge == 'wbf':
+            group = np.append(best, duplicates)
+            weights = confidence[group, None]
+            merged[best] = (xyxy[group] * weights).sum(axis=0) / weights.sum()
+
+    return Detections(merged[alive], confidence[alive], class_id[alive])
+
+
+def submit_sliced(submit, image, options, slicing):
+    """타일(과 전체 이미지) 추론을 submit(image, options)로 제출하고 병합 결과 Future 반환
+
+    submit은 BatchingInference.submit처럼 Future를 반환해야 한다. 타일은 배치 계층이 묶어 실행하며,
+    마지막 타일이 끝난 스레드에서 병합한다.
+    """
+    height, width = image.shape[:2]
+    tiles = tile_grid(width, height, slicing['tile_size'], slicing['overlap'])
+    crops = [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in tiles]
+    rects = tiles.tolist()
+    if slicing['full_image'] and len(tiles) > 1:
+        crops.append(image)
+        rects.append([0, 0, width, height])
+
+    futures = [submit(crop, options) for crop in crops]
+    merged = Future()
+    merged.set_running_or_notify_cancel()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            results = [future.result() for future in futures]
+            merged.set_result(merge_sliced(results, rects, slicing['merge'], slicing['merge_threshold']))
+        except Exception as e:
+            merged.set_exception(e)
+
+    for future in futures:
+        future.add_done_callback(on_done)
+    return merged
@@ -0,0 +1,45 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """뷰어 시작 단계별 소요 시간 기록
+
+    mark()는 GUI 스레드에서 이전 표시 시점부터의 시간을, stage()는 백그라운드 작업처럼
+    다른 단계와 겹쳐 실행되는 구간의 시간을 기록한다. ready()는 시작부터 검출 가능 시점까지의 시간이다.
+    """
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def mark(self, name):
+        """이전 mark() 이후 경과 시간을 name 단계로 기록"""
+        now = time.perf_counter()
+        with self._lock:
+            self.stages[name] = now - self._last
+            self._last = now
+
+    @contextmanager
+    def stage(self, name):
+        """with 블록 실행 시간을 name 단계로 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = time.perf_counter() - start
+
+    def ready(self, name='ready'):
+        """시작부터 현재까지 경과 시간 기록 후 로그 출력"""
+        with self._lock:
+            self.stages[name] = time.perf_counter() - self.started
+        logging.info(f"시작 시간: {self.summary()}")
+
+    def summary(self):
+        with self._lock:
+            return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.stages.items())
@@ -0,0 +1,420 @@
+import os
+import json
+import time
+import logging
+import threading
+from queue import Empty
+from collections import deque
+import cv2
+import numpy as np
+from preprocessing import PreprocessingPipeline
+from detections import candidate_options, filter_detections
+from frame_cache import IMAGE_EXTENSIONS
+from label_store import LabelStore
+from sliced_inference import submit_sliced
+
+# 단계 순서 (각 단계는 전용 스레드 하나에서 실행되고, 단계 앞에 크기 제한 큐가 있음)
+STAGES = ('decode', 'preprocess', 'detect', 'draw', 'persist')
+DROP_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+# 처리량/지연 시간 통계 구간
+STATS_WINDOW = 5.0
+# 저장 단계가 새 항목 없이 기다리는 동안 내보내기 기록 시점을 확인하는 주기 (초)
+IDLE_INTERVAL = 1.0
+
+
+class StageQueue:
+    """단계 사이의 크기 제한 큐
+
+    block: 가득 차면 앞 단계가 기다림 (역압력, 프레임 손실 없음, 입력 폴더에 파일이 쌓임)
+    drop_oldest: 가장 오래 기다린 항목을 버리고 추가 (최신 프레임 우선)
+    drop_newest: 새 항목을 버림 (먼저 들어온 프레임 우선)
+    """
+
+    def __init__(self, maxsize, policy='block'):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"지원하지 않는 드롭 정책: {policy}")
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item):
+        """항목 추가, 버려진 항목 반환 (버린 항목이 없으면 None, 닫힌 큐에서는 item)"""
+        with self._condition:
+            while self.policy == 'block' and len(self._items) >= self.maxsize and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return item
+            dropped = None
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == 'drop_newest':
+                    return item
+                dropped = self._items.popleft()
+            self._items.append(item)
+            self._condition.notify_all()
+            return dropped
+
+    def get(self, timeout=None):
+        """항목 꺼내기 (닫힌 뒤 비었으면 None, timeout초 동안 항목이 없으면 queue.Empty)"""
+        with self._condition:
+            while not self._items and not self._closed:
+                if not self._condition.wait(timeout):
+                    raise Empty
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._condition.notify_all()
+            return item
+
+    def close(self, discard=False):
+        """더 이상 받지 않음 (discard이면 남은 항목도 버림)"""
+        with self._condition:
+            self._closed = True
+            if discard:
+                self._items.clear()
+            self._condition.notify_all()
+
+
+def draw_boxes(image, detections, names=None):
+    """검출 박스와 클래스/신뢰도 표시 (뷰어 밖에서 쓰는 기본 그리기)"""
+    names = names or {}
+    for box in detections:
+        x1, y1, x2, y2 = box['coords']
+        class_name = names.get(box['class_id'], f"Class {box['class_id']}")
+        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.putText(image, f"{class_name} {box['confidence']:.2f}", (x1, max(12, y1 - 4)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 1)
+
+
+class StreamingPipeline:
+    """도착한 이미지를 순서대로 디코딩 → 전처리 → 검출 → 그리기 → 저장하는 스트리밍 파이프라인
+
+    단계마다 스레드 하나와 크기 제한 큐를 두어 느린 단계가 앞 단계를 막거나(block) 프레임을 버리게
+    (drop_oldest/drop_newest) 한다. 완료된 결과를 잃지 않도록 저장 단계 앞 큐는 항상 block이다.
+    검출 단계는 BatchingInference에 제출만 하고 결과는 그리기 단계에서 기다리므로
+    큐에 쌓인 이미지들이 한 번의 모델 호출로 묶인다.
+    결과는 output_dir/results.jsonl에 한 줄씩 추가하고, save_images이면 그린 이미지를 output_dir/annotated에 저장한다.
+    exporter(ResultsWriter)가 주어지면 이미지 옆 라벨과 매칭한 결과도 열 파일로 기록한다.
+    results.jsonl과 exporter는 저장 단계 스레드가 마지막 항목을 기록한 뒤 닫는다.
+    """
+
+    def __init__(self, inference, params, output_dir, conf_threshold=0.25, iou_threshold=0.45, slicing=None,
+                 queue_size=4, drop_policy='block', draw=None, save_images=True, on_result=None, exporter=None):
+        self.inference = inference
+        self.params = dict(params)
+        self.output_dir = output_dir
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.slicing = slicing
+        self.draw = draw or draw_boxes
+        self.save_images = save_images
+        self.on_result = on_result
+        self.exporter = exporter
+        self.label_store = LabelStore(max_entries=1)
+        # 전처리 단계 캐시는 이 파이프라인 스레드에서만 사용
+        self.preprocessor = PreprocessingPipeline()
+
+        self.queues = {
+            stage: StageQueue(queue_size, 'block' if stage == 'persist' else drop_policy) for stage in STAGES
+        }
+        self._handlers = {
+            'decode': self._decode, 'preprocess': self._preprocess, 'detect': self._detect,
+            'draw': self._draw, 'persist': self._persist,
+        }
+        self._threads = []
+        self._results_file = None
+        self._lock = threading.Lock()
+        self._stage_count = dict.fromkeys(STAGES, 0)
+        self._stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self._received = 0
+        self._completed = 0
+        self._errors = 0
+        self._recent = deque()  # (완료 시각, 지연 시간)
+        self._max_latency = 0.0
+        self._started = None
+
+    def start(self):
+        os.makedirs(os.path.join(self.output_dir, 'annotated') if self.save_images else self.output_dir,
+                    exist_ok=True)
+        self._results_file = open(os.path.join(self.output_dir, 'results.jsonl'), 'a', encoding='utf-8')
+        self._started = time.perf_counter()
+        for index, stage in enumerate(STAGES):
+            following = self.queues[STAGES[index + 1]] if index + 1 < len(STAGES) else None
+            thread = threading.Thread(target=self._run_stage, args=(stage, following),
+                                      name=f"stream-{stage}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, image_path):
+        """도착한 이미지 추가 (block 정책에서 첫 큐가 가득 차면 기다림)"""
+        with self._lock:
+            self._received += 1
+        dropped = self.queues['decode'].put({'path': image_path, 'arrived': time.perf_counter()})
+        if dropped is not None:
+            logging.debug(f"프레임 드롭: {dropped['path']}")
+
+    def stop(self, drain=True, timeout=10.0):
+        """파이프라인 종료 (drain이면 큐에 남은 이미지를 모두 처리한 뒤 종료)
+
+        모든 단계 스레드가 timeout 안에 끝났으면 True. 끝나지 않은 단계는 계속 남은 항목을 처리하고,
+        결과 파일과 exporter는 저장 단계가 끝날 때 닫힌다.
+        """
+        if self._started is None:
+            # 시작하지 않은 파이프라인은 닫을 스레드가 없음
+            if self.exporter is not None:
+                self.exporter.close()
+            return True
+        if drain:
+            # 앞 단계부터 닫으면 각 단계가 남은 항목을 처리한 뒤 다음 큐를 닫음
+            self.queues['decode'].close()
+        else:
+            for queue in self.queues.values():
+                queue.close(discard=True)
+        deadline = time.perf_counter() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.perf_counter()))
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        if self._threads:
+            logging.warning(f"스트리밍 종료 대기 시간 초과 ({timeout:g}s), 남은 단계: "
+                            f"{', '.join(thread.name for thread in self._threads)}")
+            return False
+        return True
+
+    def _run_stage(self, stage, following):
+        handler = self._handlers[stage]
+        queue = self.queues[stage]
+        idle = self._persist_idle if stage == 'persist' else None
+        while True:
+            try:
+                item = queue.get(IDLE_INTERVAL if idle is not None else None)
+            except Empty:
+                idle()
+                continue
+            if item is None:
+                break
+            try:
+                item = handler(item)
+            except Exception as e:
+                logging.error(f"스트리밍 {stage} 단계 오류 ({item['path']}): {e}")
+                with self._lock:
+                    self._errors += 1
+                continue
+            if item is not None and following is not None:
+                dropped = following.put(item)
+                if dropped is not None:
+                    logging.debug(f"프레임 드롭: {dropped['path']}")
+        if following is not None:
+            following.close()
+        else:
+            self._close_outputs()
+
+    def _close_outputs(self):
+        """저장 단계 스레드에서 마지막 항목 뒤 호출 (기록 중인 파일을 다른 스레드가 닫지 않도록)"""
+        self._results_file.close()
+        if self.exporter is not None:
+            try:
+                self.exporter.close()
+            except Exception as e:
+                logging.error(f"결과 내보내기 기록 오류: {e}")
+
+    def _record(self, stage, seconds):
+        with self._lock:
+            self._stage_count[stage] += 1
+            self._stage_seconds[stage] += seconds
+
+    def _decode(self, item):
+        start = time.perf_counter()
+        image = cv2.imdecode(np.fromfile(item['path'], np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("이미지를 디코딩할 수 없습니다")
+        item['image'] = image
+        self._record('decode', time.perf_counter() - start)
+        return item
+
+    def _preprocess(self, item):
+        start = time.perf_counter()
+        item['processed'] = self.preprocessor.run(item.pop('image'), self.params)
+        self._record('preprocess', time.perf_counter() - start)
+        return item
+
+    def _detect(self, item):
+        """추론 제출만 하고 다음 단계로 넘김 (완료 시각은 콜백에서 기록)"""
+        item['submitted'] = time.perf_counter()
+        if self.slicing is not None:
+            future = submit_sliced(self.inference.submit, item['processed'], candidate_options(), self.slicing)
+        else:
+            future = self.inference.submit(item['processed'], candidate_options())
+        future.add_done_callback(lambda _: item.setdefault('detected', time.perf_counter()))
+        item['future'] = future
+        return item
+
+    def _draw(self, item):
+        candidates = item.pop('future').result()
+        detected = item.setdefault('detected', time.perf_counter())
+        self._record('detect', detected - item['submitted'])
+
+        start = time.perf_counter()
+        item['detections'] = filter_detections(candidates, self.conf_threshold, self.iou_threshold)
+        # 전처리 결과는 이 항목만 사용하므로 복사 없이 그림
+        self.draw(item['processed'], item['detections'])
+        self._record('draw', time.perf_counter() - start)
+        return item
+
+    def _persist(self, item):
+        start = time.perf_counter()
+        detections = item['detections']
+        if self.save_images:
+            extension = os.path.splitext(item['path'])[1] or '.png'
+            ok, encoded = cv2.imencode(extension, item['processed'])
+            if ok:
+                encoded.tofile(os.path.join(self.output_dir, 'annotated', os.path.basename(item['path'])))
+        record = {
+            'image': item['path'],
+            'time': time.time(),
+            'detections': [
+                {'class_id': int(class_id), 'confidence': round(float(confidence), 4),
+                 'xyxy': [round(float(v), 1) for v in coords]}
+                for coords, confidence, class_id in zip(detections.xyxy, detections.confidence, detections.class_id)
+            ],
+        }
+        self._results_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._results_file.flush()
+        if self.exporter is not None:
+            img_height, img_width = item['processed'].shape[:2]
+            gt_classes, gt_xyxy = self.label_store.pixel_boxes(item['path'], img_width, img_height)
+            self.exporter.add(item['path'], img_width, img_height, detections, gt_classes, gt_xyxy)
+
+        now = time.perf_counter()
+        latency = now - item['arrived']
+        self._record('persist', now - start)
+        with self._lock:
+            self._completed += 1
+            self._max_latency = max(self._max_latency, latency)
+            self._recent.append((now, latency))
+            while self._recent and self._recent[0][0] < now - STATS_WINDOW:
+                self._recent.popleft()
+        if self.on_result is not None:
+            self.on_result({'image_path': item['path'], 'annotated': item['processed'],
+                            'detections': detections, 'latency': latency})
+        return None
+
+    def _persist_idle(self):
+        # 입고가 멈춰도 내보내기에 모은 행이 flush_interval 안에 기록되도록 함
+        if self.exporter is not None:
+            try:
+                self.exporter.flush_if_due()
+            except Exception as e:
+                logging.error(f"결과 내보내기 기록 오류: {e}")
+
+    def stats(self):
+        """누적/최근 처리량과 지연 시간, 단계별 평균 시간과 큐 상태"""
+        now = time.perf_counter()
+        with self._lock:
+            recent = [latency for finished, latency in self._recent if finished >= now - STATS_WINDOW]
+            window = min(STATS_WINDOW, now - self._started) if self._started else 0.0
+            return {
+                'received': self._received,
+                'completed': self._completed,
+                'dropped': sum(queue.dropped for queue in self.queues.values()),
+                'errors': self._errors,
+                'throughput': len(recent) / window if window > 0 else 0.0,
+                'latency_mean': sum(recent) / len(recent) if recent else 0.0,
+                'latency_max': self._max_latency,
+                'stages': {
+                    stage: {
+                        'count': self._stage_count[stage],
+                        'mean_ms': self._stage_seconds[stage] / self._stage_count[stage] * 1000
+                        if self._stage_count[stage] else 0.0,
+                        'queued': len(self.queues[stage]),
+                        'dropped': self.queues[stage].dropped,
+                    }
+                    for stage in STAGES
+                },
+            }
+
+
+def format_stats(stats):
+    """상태 표시/로그용 한 줄 요약"""
+    stages = " ".join(
+        f"{stage} {info['mean_ms']:.0f}ms/q{info['queued']}" for stage, info in stats['stages'].items()
+    )
+    return (f"{stats['throughput']:.1f} img/s, latency {stats['latency_mean'] * 1000:.0f} ms "
+            f"(max {stats['latency_max'] * 1000:.0f}), done {stats['completed']}/{stats['received']}, "
+            f"dropped {stats['dropped']}, errors {stats['errors']} | {stages}")
+
+
+class HotFolderSource:
+    """입력 폴더를 폴링해 새로 들어온 이미지를 도착 순서(수정 시각, 이름)대로 전달
+
+    카메라가 아직 쓰고 있는 파일을 읽지 않도록 크기와 수정 시각이 한 번의 폴링 동안 바뀌지 않은 파일만 전달한다.
+    include_existing이 False이면 시작 시점에 이미 있던 파일은 건너뛴다.
+    """
+
+    def __init__(self, folder, submit, extensions=IMAGE_EXTENSIONS, poll_interval=0.2, include_existing=False):
+        self.folder = folder
+        self.submit = submit
+        self.extensions = tuple(extensions)
+        self.poll_interval = poll_interval
+        self._seen = set()
+        self._pending = {}  # 이름 → (mtime_ns, 크기)
+        self._stop = threading.Event()
+        self._thread = None
+        if not include_existing:
+            self._seen.update(self._scan())
+
+    def _scan(self):
+        """폴더의 이미지 {이름: (mtime_ns, 크기)}"""
+        files = {}
+        try:
+            with os.scandir(self.folder) as scanner:
+                for entry in scanner:
+                    if entry.name in self._seen or not entry.name.lower().endswith(self.extensions):
+                        continue
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logging.error(f"입력 폴더 읽기 오류 ({self.folder}): {e}")
+        return files
+
+    def poll(self):
+        """쓰기가 끝난 새 파일 경로 목록 (도착 순서)"""
+        files = self._scan()
+        ready = [(signature[0], name) for name, signature in files.items()
+                 if self._pending.get(name) == signature and signature[1] > 0]
+        self._pending = {name: signature for name, signature in files.items()}
+        ready.sort()
+        for _, name in ready:
+            self._seen.add(name)
+            self._pending.pop(name, None)
+        return [os.path.join(self.folder, name) for _, name in ready]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stream-source", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """폴링 종료 (파이프라인 drain 전에 호출, block 정책에서 막힌 제출은 파이프라인이 큐를 비우면 풀림)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            for path in self.poll():
+                if self._stop.is_set():
+                    break
+                self.submit(path)
+            self._stop.wait(self.poll_interval)
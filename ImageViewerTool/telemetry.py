@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+# 단계별로 분위수 계산에 쓰는 최근 샘플 수
+TELEMETRY_WINDOW = 512
+# trace로 내보내기 위해 보관하는 최근 구간 수 (모든 단계 합계)
+TRACE_EVENTS = 20000
+PERCENTILES = (50, 95, 99)
+
+
+class StageTelemetry:
+    """단계별 소요 시간을 기록해 최근 구간 분위수와 Chrome/Perfetto trace를 제공
+
+    record()/stage()는 어느 스레드에서나 호출할 수 있다. 단계별로 최근 window개 샘플만 보관하므로
+    분위수는 오래 실행해도 최근 동작을 반영하고, trace는 최근 trace_events개 구간을 스레드별로 보여준다.
+    """
+
+    def __init__(self, window=TELEMETRY_WINDOW, trace_events=TRACE_EVENTS):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+        self._trace = deque(maxlen=trace_events)
+        self._thread_names = {}
+
+    def record(self, name, start, seconds, **args):
+        """start(perf_counter 기준)부터 seconds 동안의 name 단계 기록"""
+        thread = threading.current_thread()
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+            samples.append(seconds)
+            self._counts[name] += 1
+            self._trace.append((name, start, seconds, thread.ident, args))
+            self._thread_names.setdefault(thread.ident, thread.name)
+
+    @contextmanager
+    def stage(self, name, **args):
+        """with 블록 실행 시간을 name 단계로 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, **args)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._trace.clear()
+
+    def summary(self):
+        """{단계: {'count', 'last_ms', 'p50', 'p95', 'p99', 'max_ms'}} (최근 window개 샘플 기준, 기록 순서)"""
+        with self._lock:
+            snapshot = {name: (np.fromiter(samples, np.float64, len(samples)), self._counts[name])
+                        for name, samples in self._samples.items()}
+        summary = {}
+        for name, (samples, count) in snapshot.items():
+            values = np.percentile(samples, PERCENTILES) * 1000
+            summary[name] = {
+                'count': count,
+                'last_ms': float(samples[-1] * 1000),
+                **{f"p{p}": float(value) for p, value in zip(PERCENTILES, values)},
+                'max_ms': float(samples.max() * 1000),
+            }
+        return summary
+
+    def trace_events(self):
+        """Chrome trace 형식 이벤트 목록 (완료 이벤트 'X', 시각은 마이크로초)"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._trace)
+            thread_names = dict(self._thread_names)
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in thread_names.items()
+        ]
+        events.extend(
+            {'name': name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid,
+             'ts': start * 1e6, 'dur': seconds * 1e6, 'args': args}
+            for name, start, seconds, tid, args in spans
+        )
+        return events
+
+    def export_trace(self, path):
+        """Chrome(chrome://tracing)/Perfetto(ui.perfetto.dev)에서 열 수 있는 JSON trace 저장"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+        os.replace(temp_path, path)
+
+
+def format_summary(summary):
+    """패널/로그용 단계별 표 (ms)"""
+    lines = [f"{'stage':<24}{'n':>6}{'last':>8}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for name, stats in summary.items():
+        lines.append(f"{name:<24}{stats['count']:>6}{stats['last_ms']:>8.1f}{stats['p50']:>8.1f}"
+                     f"{stats['p95']:>8.1f}{stats['p99']:>8.1f}")
+    return "\n".join(lines)
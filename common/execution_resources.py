@@ -0,0 +1,160 @@
+import os
+import sys
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# 환경 변수로 코어 배분을 덮어쓸 수 있다 (공유 검사 PC 튜닝용)
+ENV_OVERRIDES = {
+    "total_cores": "VDT_CORES",
+    "opencv_threads": "VDT_OPENCV_THREADS",
+    "inference_threads": "VDT_INFERENCE_THREADS",
+    "worker_threads": "VDT_WORKER_THREADS",
+}
+
+
+def available_cores():
+    """현재 프로세스가 사용할 수 있는 코어 수 (CPU affinity 반영)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ExecutionResources:
+    """OpenCV, 추론 런타임, 애플리케이션 워커 풀 사이의 코어 배분
+
+    interactive: GUI처럼 전처리와 추론이 한 파이프라인에서 순차 실행되는 경우.
+                 워커 풀은 작게 두고 OpenCV와 추론 런타임이 나머지 코어를 사용한다.
+    batch:       여러 워커가 동시에 이미지를 처리하는 경우.
+                 OpenCV는 단일 스레드로 두고 코어를 워커 풀과 추론 런타임에 나눈다.
+    """
+
+    def __init__(self, mode='interactive', total_cores=None, opencv_threads=None,
+                 inference_threads=None, worker_threads=None):
+        self.mode = mode
+        requested = {
+            "total_cores": total_cores,
+            "opencv_threads": opencv_threads,
+            "inference_threads": inference_threads,
+            "worker_threads": worker_threads,
+        }
+        for key, env_name in ENV_OVERRIDES.items():
+            if requested[key] is None and os.environ.get(env_name):
+                try:
+                    requested[key] = int(os.environ[env_name])
+                except ValueError:
+                    logging.error(f"잘못된 환경 변수 값: {env_name}={os.environ[env_name]}")
+
+        self.total_cores = max(1, min(requested["total_cores"] or available_cores(), available_cores()))
+        cores = self.total_cores
+
+        if mode == 'batch':
+            default_inference = max(1, cores // 2)
+            default_workers = max(1, cores - default_inference)
+            default_opencv = 1
+        else:
+            default_workers = max(1, cores // 4)
+            default_opencv = max(1, cores - default_workers)
+            default_inference = max(1, cores - default_workers)
+
+        self.opencv_threads = max(1, requested["opencv_threads"] or default_opencv)
+        self.inference_threads = max(1, requested["inference_threads"] or default_inference)
+        self.worker_threads = max(1, requested["worker_threads"] or default_workers)
+
+        self._executors = {}
+        self._pool_sizes = {}  # 풀 이름 → 생성 시 지정한 스레드 수
+        self._lock = threading.Lock()
+        self._applied_torch = False
+
+    def apply(self):
+        """배분 결과를 OpenCV와 (로드된 경우) Torch에 적용"""
+        cv2.setNumThreads(self.opencv_threads)
+
+        # Torch/OpenMP가 아직 로드되지 않았다면 환경 변수로 기본 스레드 수를 고정
+        for env_name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ.setdefault(env_name, str(self.inference_threads))
+
+        self.apply_torch()
+        return self
+
+    def apply_torch(self):
+        """Torch intra-op / inter-op 스레드 수 설정 (Torch가 로드된 이후에만 적용)"""
+        torch = sys.modules.get("torch")
+        if torch is None or self._applied_torch:
+            return
+        try:
+            torch.set_num_threads(self.inference_threads)
+            torch.set_num_interop_threads(1)
+        except RuntimeError as e:
+            # inter-op 스레드 수는 병렬 작업이 시작된 후에는 변경할 수 없다
+            logging.warning(f"Torch 스레드 설정 일부 실패: {e}")
+        self._applied_torch = True
+
+    def executor(self, name, max_workers=None):
+        """이름별 공유 스레드 풀 반환 (워커 배분을 넘지 않음)"""
+        with self._lock:
+            if name not in self._executors:
+                workers = max(1, min(max_workers or self.worker_threads, self.worker_threads))
+                self._executors[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+                self._pool_sizes[name] = workers
+            return self._executors[name]
+
+    def shutdown(self):
+        """공유 스레드 풀 종료"""
+        with self._lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executors.clear()
+            self._pool_sizes.clear()
+
+    def report(self):
+        """실제로 적용된 설정 반환"""
+        with self._lock:
+            pools = dict(self._pool_sizes)
+        report = {
+            "mode": self.mode,
+            "available_cores": available_cores(),
+            "total_cores": self.total_cores,
+            "opencv_threads": cv2.getNumThreads(),
+            "inference_threads": self.inference_threads,
+            "worker_threads": self.worker_threads,
+            "pools": pools,
+        }
+        torch = sys.modules.get("torch")
+        if torch is not None:
+            report["torch_threads"] = torch.get_num_threads()
+            report["torch_interop_threads"] = torch.get_num_interop_threads()
+        return report
+
+    def describe(self):
+        """설정 요약 문자열"""
+        report = self.report()
+        text = (f"mode={report['mode']} cores={report['total_cores']}/{report['available_cores']} "
+                f"opencv={report['opencv_threads']} inference={report['inference_threads']} "
+                f"workers={report['worker_threads']}")
+        if "torch_threads" in report:
+            text += f" torch={report['torch_threads']}/{report['torch_interop_threads']}"
+        return text
+
+
+_resources = None
+
+
+def configure_resources(mode='interactive', **overrides):
+    """프로세스 전역 배분을 설정하고 적용"""
+    global _resources
+    if _resources is not None:
+        _resources.shutdown()
+    _resources = ExecutionResources(mode, **overrides).apply()
+    logging.info(f"실행 리소스 설정: {_resources.describe()}")
+    return _resources
+
+
+def get_resources():
+    """현재 배분 반환 (설정되지 않았다면 interactive 기본값으로 설정)"""
+    if _resources is None:
+        return configure_resources()
+    return _resources